@@ -0,0 +1,371 @@
+import argparse
+import csv
+import glob
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.binary_log import BinaryLog, EXTENSION
+from core.channels import LEGACY_COLUMNS, channel_names
+from core.data_logger import LOG_STEM
+
+CHANNELS = channel_names()
+COLUMNS  = ('t',) + CHANNELS
+INDEX_NAME = 'index.sqlite'
+
+# Bumped whenever the tables or their contents change; older index files
+# are rebuilt
+SCHEMA_VERSION = 3
+
+# Run logs only (see LOG_STEM); exports such as *_iso.csv are skipped
+_LOG_NAME = re.compile(LOG_STEM.pattern + r'(?:\.csv|' + re.escape(EXTENSION) + ')')
+_RUN_ID = re.compile(r'data_(\d{8}_\d{6})_')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path  TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    path     TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    run_id   TEXT NOT NULL,
+    state    TEXT NOT NULL,
+    samples  INTEGER NOT NULL,
+    t_start  REAL,
+    duration REAL,
+    PRIMARY KEY (path, state)
+);
+CREATE TABLE IF NOT EXISTS channel_stats (
+    path    TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    state   TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    count   INTEGER NOT NULL,
+    min     REAL,
+    max     REAL,
+    mean    REAL,
+    PRIMARY KEY (path, state, channel)
+);
+CREATE INDEX IF NOT EXISTS runs_run_id ON runs(run_id);
+CREATE INDEX IF NOT EXISTS runs_state ON runs(state);
+"""
+
+
+def _default_directory():
+    base = os.path.dirname(__file__)
+    return os.path.abspath(os.path.join(base, '..', 'logs'))
+
+
+def _run_id(path: str) -> str:
+    # The timestamp; labels may contain underscores (GROUSERTEST_R1)
+    name = os.path.basename(path)
+    match = _RUN_ID.match(name)
+    return match.group(1) if match else os.path.splitext(name)[0]
+
+
+def _state_names():
+    from core.controller import State
+    return {s.value: s.name for s in State}
+
+
+# --- Chunked loading --------------------------------------------------------
+def _cell(text: str) -> float:
+    return float(text) if text else np.nan
+
+
+def _iter_csv(path: str, chunk_rows: int):
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        # Column positions by channel name; v1..v3 of older logs renamed
+        pos = {LEGACY_COLUMNS.get(name, name): i for i, name in enumerate(header)}
+        rows = []
+        for row in reader:
+            # Segment markers and truncated rows
+            if len(row) < len(header) or row[0].startswith('#'):
+                continue
+            rows.append(row)
+            if len(rows) >= chunk_rows:
+                yield _csv_chunk(rows, pos)
+                rows = []
+        if rows:
+            yield _csv_chunk(rows, pos)
+
+
+def _csv_chunk(rows, pos) -> dict:
+    chunk = {'state': np.array([r[pos['state']] for r in rows])}
+    for name in COLUMNS:
+        i = pos.get(name)
+        if i is None:
+            chunk[name] = np.full(len(rows), np.nan)
+        else:
+            chunk[name] = np.array([_cell(r[i]) for r in rows], dtype=np.float64)
+    return chunk
+
+
+def _iter_binary(path: str, chunk_rows: int):
+    log = BinaryLog(path)
+    if not len(log):
+        return
+    names = _state_names()
+    columns = {LEGACY_COLUMNS.get(name, name): col for name, col in log.columns.items()}
+    for start in range(0, len(log), chunk_rows):
+        stop = start + chunk_rows
+        codes = log['state'][start:stop]
+        chunk = {'state': np.array([names.get(int(c), 'UNKNOWN') for c in codes])}
+        for name in COLUMNS:
+            if name in columns:
+                chunk[name] = np.asarray(columns[name][start:stop], dtype=np.float64)
+            else:
+                chunk[name] = np.full(len(codes), np.nan)
+        yield chunk
+
+
+def iter_chunks(path: str, chunk_rows: int = 65536):
+    """
+    Yield a log file as dicts of NumPy arrays ('state', 't' and one per
+    registered channel), chunk_rows rows at a time. Missing channel values
+    are NaN; channels of older logs are mapped through LEGACY_COLUMNS.
+    """
+    if path.endswith(EXTENSION):
+        yield from _iter_binary(path, chunk_rows)
+    else:
+        yield from _iter_csv(path, chunk_rows)
+
+
+def load_run(path: str, state: str = None, columns=COLUMNS) -> dict:
+    """Load selected columns of one run (optionally one state segment) into arrays."""
+    parts = {name: [] for name in columns}
+    for chunk in iter_chunks(path):
+        mask = chunk['state'] == state if state is not None else slice(None)
+        for name in columns:
+            parts[name].append(chunk[name][mask])
+    return {name: np.concatenate(p) if p else np.empty(0) for name, p in parts.items()}
+
+
+# --- Scanning ---------------------------------------------------------------
+def scan_file(path: str) -> list:
+    """
+    Summarise one log file, one row per state found in it.
+
+    Returns:
+        list of dicts matching the columns of the runs table, plus a
+        'channels' dict of channel -> (count, min, max, mean) for the
+        channels that have values.
+    """
+    stats = {}
+    for chunk in iter_chunks(path):
+        for state in np.unique(chunk['state']):
+            sel = chunk['state'] == state
+            t = chunk['t'][sel]
+            s = stats.setdefault(str(state), {
+                'samples': 0, 't_start': np.inf, 't_end': -np.inf,
+                **{c: [np.inf, -np.inf, 0.0, 0] for c in CHANNELS}
+            })
+            s['samples'] += len(t)
+            s['t_start'] = min(s['t_start'], t.min())
+            s['t_end'] = max(s['t_end'], t.max())
+            for c in CHANNELS:
+                v = chunk[c][sel]
+                v = v[~np.isnan(v)]
+                if len(v):
+                    acc = s[c]
+                    acc[0] = min(acc[0], v.min())
+                    acc[1] = max(acc[1], v.max())
+                    acc[2] += v.sum()
+                    acc[3] += len(v)
+
+    rows = []
+    for state, s in stats.items():
+        row = {
+            'path': path, 'run_id': _run_id(path), 'state': state,
+            'samples': s['samples'], 't_start': float(s['t_start']),
+            'duration': float(s['t_end'] - s['t_start']),
+            'channels': {},
+        }
+        for c in CHANNELS:
+            lo, hi, total, n = s[c]
+            if n:
+                row['channels'][c] = (n, float(lo), float(hi), float(total / n))
+        rows.append(row)
+    return rows
+
+
+class LogIndex:
+    """
+    Persistent SQLite index of the runs in logs/.
+
+    update() only parses files that are new or whose size/mtime changed and
+    drops entries for deleted files; a large initial scan is spread over a
+    process pool.
+    """
+    def __init__(self, directory: str = None, db_path: str = None):
+        self.directory = directory or _default_directory()
+        self.db_path = db_path or os.path.join(self.directory, INDEX_NAME)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # The index is a cache of the log files; rebuild it from scratch
+            self.db.executescript(
+                "DROP TABLE IF EXISTS channel_stats; DROP TABLE IF EXISTS runs; "
+                "DROP TABLE IF EXISTS files;"
+            )
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def log_files(self) -> list:
+        pattern = os.path.join(self.directory, 'data_*')
+        return sorted(p for p in glob.glob(pattern)
+                      if _LOG_NAME.fullmatch(os.path.basename(p)))
+
+    @staticmethod
+    def _signature(path: str):
+        if os.path.isdir(path):
+            # Binary logs: newest column file decides
+            stats = [os.stat(os.path.join(path, f)) for f in os.listdir(path)]
+            return (max((s.st_mtime for s in stats), default=0.0),
+                    sum(s.st_size for s in stats))
+        st = os.stat(path)
+        return st.st_mtime, st.st_size
+
+    def update(self, workers: int = None, parallel_threshold: int = 8) -> int:
+        """
+        Bring the index up to date.
+
+        Returns:
+            int: Number of files (re)scanned.
+        """
+        known = {r['path']: (r['mtime'], r['size'])
+                 for r in self.db.execute("SELECT path, mtime, size FROM files")}
+        current = {p: self._signature(p) for p in self.log_files()}
+        stale = [p for p, sig in current.items() if known.get(p) != tuple(sig)]
+        removed = [p for p in known if p not in current]
+
+        if len(stale) >= parallel_threshold and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(scan_file, stale, chunksize=4))
+        else:
+            results = [scan_file(p) for p in stale]
+
+        with self.db:
+            for path in removed + stale:
+                self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+            for path, rows in zip(stale, results):
+                mtime, size = current[path]
+                self.db.execute("INSERT INTO files VALUES (?, ?, ?)", (path, mtime, size))
+                for row in rows:
+                    row = dict(row)
+                    channels = row.pop('channels')
+                    names = ', '.join(row)
+                    marks = ', '.join('?' * len(row))
+                    self.db.execute(f"INSERT INTO runs ({names}) VALUES ({marks})",
+                                    tuple(row.values()))
+                    self.db.executemany(
+                        "INSERT INTO channel_stats VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [(path, row['state'], c, *stats) for c, stats in channels.items()]
+                    )
+        return len(stale)
+
+    def runs(self, state: str = None, run_id: str = None) -> list:
+        """
+        Indexed runs, optionally filtered, as dicts with the runs table
+        columns plus '<channel>_count', '_min', '_max' and '_mean' for every
+        channel that has values in the run.
+        """
+        query, args = "SELECT * FROM runs WHERE 1", []
+        if state is not None:
+            query += " AND state = ?"
+            args.append(state)
+        if run_id is not None:
+            query += " AND run_id = ?"
+            args.append(run_id)
+        runs = [dict(r) for r in self.db.execute(query + " ORDER BY run_id, state", args)]
+        by_key = {(r['path'], r['state']): r for r in runs}
+        for s in self.db.execute("SELECT * FROM channel_stats"):
+            run = by_key.get((s['path'], s['state']))
+            if run is not None:
+                for k in ('count', 'min', 'max', 'mean'):
+                    run[f"{s['channel']}_{k}"] = s[k]
+        return runs
+
+    def load(self, rows, columns=COLUMNS):
+        """Lazily load the selected runs: yields (row, arrays) one run at a time."""
+        for row in rows:
+            yield row, load_run(row['path'], row['state'], columns)
+
+
+def summarize(rows) -> dict:
+    """
+    Vectorized statistics across indexed runs, grouped by state.
+
+    Returns:
+        dict: state -> {'runs', 'samples', 'duration_mean', 'duration_max',
+        '<ch>_count', '<ch>_min', '<ch>_max', '<ch>_mean'} where channel
+        means are weighted by each run's count of values of that channel
+        (most channels are only measured in some rows).
+    """
+    if not rows:
+        return {}
+    states = np.array([r['state'] for r in rows])
+    samples = np.array([r['samples'] for r in rows], dtype=np.float64)
+    duration = np.array([r['duration'] for r in rows], dtype=np.float64)
+    stats = {}
+    for c in CHANNELS:
+        for k in ('count', 'min', 'max', 'mean'):
+            stats[f'{c}_{k}'] = np.array(
+                [r.get(f'{c}_{k}', np.nan) for r in rows], dtype=np.float64)
+
+    summary = {}
+    for state in np.unique(states):
+        sel = states == state
+        entry = {
+            'runs': int(sel.sum()),
+            'samples': int(samples[sel].sum()),
+            'duration_mean': float(duration[sel].mean()),
+            'duration_max': float(duration[sel].max()),
+        }
+        for c in CHANNELS:
+            means = stats[f'{c}_mean'][sel]
+            ok = ~np.isnan(means)
+            if not ok.any():
+                continue
+            counts = stats[f'{c}_count'][sel][ok]
+            entry[f'{c}_count'] = int(counts.sum())
+            entry[f'{c}_min'] = float(np.nanmin(stats[f'{c}_min'][sel]))
+            entry[f'{c}_max'] = float(np.nanmax(stats[f'{c}_max'][sel]))
+            entry[f'{c}_mean'] = float(np.average(means[ok], weights=counts))
+        summary[str(state)] = entry
+    return summary
+
+
+def main(argv=None):
+    """Update the logs/ index and print the runs and a per-state summary."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--directory', default=None)
+    parser.add_argument('--state', default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    index = LogIndex(args.directory)
+    scanned = index.update(workers=args.workers)
+    rows = index.runs(state=args.state)
+    print(f"[log_index] {scanned} file(s) scanned, {len(rows)} run(s) indexed")
+    for r in rows:
+        print(f"{r['run_id']:<16} {r['state']:<12} n={r['samples']:<7} {r['duration']:8.2f} s")
+    for state, entry in summarize(rows).items():
+        print(f"{state}: " + ", ".join(
+            f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in entry.items()))
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,429 @@
+"""
+Hardware-free benchmark suite. Results are written as JSON so runs from
+different commits can be compared:
+
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --compare bench.json      # later, on another commit
+    python -m benchmarks.run --only pid logger
+
+Qt benchmarks use the offscreen platform; the serial benchmark needs a
+pty (Linux/macOS) and is skipped elsewhere.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+# Hardware-free: acquire from the plant model unless told otherwise
+os.environ.setdefault('ACQ_SOURCE', 'plant')
+
+import numpy as np
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+import config
+
+
+def _rate(count: int, seconds: float) -> float:
+    return count / seconds if seconds > 0 else 0.0
+
+
+def _percentiles(values, scale: float = 1.0) -> dict:
+    values = np.asarray(values, dtype=float) * scale
+    if values.size == 0:
+        return {}
+    return {
+        'p50': float(np.percentile(values, 50)),
+        'p99': float(np.percentile(values, 99)),
+        'max': float(values.max()),
+        'mean': float(values.mean()),
+    }
+
+
+def _qt_app():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([sys.argv[0]])
+
+
+def _run_until(app, predicate, timeout: float):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+# --- Benchmarks ---------------------------------------------------------------
+def bench_pid(n: int = 200000) -> dict:
+    """PID.update calls per second, every call past the sample time."""
+    from core.pid import PID, AdvancedPID, GainSchedule
+    args = (1.0, 0.5, 0.1)
+    kwargs = dict(setpoint=1.0, sample_time=0.001, output_limits=(-100, 100))
+    times = (np.arange(n) * 0.001).tolist()
+    result = {}
+    for name, pid in (
+        ('classic', PID(*args, **kwargs)),
+        ('advanced', AdvancedPID(*args, derivative_tau=0.01, **kwargs)),
+        ('advanced_scheduled', AdvancedPID(
+            *args, derivative_tau=0.01, fixed_step=True,
+            schedule=GainSchedule([(0, 1.0, 0.5, 0.1), (90, 2.0, 1.0, 0.2)]), **kwargs
+        )),
+    ):
+        update = pid.update
+        start = time.perf_counter()
+        for i, t in enumerate(times):
+            update(0.5 + (i & 7) * 0.01, current_time=t)
+        elapsed = time.perf_counter() - start
+        result[name] = {'calls': n, 'calls_per_s': _rate(n, elapsed),
+                        'ns_per_call': elapsed / n * 1e9}
+    return result
+
+
+def bench_logger(n: int = 100000, batch_rows: int = 100) -> dict:
+    """Rows per second logged one sample or one batch per call, per logger flavour."""
+    from core.binary_log import BinaryDataLogger
+    from core.channels import make_sample, new_samples
+    from core.controller import State
+    from core.data_logger import DataLogger, BufferedDataLogger
+
+    flavours = {
+        'csv': lambda d: DataLogger(state=State.GROUSERTEST, directory=d),
+        'csv_buffered': lambda d: BufferedDataLogger(
+            DataLogger(state=State.GROUSERTEST, directory=d), queue_size=n),
+        'binary_buffered': lambda d: BufferedDataLogger(
+            BinaryDataLogger(state=State.GROUSERTEST, directory=d), queue_size=n),
+    }
+    results = {}
+    for name, make in flavours.items():
+        with tempfile.TemporaryDirectory() as d:
+            logger = make(d)
+            log = logger.log
+            state = State.GROUSERTEST
+            start = time.perf_counter()
+            for i in range(n):
+                log(make_sample(state, i * 0.01, grouser_shear=1.5))
+            logged = time.perf_counter() - start
+            logger.close()
+            total = time.perf_counter() - start
+
+            # The same rows handed over as batches of `batch` sample records
+            logger = make(d)
+            batch = new_samples(batch_rows)
+            batch['state'] = state.value
+            batch['grouser_shear'] = 1.5
+            start = time.perf_counter()
+            for i in range(n // batch_rows):
+                batch['t'] = np.arange(i * batch_rows, (i + 1) * batch_rows) * 0.01
+                logger.log(batch.copy())
+            logger.close()
+            batched = time.perf_counter() - start
+        results[name] = {
+            'rows': n,
+            'log_rows_per_s': _rate(n, logged),
+            'end_to_end_rows_per_s': _rate(n, total),
+            'batched_end_to_end_rows_per_s': _rate(n // batch_rows * batch_rows, batched),
+        }
+    return results
+
+
+def bench_plot(sizes=(1000, 10000, 100000), appends: int = 1000) -> dict:
+    """MainWindow.update_graphs cost and plot redraw time as the buffer grows."""
+    from core.channels import make_sample
+    from core.controller import Controller, State
+    from gui.main_window import MainWindow
+
+    app = _qt_app()
+    controller = Controller(interval=100)
+    window = MainWindow(controller)
+    window.resize(1200, 700)
+    window.show()
+    window._init_plots()
+    app.processEvents()
+    plot = window.plots[0]
+
+    def sample(i, value):
+        return make_sample(State.GROUSERTEST, i * 0.01, grouser_shear=value)
+
+    results = {}
+    filled = 0
+    for size in sizes:
+        # Fill up to the target size, then time a batch of appends + redraws
+        for i in range(filled, size - appends):
+            window.update_graphs(sample(i, np.sin(i * 1e-3)))
+        filled = max(filled, size - appends)
+        start = time.perf_counter()
+        for i in range(filled, filled + appends):
+            window.update_graphs(sample(i, np.sin(i * 1e-3)))
+        append_s = time.perf_counter() - start
+        filled += appends
+
+        redraws = []
+        for _ in range(10):
+            window.update_graphs(sample(filled, 0.0))
+            filled += 1
+            start = time.perf_counter()
+            window._refresh_plots()
+            redraws.append(time.perf_counter() - start)
+        results[str(size)] = {
+            'buffer': len(plot.buffer),
+            'update_graphs_us': append_s / appends * 1e6,
+            'redraw_ms': _percentiles(redraws, 1e3),
+        }
+    window.plot_timer.stop()
+    window.close()
+    controller.reset()
+    return results
+
+
+def bench_parser(duration: float = 2.0) -> dict:
+    """
+    OptaSerialClient receive rate against FakeOpta on a pty, in line and
+    binary mode, plus the raw FrameParser decode rate.
+    """
+    from comm.opta_protocol import FrameParser, encode_frame
+
+    results = {}
+    frames = b''.join(encode_frame(seq, np.random.rand(50, 3)) for seq in range(2000))
+    parser = FrameParser(3)
+    start = time.perf_counter()
+    for i in range(0, len(frames), 4096):
+        parser.feed(frames[i:i + 4096])
+    elapsed = time.perf_counter() - start
+    results['frame_parser'] = {
+        'samples_per_s': _rate(parser.samples, elapsed),
+        'mb_per_s': _rate(len(frames), elapsed) / 1e6,
+    }
+
+    if not hasattr(os, 'openpty'):
+        results['pty'] = 'skipped: no pty support'
+        return results
+
+    from comm.OptaSerialClient import OptaSerialClient
+    from sim.fake_opta import FakeOpta
+
+    for mode, rate in (('line', 5000.0), ('binary', 20000.0)):
+        opta = FakeOpta(rate=rate, batch=50)
+        client = OptaSerialClient(opta.port, mode='line', channels=3)
+        received = [0]
+        client.on_message = lambda line: received.__setitem__(0, received[0] + 1)
+        client.on_samples = lambda seq, samples: received.__setitem__(0, received[0] + len(samples))
+        opta.start()
+        client.connect()
+        if mode == 'binary':
+            client.start_stream()
+        time.sleep(0.2)
+        received[0] = 0
+        start = time.perf_counter()
+        time.sleep(duration)
+        count = received[0]
+        elapsed = time.perf_counter() - start
+        client.close()
+        opta.close()
+        results[mode] = {
+            'offered_samples_per_s': rate,
+            'samples_per_s': _rate(count, elapsed),
+            'writer_overruns': opta.overruns,
+            'crc_errors': client.parser.crc_errors,
+            'lost_frames': client.parser.lost,
+        }
+    return results
+
+
+def bench_decimation(rate: float = 1000.0, seconds: float = 60.0, block: int = 20) -> dict:
+    """Pipeline stage cost: FIR decimation of all channels to 20 Hz and 100 Hz."""
+    from core.channels import channel_names
+    from core.pipeline import FIRDecimator
+    n_ch = len(channel_names())
+    data = np.random.default_rng(0).standard_normal((int(rate * seconds), n_ch))
+    result = {}
+    for out_rate in (20.0, 100.0):
+        dec = FIRDecimator(int(rate / out_rate), n_ch)
+        start = time.perf_counter()
+        for i in range(0, len(data), block):
+            dec.process(data[i:i + block])
+        elapsed = time.perf_counter() - start
+        result[f'{out_rate:g}hz'] = {
+            'taps': dec.numtaps,
+            'us_per_block': elapsed / (len(data) / block) * 1e6,
+            'realtime_factor': seconds / elapsed,
+        }
+    return result
+
+
+def bench_shm(n: int = 200000, batch_rows: int = 20) -> dict:
+    """Live data bus: publish cost and zero-copy read throughput."""
+    from core.channels import new_samples, sample_dtype
+    from core.shm_bus import ShmPublisher, ShmReader
+    name = f'bench_bus_{os.getpid()}'
+    pub = ShmPublisher(name, sample_dtype(), capacity=65536)
+    reader = ShmReader(name)
+    batch = new_samples(batch_rows)
+    calls = n // batch_rows
+    read = 0
+    start = time.perf_counter()
+    for i in range(calls):
+        pub.publish(batch)
+        if i % 16 == 15:
+            read += len(reader.read().records)
+    elapsed = time.perf_counter() - start
+    reader.close()
+    pub.close()
+    return {
+        'publish_us_per_batch': elapsed / calls * 1e6,
+        'records_per_s': _rate(calls * batch_rows, elapsed),
+        'records_read': read,
+    }
+
+
+def bench_import(repeat: int = 3) -> dict:
+    """Cold import time of main.py and headless.py in a fresh interpreter."""
+    results = {}
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    for module in ('main', 'headless'):
+        walls = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                cwd=APP_DIR, env=env, capture_output=True, text=True
+            )
+            walls.append(time.perf_counter() - start)
+        # importtime lines: "import time: self | cumulative | name"
+        slowest = []
+        for line in proc.stderr.splitlines():
+            parts = line.split('|')
+            if len(parts) == 3 and parts[1].strip().isdigit():
+                slowest.append((int(parts[1]), parts[2].strip()))
+        slowest.sort(reverse=True)
+        results[module] = {
+            'ok': proc.returncode == 0,
+            'wall_s_min': min(walls),
+            'wall_s_mean': sum(walls) / len(walls),
+            'slowest_us': [[name, us] for us, name in slowest[:8]],
+        }
+        if proc.returncode != 0:
+            results[module]['error'] = proc.stderr.strip().splitlines()[-1]
+    return results
+
+
+def bench_jitter(frequencies=(20.0, 100.0, 500.0), duration: float = 2.0,
+                 executors=('thread', 'qtimer')) -> dict:
+    """Controller tick period error during a rotation at several frequencies."""
+    from core.controller import Controller
+
+    app = _qt_app()
+    results = {}
+    saved = config.CONTROL_EXECUTOR
+    try:
+        for executor in executors:
+            config.CONTROL_EXECUTOR = executor
+            for freq in frequencies:
+                controller = Controller(interval=100)
+                controller.configure_rotation(10.0, duration, freq, 'constant')
+                inst = controller.instrumentation
+                controller.start_rotation()
+                _run_until(app, lambda: not controller.timer.isActive(), duration * 3 + 1)
+                controller.stop_rotation()
+                app.processEvents()
+
+                n = min(inst.ticks, inst.capacity)
+                stamps = np.roll(inst.timestamps, -inst._index)[-n:]
+                error = np.diff(stamps) - controller.dt_s
+                snap = controller.instrumentation_snapshot()
+                results[f'{executor}_{freq:g}hz'] = {
+                    'ticks': inst.ticks,
+                    'tick_rate': snap['tick_rate'],
+                    'period_error_ms': _percentiles(np.abs(error), 1e3),
+                    'pid_skipped': snap['pid_skipped'],
+                    'missed_deadlines': snap['executor'].get('missed_deadlines'),
+                }
+    finally:
+        config.CONTROL_EXECUTOR = saved
+    return results
+
+
+BENCHMARKS = {
+    'pid': bench_pid,
+    'logger': bench_logger,
+    'plot': bench_plot,
+    'parser': bench_parser,
+    'decimation': bench_decimation,
+    'shm': bench_shm,
+    'import': bench_import,
+    'jitter': bench_jitter,
+}
+
+
+# --- Reporting ----------------------------------------------------------------
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _flatten(data, prefix=''):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _flatten(value, f'{prefix}.{key}' if prefix else key)
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix, data
+
+
+def compare(baseline: dict, current: dict) -> list:
+    """(metric, baseline, current, relative change) for metrics present in both."""
+    old = dict(_flatten(baseline.get('results', {})))
+    rows = []
+    for key, value in _flatten(current.get('results', {})):
+        if key in old and old[key]:
+            rows.append((key, old[key], value, (value - old[key]) / abs(old[key])))
+    return rows
+
+
+def main(argv=None):
+    """Run the benchmark suite and write the results as JSON."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS),
+                        help="run only these benchmarks")
+    parser.add_argument('--out', help="write JSON here (default: stdout)")
+    parser.add_argument('--compare', metavar='JSON', help="baseline to compare against")
+    args = parser.parse_args(argv)
+
+    report = {
+        'commit': _git_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {},
+    }
+    for name in args.only or BENCHMARKS:
+        print(f"[Benchmarks] {name} ...", file=sys.stderr)
+        try:
+            report['results'][name] = BENCHMARKS[name]()
+        except Exception as e:
+            report['results'][name] = {'error': f"{type(e).__name__}: {e}"}
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"[Benchmarks] Compared with {baseline.get('commit')}:", file=sys.stderr)
+        for key, old, new, change in compare(baseline, report):
+            print(f"  {key:<55} {old:>14.4g} -> {new:<14.4g} {change:+7.1%}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
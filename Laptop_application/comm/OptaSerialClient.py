@@ -1,9 +1,13 @@
 import serial
 import threading
+from comm.opta_protocol import (
+    FrameParser, CMD_STREAM_BINARY, CMD_STREAM_LINE
+)
 
 class OptaSerialClient:
   
-    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 0.1):
+    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 0.1,
+                 mode: str = "line", channels: int = 3):
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
@@ -12,8 +16,16 @@ class OptaSerialClient:
         self._recv_thread = None
         self._running = False
 
+        # 'line' for newline-terminated text, 'binary' for framed samples
+        self.mode = mode
+        self.parser = FrameParser(channels)
+
         # User callback: set this to a function(line: str)
         self.on_message = None
+        # Binary mode callback: function(seq: ndarray, samples: ndarray)
+        self.on_samples = None
+        # Called with the exception when the read loop dies
+        self.on_error = None
 
     def connect(self):
         """Open the serial port and start reading."""
@@ -28,25 +40,60 @@ class OptaSerialClient:
         print(f"[OptaSerialClient] Connected on {self.port}@{self.baudrate}")
 
     def _read_loop(self):
-        """Continuously read lines and invoke the callback."""
+        """Continuously read lines (or frames) and invoke the callback."""
         while self._running:
             try:
+                if self.mode == "binary":
+                    self._read_frames()
+                    continue
                 line = self.ser.readline().decode(errors="ignore").strip()
                 if line and self.on_message:
                     self.on_message(line)
-            except serial.SerialException as e:
+            except (serial.SerialException, OSError) as e:
                 print(f"[OptaSerialClient] Serial error: {e}")
+                self._running = False
+                if self.on_error:
+                    self.on_error(e)
                 break
 
+    def _read_frames(self):
+        # Take everything already received in one call; block (up to timeout)
+        # for a single byte only when the input buffer is empty
+        data = self.ser.read(self.ser.in_waiting or 1)
+        if not data:
+            return
+        batch = self.parser.feed(data)
+        if batch is not None and self.on_samples:
+            self.on_samples(*batch)
+
+    def start_stream(self):
+        """Ask the Opta for framed binary samples and switch the parser on."""
+        self.parser.reset()
+        self.send(CMD_STREAM_BINARY)
+        self.mode = "binary"
+
+    def stop_stream(self):
+        """Return to the newline text protocol."""
+        self.send(CMD_STREAM_LINE)
+        self.mode = "line"
+
     def send(self, cmd: str):
         """Send a line (adds '\\n')."""
         if not self.ser or not self.ser.is_open:
             raise ConnectionError("Serial port not open")
         self.ser.write((cmd.strip() + "\n").encode())
 
+    @property
+    def is_connected(self) -> bool:
+        return self._running and self.ser is not None and self.ser.is_open
+
     def close(self):
         """Stop the thread and close port."""
         self._running = False
+        # Let a pending read time out before the port goes away under it
+        thread = self._recv_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=max(self.timeout, 0.1) * 2)
         if self.ser and self.ser.is_open:
             self.ser.close()
         print("[OptaSerialClient] Closed")
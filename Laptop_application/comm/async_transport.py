@@ -0,0 +1,264 @@
+import asyncio
+import os
+import time
+
+import serial
+
+from comm.opta_protocol import FrameParser, CMD_STREAM_BINARY
+from comm.transport import QueuedTransport
+
+
+class _OptaProtocol(asyncio.Protocol):
+    """Splits the Opta byte stream into lines or sample frames as it arrives."""
+    def __init__(self, owner, channels: int, loop):
+        self.owner = owner
+        self.parser = FrameParser(channels)
+        self.binary = False
+        self.transport = None
+        # Resolves with the exception (or None) once the connection is gone
+        self.closed = loop.create_future()
+        self._partial = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data: bytes):
+        if self.binary:
+            batch = self.parser.feed(data)
+            if batch is not None:
+                self.owner._on_samples(*batch)
+            return
+        *lines, self._partial = (self._partial + data).split(b'\n')
+        for line in lines:
+            text = line.decode(errors="ignore").strip()
+            if text:
+                self.owner._on_line(text)
+
+    def connection_lost(self, exc):
+        if not self.closed.done():
+            self.closed.set_result(exc)
+
+
+class _SerialFdTransport(asyncio.Transport):
+    """
+    Non-blocking transport on a serial port's file descriptor. The event
+    loop calls back when bytes arrive or the port can take more, so there
+    is no read thread and no read timeout to poll on (POSIX only; on
+    Windows use the threaded SerialTransport or TCP).
+    """
+    def __init__(self, loop, ser: serial.Serial, protocol: asyncio.Protocol):
+        super().__init__()
+        self._loop = loop
+        self._ser = ser
+        self._protocol = protocol
+        self._fd = ser.fileno()
+        self._out = bytearray()
+        self._closing = False
+        os.set_blocking(self._fd, False)
+        protocol.connection_made(self)
+        loop.add_reader(self._fd, self._on_readable)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._abort(e)
+            return
+        if not data:
+            self._abort(ConnectionError("Serial port closed"))
+            return
+        self._protocol.data_received(data)
+
+    def write(self, data: bytes):
+        if self._closing:
+            raise ConnectionError("Serial port closed")
+        if not self._out:
+            try:
+                n = os.write(self._fd, data)
+            except BlockingIOError:
+                n = 0
+            except OSError as e:
+                self._abort(e)
+                raise
+            data = data[n:]
+            if not data:
+                return
+            self._loop.add_writer(self._fd, self._on_writable)
+        self._out += data
+
+    def _on_writable(self):
+        try:
+            n = os.write(self._fd, self._out)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._abort(e)
+            return
+        del self._out[:n]
+        if not self._out:
+            self._loop.remove_writer(self._fd)
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self):
+        self._abort(None)
+
+    def _abort(self, exc):
+        if self._closing:
+            return
+        self._closing = True
+        if not self._loop.is_closed():
+            self._loop.remove_reader(self._fd)
+            self._loop.remove_writer(self._fd)
+            self._loop.call_soon(self._protocol.connection_lost, exc)
+        self._ser.close()
+
+
+class AsyncTransport(QueuedTransport):
+    """
+    Opta transport on an asyncio event loop, over a serial port or TCP.
+
+    Received bytes are parsed in the loop's read callback and queued right
+    away; commands are written by a coroutine that wakes as soon as send()
+    queues one. A supervisor coroutine reconnects with exponential backoff.
+    send() and get() may be called from any thread, the rest from the
+    loop's thread. The queues, coalescing and metrics are the ones of the
+    threaded SerialTransport (see QueuedTransport).
+
+    Args:
+        port (str): Serial device; or
+        host, tcp_port: TCP endpoint of an Opta (or a serial-to-TCP bridge).
+        loop: Event loop (default: the current one, see core.async_loop).
+    """
+    def __init__(self, port: str = None, baudrate: int = 115200,
+                 host: str = None, tcp_port: int = None,
+                 mode: str = "line", channels: int = 3,
+                 queue_size: int = 10000, drop_policy: str = "oldest",
+                 backoff_initial: float = 0.5, backoff_max: float = 10.0,
+                 loop=None):
+        if (port is None) == (host is None):
+            raise ValueError("AsyncTransport needs either a serial port or a TCP host")
+        super().__init__(mode, channels, queue_size, drop_policy,
+                         backoff_initial, backoff_max)
+        self.port = port
+        self.baudrate = baudrate
+        self.host = host
+        self.tcp_port = tcp_port
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+
+        self._protocol = None
+        self._task = None
+        self._wake = asyncio.Event()
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.tcp_port}" if self.host else self.port
+
+    @property
+    def is_connected(self) -> bool:
+        protocol = self._protocol
+        return protocol is not None and not protocol.transport.is_closing()
+
+    @property
+    def parser(self):
+        protocol = self._protocol
+        return protocol.parser if protocol is not None else None
+
+    # --- Lifecycle -----------------------------------------------------------
+    def start(self) -> bool:
+        """
+        Start connecting in the background; may be called from any thread.
+
+        Returns:
+            bool: Whether a connection is up already (normally not yet).
+        """
+        self._started_at = time.monotonic()
+        self.loop.call_soon_threadsafe(self._start_task)
+        return self.is_connected
+
+    def _start_task(self):
+        if self._task is None or self._task.done():
+            self._task = self.loop.create_task(self._supervise())
+
+    def close(self):
+        """Stop reconnecting and close the connection; pending commands are discarded."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        protocol, self._protocol = self._protocol, None
+        if protocol is not None:
+            protocol.transport.close()
+
+    async def _open(self) -> _OptaProtocol:
+        if self.host:
+            _, protocol = await self.loop.create_connection(
+                lambda: _OptaProtocol(self, self.channels, self.loop),
+                self.host, self.tcp_port
+            )
+            return protocol
+        ser = serial.Serial(self.port, self.baudrate, timeout=0)
+        protocol = _OptaProtocol(self, self.channels, self.loop)
+        _SerialFdTransport(self.loop, ser, protocol)
+        return protocol
+
+    async def _supervise(self):
+        backoff = self.backoff_initial
+        first = True
+        while True:
+            try:
+                protocol = await self._open()
+            except (OSError, serial.SerialException) as e:
+                self._record_error(e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+            if self.mode == "binary":
+                # Switch the stream before anything else goes out
+                protocol.parser.reset()
+                protocol.transport.write((CMD_STREAM_BINARY + "\n").encode())
+                protocol.binary = True
+            self._protocol = protocol
+            if first:
+                print(f"[AsyncTransport] Connected on {self.address}")
+            else:
+                self.reconnects += 1
+                print(f"[AsyncTransport] Reconnected on {self.address}")
+            first = False
+            backoff = self.backoff_initial
+
+            writer = self.loop.create_task(self._write_loop(protocol))
+            try:
+                error = await protocol.closed
+            finally:
+                writer.cancel()
+            if self._protocol is protocol:
+                self._protocol = None
+            if error is not None:
+                self._record_error(error)
+            await asyncio.sleep(backoff)
+
+    # --- Outbound ------------------------------------------------------------
+    def _wake_writer(self):
+        # May run on any thread; the writer coroutine waits on the loop
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._wake.set)
+
+    async def _write_loop(self, protocol: _OptaProtocol):
+        while True:
+            self._wake.clear()
+            with self._out_cond:
+                item = self._outbound.popitem(last=False) if self._outbound else None
+            if item is None:
+                await self._wake.wait()
+                continue
+            key, (cmd, queued_at) = item
+            try:
+                protocol.transport.write((cmd.strip() + "\n").encode())
+            except Exception as e:
+                self._record_error(e)
+                self._requeue(key, cmd, queued_at)
+                return
+            self._sent(cmd, queued_at)
@@ -0,0 +1,137 @@
+import binascii
+import struct
+
+import numpy as np
+
+# Framed binary sample protocol (little-endian):
+#
+#   0xA5 0x5A | length:u16 | seq:u16 | channels:u8 | count:u8 | payload | crc:u16
+#
+# length is the payload size in bytes, payload is count samples of channels
+# float32 values each, and crc is CRC-16/CCITT (init 0xFFFF) over everything
+# from length to the end of the payload.
+SYNC         = b'\xa5\x5a'
+HEADER       = struct.Struct('<HHBB')
+HEADER_SIZE  = len(SYNC) + HEADER.size
+CRC_SIZE     = 2
+MAX_PAYLOAD  = 4096
+CRC_INIT     = 0xFFFF
+
+# Line commands switching the Opta between text and framed streaming
+CMD_STREAM_BINARY = "STREAM BIN"
+CMD_STREAM_LINE   = "STREAM OFF"
+# Followed by the sample rate in Hz, e.g. "RATE 1000"
+CMD_SET_RATE      = "RATE"
+
+
+def encode_frame(seq: int, samples, channels: int = None) -> bytes:
+    """
+    Build one frame from a (count, channels) array-like of samples.
+
+    Args:
+        seq (int): Sequence number (wraps at 16 bits).
+        samples: Sample values, one row per sample.
+        channels (int): Channel count (inferred from samples if omitted).
+
+    Returns:
+        bytes: The encoded frame.
+    """
+    data = np.asarray(samples, dtype='<f4')
+    if data.ndim == 1:
+        data = data.reshape(1, -1)
+    count, n_ch = data.shape
+    if channels is not None and channels != n_ch:
+        raise ValueError(f"expected {channels} channels, got {n_ch}")
+    payload = data.tobytes()
+    body = HEADER.pack(len(payload), seq & 0xFFFF, n_ch, count) + payload
+    crc = binascii.crc_hqx(body, CRC_INIT)
+    return SYNC + body + struct.pack('<H', crc)
+
+
+class FrameParser:
+    """
+    Incremental parser for the framed protocol.
+
+    feed() appends raw bytes to a reusable buffer, decodes every complete
+    frame in it and returns the batch as (seq, samples) NumPy arrays, or
+    None if no complete frame was available. Corrupt or foreign data is
+    skipped by resynchronising on the next SYNC marker.
+
+    Attributes:
+        frames (int): Valid frames decoded
+        samples (int): Samples decoded
+        crc_errors (int): Frames rejected because of a CRC mismatch
+        bad_frames (int): Frames with an unexpected length or channel count
+        skipped_bytes (int): Bytes discarded while resynchronising
+        lost (int): Frames missing according to the sequence numbers
+    """
+    def __init__(self, channels: int):
+        self.channels = channels
+        self._buf = bytearray()
+        self._last_seq = None
+        self.frames = 0
+        self.samples = 0
+        self.crc_errors = 0
+        self.bad_frames = 0
+        self.skipped_bytes = 0
+        self.lost = 0
+
+    def reset(self):
+        self._buf.clear()
+        self._last_seq = None
+
+    def feed(self, data):
+        buf = self._buf
+        buf += data
+        view = memoryview(buf)
+        payloads = []
+        seqs = []
+        pos = 0
+        end = len(buf)
+        try:
+            while True:
+                start = buf.find(SYNC, pos)
+                if start < 0:
+                    # Keep a trailing partial SYNC byte
+                    keep = 1 if end and buf[end - 1] == SYNC[0] else 0
+                    self.skipped_bytes += end - pos - keep
+                    pos = end - keep
+                    break
+                self.skipped_bytes += start - pos
+                pos = start
+                if end - pos < HEADER_SIZE:
+                    break
+                length, seq, n_ch, count = HEADER.unpack_from(buf, pos + len(SYNC))
+                if length > MAX_PAYLOAD or length != n_ch * count * 4:
+                    self.bad_frames += 1
+                    pos += 1
+                    continue
+                frame_end = pos + HEADER_SIZE + length + CRC_SIZE
+                if frame_end > end:
+                    break
+                crc, = struct.unpack_from('<H', buf, frame_end - CRC_SIZE)
+                if binascii.crc_hqx(view[pos + len(SYNC):frame_end - CRC_SIZE], CRC_INIT) != crc:
+                    self.crc_errors += 1
+                    pos += 1
+                    continue
+                if n_ch != self.channels:
+                    self.bad_frames += 1
+                    pos = frame_end
+                    continue
+                if self._last_seq is not None:
+                    self.lost += (seq - self._last_seq - 1) & 0xFFFF
+                self._last_seq = seq
+                self.frames += 1
+                payloads.append(view[pos + HEADER_SIZE:frame_end - CRC_SIZE])
+                seqs.extend([seq] * count)
+                pos = frame_end
+
+            if not payloads:
+                return None
+            samples = np.frombuffer(b''.join(payloads), dtype='<f4').reshape(-1, self.channels)
+            self.samples += len(samples)
+            return np.array(seqs, dtype=np.uint16), samples
+        finally:
+            payloads.clear()
+            view.release()
+            del buf[:pos]
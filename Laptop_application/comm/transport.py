@@ -0,0 +1,313 @@
+import abc
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+from comm.OptaSerialClient import OptaSerialClient
+
+
+class QueuedTransport(abc.ABC):
+    """
+    Queues and metrics shared by the transports.
+
+    send() enqueues commands for the transport's writer; commands sent with
+    the same `key` (e.g. a setpoint name) replace the pending one instead of
+    queueing behind it. Received lines / sample batches go into a bounded
+    queue that consumers drain with get(); when full, the drop_policy
+    ('oldest' or 'newest') decides which item is discarded. Both queues may
+    be used from any thread.
+
+    Inbound items are (receive_time, line) in line mode and
+    (receive_time, seq, samples) in binary mode, with receive_time taken
+    from time.monotonic().
+    """
+    def __init__(self, mode: str = "line", channels: int = 3,
+                 queue_size: int = 10000, drop_policy: str = "oldest",
+                 backoff_initial: float = 0.5, backoff_max: float = 10.0):
+        if drop_policy not in ("oldest", "newest"):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.mode = mode
+        self.channels = channels
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self._inbound = deque()
+        self._in_lock = threading.Lock()
+        self._outbound = OrderedDict()
+        self._out_cond = threading.Condition()
+        self._unkeyed = itertools.count()
+        self._started_at = None
+        self._reset_metrics()
+
+    @property
+    @abc.abstractmethod
+    def is_connected(self) -> bool:
+        """Whether a connection to the Opta is currently up."""
+
+    @property
+    def parser(self):
+        """FrameParser of the current connection, if any."""
+        return None
+
+    # --- Outbound ------------------------------------------------------------
+    def send(self, cmd: str, key: str = None):
+        """
+        Queue a command for the writer.
+
+        Args:
+            cmd (str): Command line (without newline).
+            key (str): Commands with the same key supersede each other while
+                still queued; None queues unconditionally.
+        """
+        with self._out_cond:
+            if key is None:
+                key = ('_', next(self._unkeyed))
+            elif key in self._outbound:
+                self.coalesced += 1
+                # Keep the original queue position and enqueue time
+                self._outbound[key] = (cmd, self._outbound[key][1])
+                return
+            self._outbound[key] = (cmd, time.monotonic())
+            self._wake_writer()
+
+    def _wake_writer(self):
+        # Called with _out_cond held
+        self._out_cond.notify()
+
+    def _requeue(self, key, cmd: str, queued_at: float):
+        # Put a failed command back at the front unless superseded meanwhile
+        with self._out_cond:
+            if key not in self._outbound:
+                self._outbound[key] = (cmd, queued_at)
+                self._outbound.move_to_end(key, last=False)
+
+    def _sent(self, cmd: str, queued_at: float):
+        latency = time.monotonic() - queued_at
+        self.tx_commands += 1
+        self.tx_bytes += len(cmd) + 1
+        self._tx_latency_sum += latency
+        self.tx_latency_max = max(self.tx_latency_max, latency)
+
+    # --- Inbound -------------------------------------------------------------
+    def _push(self, item, n_samples: int):
+        with self._in_lock:
+            if len(self._inbound) >= self.queue_size:
+                self.dropped += 1
+                if self.drop_policy == "newest":
+                    return
+                self._inbound.popleft()
+            self._inbound.append(item)
+        self.rx_messages += 1
+        self.rx_samples += n_samples
+
+    def _on_line(self, line: str):
+        self.rx_bytes += len(line) + 1
+        self._push((time.monotonic(), line), 1)
+
+    def _on_samples(self, seq, samples):
+        self.rx_bytes += samples.nbytes
+        self._push((time.monotonic(), seq, samples), len(samples))
+
+    def get(self, max_items: int = None) -> list:
+        """Remove and return up to max_items queued inbound items (oldest first)."""
+        now = time.monotonic()
+        with self._in_lock:
+            n = len(self._inbound) if max_items is None else min(max_items, len(self._inbound))
+            items = [self._inbound.popleft() for _ in range(n)]
+        for item in items:
+            latency = now - item[0]
+            self._rx_latency_sum += latency
+            self.rx_latency_max = max(self.rx_latency_max, latency)
+        self.rx_delivered += len(items)
+        return items
+
+    # --- Metrics -------------------------------------------------------------
+    def _reset_metrics(self):
+        self.rx_messages = 0
+        self.rx_samples = 0
+        self.rx_bytes = 0
+        self.rx_delivered = 0
+        self.rx_latency_max = 0.0
+        self._rx_latency_sum = 0.0
+        self.tx_commands = 0
+        self.tx_bytes = 0
+        self.tx_latency_max = 0.0
+        self._tx_latency_sum = 0.0
+        self.coalesced = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.errors = 0
+        self.last_error = None
+
+    def _record_error(self, error):
+        self.errors += 1
+        self.last_error = str(error)
+
+    def metrics(self) -> dict:
+        """Throughput, queue, latency (seconds) and error counters."""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        rate = (lambda n: n / elapsed if elapsed > 0 else 0.0)
+        return {
+            'connected': self.is_connected,
+            'rx_messages': self.rx_messages,
+            'rx_samples': self.rx_samples,
+            'rx_bytes': self.rx_bytes,
+            'rx_samples_per_s': rate(self.rx_samples),
+            'rx_bytes_per_s': rate(self.rx_bytes),
+            'rx_queue': len(self._inbound),
+            'rx_dropped': self.dropped,
+            'rx_latency_mean': self._rx_latency_sum / self.rx_delivered if self.rx_delivered else 0.0,
+            'rx_latency_max': self.rx_latency_max,
+            'tx_commands': self.tx_commands,
+            'tx_bytes': self.tx_bytes,
+            'tx_queue': len(self._outbound),
+            'tx_coalesced': self.coalesced,
+            'tx_latency_mean': self._tx_latency_sum / self.tx_commands if self.tx_commands else 0.0,
+            'tx_latency_max': self.tx_latency_max,
+            'reconnects': self.reconnects,
+            'errors': self.errors,
+            'parser_crc_errors': self.parser.crc_errors if self.parser else 0,
+            'last_error': self.last_error,
+        }
+
+
+class SerialTransport(QueuedTransport):
+    """
+    Supervised transport around OptaSerialClient for long unattended runs.
+
+    - A supervisor thread (re)connects with exponential backoff whenever the
+      port is closed or the read loop dies.
+    - send() only enqueues; a writer thread performs the serial writes
+      (see QueuedTransport for command coalescing).
+    - The read thread of OptaSerialClient fills the bounded inbound queue
+      that consumers drain with get().
+
+    Inbound items are (receive_time, line) in line mode and
+    (receive_time, seq, samples) in binary mode, with receive_time taken
+    from time.monotonic().
+    """
+    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 0.1,
+                 mode: str = "line", channels: int = 3,
+                 queue_size: int = 10000, drop_policy: str = "oldest",
+                 backoff_initial: float = 0.5, backoff_max: float = 10.0):
+        super().__init__(mode, channels, queue_size, drop_policy,
+                         backoff_initial, backoff_max)
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+
+        self.client = None
+        self._lost = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    # --- Lifecycle -----------------------------------------------------------
+    def start(self) -> bool:
+        """
+        Try to connect once, then start the supervisor and writer threads.
+
+        Returns:
+            bool: True if the first connection attempt succeeded.
+        """
+        self._stop.clear()
+        self._started_at = time.monotonic()
+        connected = self._connect()
+        for target, name in ((self._supervise, "OptaSupervisor"),
+                             (self._write_loop, "OptaWriter")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return connected
+
+    def close(self):
+        """Stop all threads and close the port; pending commands are discarded."""
+        self._stop.set()
+        with self._out_cond:
+            self._out_cond.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        self._threads.clear()
+        self._disconnect()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.client is not None and self.client.is_connected
+
+    @property
+    def parser(self):
+        client = self.client
+        return client.parser if client is not None else None
+
+    def _connect(self) -> bool:
+        client = OptaSerialClient(
+            self.port, self.baudrate, self.timeout,
+            mode="line", channels=self.channels
+        )
+        client.on_message = self._on_line
+        client.on_samples = self._on_samples
+        client.on_error = self._on_error
+        try:
+            client.connect()
+            if self.mode == "binary":
+                client.start_stream()
+        except Exception as e:
+            self._record_error(e)
+            client.close()
+            return False
+        self._lost.clear()
+        self.client = client
+        return True
+
+    def _disconnect(self):
+        client, self.client = self.client, None
+        if client is not None:
+            try:
+                client.close()
+            except Exception as e:
+                self._record_error(e)
+
+    def _supervise(self):
+        backoff = self.backoff_initial
+        while not self._stop.is_set():
+            if self.is_connected:
+                backoff = self.backoff_initial
+                self._lost.wait(0.5)
+                continue
+            self._disconnect()
+            if self._stop.wait(backoff):
+                return
+            if self._connect():
+                self.reconnects += 1
+                print(f"[SerialTransport] Reconnected on {self.port}")
+                with self._out_cond:
+                    self._out_cond.notify_all()
+            else:
+                backoff = min(backoff * 2, self.backoff_max)
+
+    # --- Outbound ------------------------------------------------------------
+    def _write_loop(self):
+        while True:
+            with self._out_cond:
+                while not self._stop.is_set() and not (self._outbound and self.is_connected):
+                    self._out_cond.wait(0.5)
+                if self._stop.is_set():
+                    return
+                key, (cmd, queued_at) = self._outbound.popitem(last=False)
+            client = self.client
+            try:
+                client.send(cmd)
+            except Exception as e:
+                self._record_error(e)
+                self._lost.set()
+                self._requeue(key, cmd, queued_at)
+                continue
+            self._sent(cmd, queued_at)
+
+    # --- Inbound -------------------------------------------------------------
+    def _on_error(self, error):
+        self._record_error(error)
+        self._lost.set()
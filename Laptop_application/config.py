@@ -5,15 +5,33 @@ import os
 # -----------------------------------------------------------------------------
 # Communication settings
 # -----------------------------------------------------------------------------
-# Choose 'serial' or 'tcp'
+# Choose 'serial' or 'tcp' ('tcp' needs BACKEND='asyncio')
 CONNECTION_TYPE = os.getenv('OPTA_CONN', 'serial')
 
+# 'thread' (transport, control loop and log writers on threads) or 'asyncio'
+# (all three on one asyncio loop bridged into Qt by qasync, see
+# core/async_loop.py)
+BACKEND = os.getenv('BACKEND', 'thread')
+
+# TCP settings (an Opta or a serial-to-TCP bridge)
+TCP_HOST = os.getenv('OPTA_TCP_HOST', '192.168.1.100')
+TCP_PORT = int(os.getenv('OPTA_TCP_PORT', '5000'))
+
 # Serial settings
 # ─────────────────────────────────────────────────────────────────────────────
 # On Linux/macOS use '/dev/ttyUSB0', on Windows e.g. 'COM3'
 SERIAL_PORT = os.getenv('OPTA_SERIAL_PORT', 'COM3')
 BAUD_RATE   = int(os.getenv('OPTA_BAUD_RATE', '115200'))
 
+# Opta stream protocol: 'line' (text) or 'binary' (framed float32 samples)
+OPTA_PROTOCOL = os.getenv('OPTA_PROTOCOL', 'line')
+OPTA_CHANNELS = int(os.getenv('OPTA_CHANNELS', '3'))
+
+# Supervised transport: bounded receive queue and reconnect backoff
+TRANSPORT_QUEUE_SIZE  = int(os.getenv('TRANSPORT_QUEUE_SIZE', '10000'))
+TRANSPORT_DROP_POLICY = os.getenv('TRANSPORT_DROP_POLICY', 'oldest')  # or 'newest'
+RECONNECT_BACKOFF_MAX = float(os.getenv('RECONNECT_BACKOFF_MAX', '10.0'))  # seconds
+
 
 # -----------------------------------------------------------------------------
 # PID controller parameters
@@ -22,15 +40,156 @@ PID_KP = float(os.getenv('PID_KP', '1.0'))
 PID_KI = float(os.getenv('PID_KI', '0.0'))
 PID_KD = float(os.getenv('PID_KD', '0.0'))
 
+# 'classic' (core.pid.PID) or 'advanced' (AdvancedPID: anti-windup, filtered
+# derivative on measurement, setpoint weights, feed-forward, gain schedule)
+PID_TYPE = os.getenv('PID_TYPE', 'classic')
+PID_SETPOINT_WEIGHT = float(os.getenv('PID_SETPOINT_WEIGHT', '1.0'))      # b
+PID_DERIVATIVE_WEIGHT = float(os.getenv('PID_DERIVATIVE_WEIGHT', '0.0'))  # c
+PID_DERIVATIVE_TAU = float(os.getenv('PID_DERIVATIVE_TAU', '0.05'))       # seconds
+# 'back_calculation' or 'conditional'; tracking time 0 picks sqrt(Ti * Td)
+PID_ANTI_WINDUP = os.getenv('PID_ANTI_WINDUP', 'back_calculation')
+PID_TRACKING_TIME = float(os.getenv('PID_TRACKING_TIME', '0') or 0) or None
+# Feed-forward gain on the trajectory cable velocity (speed command per mm/s)
+PID_KFF = float(os.getenv('PID_KFF', '1.0'))
+# Step by scheduler ticks instead of wall-clock time
+PID_FIXED_STEP = os.getenv('PID_FIXED_STEP', '1') == '1'
+# Gains over the rotation angle, "deg:kp,ki,kd;deg:kp,ki,kd" ('' = fixed gains)
+PID_SCHEDULE = os.getenv('PID_SCHEDULE', '')
+
 # -----------------------------------------------------------------------------
 # Rotation control parameters
 # -----------------------------------------------------------------------------
 ROTATION_DEG = float(os.getenv('ROTATION_DEG', '90.0'))
 ROTATION_TIME = float(os.getenv('ROTATION_TIME', '30.0'))
 CONTROL_FREQUENCY = float(os.getenv('CONTROL_FREQUENCY', '20.0'))
+# 'constant' omega, 'trapezoidal' or 'scurve' (see core/trajectory.py)
+ROTATION_PROFILE = os.getenv('ROTATION_PROFILE', 'constant')
+
+# Rig geometry (mm): cable anchor offset and rotating arm radius
+RIG_OFFSET = float(os.getenv('RIG_OFFSET', '955.9'))
+RIG_RADIUS = float(os.getenv('RIG_RADIUS', '247.5'))
 
 # -----------------------------------------------------------------------------
 # Actuator speed limits (units/sec)
 # -----------------------------------------------------------------------------
 MIN_SPEED = float(os.getenv('MIN_SPEED', '-100.0'))
 MAX_SPEED = float(os.getenv('MAX_SPEED', '100.0'))
+
+# -----------------------------------------------------------------------------
+# Measurement channels
+# -----------------------------------------------------------------------------
+# Extra sensor channels on top of the built-in ones in core/channels.py,
+# as comma-separated name[:unit] entries, e.g. "sinkage:mm,winch_current:A"
+EXTRA_CHANNELS = os.getenv('EXTRA_CHANNELS', '')
+
+# -----------------------------------------------------------------------------
+# Data logging
+# -----------------------------------------------------------------------------
+# Hand samples to a background writer thread instead of writing on the tick
+LOG_BUFFERED = os.getenv('LOG_BUFFERED', '1') == '1'
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', '0.5'))  # seconds
+LOG_FLUSH_ROWS = int(os.getenv('LOG_FLUSH_ROWS', '500'))
+# Run log directory ('' = logs/ next to the application)
+LOG_DIRECTORY = os.getenv('LOG_DIRECTORY', '')
+# 'csv' for text logs, 'binary' for columnar logs (see core/binary_log.py)
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'csv')
+LOG_CHUNK_ROWS = int(os.getenv('LOG_CHUNK_ROWS', '4096'))
+
+# Write-ahead checkpoint of the running session ('' disables it), written
+# every CHECKPOINT_INTERVAL seconds so an interrupted run can be resumed
+CHECKPOINT_FILE = os.getenv('CHECKPOINT_FILE', 'logs/session.wal')
+CHECKPOINT_INTERVAL = float(os.getenv('CHECKPOINT_INTERVAL', '1.0'))  # seconds
+
+# -----------------------------------------------------------------------------
+# Command log
+# -----------------------------------------------------------------------------
+# Full per-tick trace file ('' disables it) and its minimum level
+LOG_TRACE_FILE = os.getenv('LOG_TRACE_FILE', 'logs/controller.log')
+LOG_TRACE_LEVEL = os.getenv('LOG_TRACE_LEVEL', 'DEBUG')
+# High-rate messages reach the command window as one summary per interval
+LOG_SUMMARY_INTERVAL = float(os.getenv('LOG_SUMMARY_INTERVAL', '1.0'))  # seconds
+# Command window: minimum level, line limit and batched append period
+LOG_VIEW_LEVEL = os.getenv('LOG_VIEW_LEVEL', 'INFO')
+LOG_VIEW_MAX_BLOCKS = int(os.getenv('LOG_VIEW_MAX_BLOCKS', '2000'))
+LOG_VIEW_INTERVAL_MS = int(os.getenv('LOG_VIEW_INTERVAL_MS', '100'))
+
+# -----------------------------------------------------------------------------
+# Live data bus
+# -----------------------------------------------------------------------------
+# Shared-memory segment other local processes can tail (see core/shm_bus.py);
+# '' disables it. Capacity is in sample records.
+SHM_BUS = os.getenv('SHM_BUS', '')
+SHM_BUS_CAPACITY = int(os.getenv('SHM_BUS_CAPACITY', '65536'))
+
+# -----------------------------------------------------------------------------
+# Live plotting
+# -----------------------------------------------------------------------------
+PLOT_FPS = float(os.getenv('PLOT_FPS', '10.0'))             # display frame rate
+PLOT_BUFFER_SIZE = int(os.getenv('PLOT_BUFFER_SIZE', '200000'))  # points per plot
+
+# -----------------------------------------------------------------------------
+# Multi-rate pipeline
+# -----------------------------------------------------------------------------
+# Acquisition source: 'opta' (the serial stream), 'plant' (simulated; the
+# default of headless runs and benchmarks) or 'none' to sample once per
+# control tick. With a source, samples are acquired and logged at ACQ_RATE,
+# decimated to CONTROL_FREQUENCY for the rotation loop and to DISPLAY_RATE
+# for the plots (redrawn at PLOT_FPS).
+ACQ_SOURCE = os.getenv('ACQ_SOURCE', 'none')
+ACQ_RATE = float(os.getenv('ACQ_RATE', '1000.0'))      # Hz
+ACQ_BLOCK = float(os.getenv('ACQ_BLOCK', '0.02'))      # seconds per acquired block
+# Channel of each streamed Opta column; 'test' is the current test's channel
+ACQ_CHANNELS = os.getenv('ACQ_CHANNELS', 'test,load_pressure,cable_length')
+DISPLAY_RATE = float(os.getenv('DISPLAY_RATE', '100.0'))  # Hz
+# Anti-aliasing FIR taps per unit of decimation factor; the filter delays
+# the decimated signal by DECIMATION_TAPS / 2 output samples
+DECIMATION_TAPS = int(os.getenv('DECIMATION_TAPS', '4'))
+
+# -----------------------------------------------------------------------------
+# Soil parameter fitting
+# -----------------------------------------------------------------------------
+# Test conditions: load plate width (m) and normal stress of the shear tests (kPa)
+PLATE_WIDTH = float(os.getenv('PLATE_WIDTH', '0.1'))
+NORMAL_STRESS = float(os.getenv('NORMAL_STRESS', '20.0'))
+# Sinkage / shear displacement rates (m/s), used unless 'sinkage' /
+# 'shear_displacement' channels are registered and measured
+SINKAGE_RATE = float(os.getenv('SINKAGE_RATE', '0.002'))
+SHEAR_RATE = float(os.getenv('SHEAR_RATE', '0.01'))
+# A fit has converged when all relative standard errors are below this
+FIT_TOLERANCE = float(os.getenv('FIT_TOLERANCE', '0.05'))
+FIT_MIN_SAMPLES = int(os.getenv('FIT_MIN_SAMPLES', '50'))
+
+# -----------------------------------------------------------------------------
+# Control loop execution
+# -----------------------------------------------------------------------------
+# 'thread' runs Controller ticks on a dedicated worker thread, 'qtimer' on the
+# GUI event loop, 'asyncio' as callbacks on the asyncio loop (BACKEND='asyncio').
+# The last two share the GUI thread with the plot redraws; 'thread' keeps the
+# ticks on time when redraws are slow
+CONTROL_EXECUTOR = os.getenv('CONTROL_EXECUTOR', 'asyncio' if BACKEND == 'asyncio' else 'thread')
+
+# -----------------------------------------------------------------------------
+# Multiple rigs
+# -----------------------------------------------------------------------------
+# JSON/YAML file of per-rig setting overrides (see core/rigs.py); '' runs a
+# single rig with the settings in this file
+RIG_PROFILES = os.getenv('RIG_PROFILES', '')
+# Threads shared by the buffered run logs of all rigs
+LOG_WRITER_THREADS = int(os.getenv('LOG_WRITER_THREADS', '2'))
+
+# -----------------------------------------------------------------------------
+# Plant simulation
+# -----------------------------------------------------------------------------
+# 'bevameter' (winch + Bekker/Janosi soil models) or 'sine' (legacy stubs)
+PLANT_MODEL = os.getenv('PLANT_MODEL', 'bevameter')
+
+# -----------------------------------------------------------------------------
+# Firmware deployment
+# -----------------------------------------------------------------------------
+# 'auto' uploads only when the sketch or board changed, 'force' always
+# uploads, 'off' never touches the board
+FIRMWARE_UPLOAD = os.getenv('FIRMWARE_UPLOAD', 'auto')
+FIRMWARE_SKETCH = os.getenv('FIRMWARE_SKETCH', 'core/UploadMe.cpp')
+FIRMWARE_CACHE_DIR = os.getenv('FIRMWARE_CACHE_DIR', '.firmware_cache')
+ARDUINO_CLI = os.getenv('ARDUINO_CLI', 'arduino-cli')
@@ -0,0 +1,69 @@
+"""
+asyncio event loop on the Qt thread, for BACKEND='asyncio'.
+
+    app = QApplication(sys.argv)
+    async_loop.install(app)
+    ...                             # AsyncTransport, AsyncControlLoop, ...
+    code = async_loop.exec_(app)
+    async_loop.shutdown()
+
+qasync (see requirements.txt) runs Qt and asyncio as one loop: Qt's event
+dispatcher watches the asyncio file descriptors and timers, so the loop
+wakes on I/O and deadlines instead of being polled.
+"""
+import asyncio
+
+_bridge = None
+
+
+class QtAsyncBridge:
+    """Runs an asyncio event loop inside a Qt application's event loop."""
+    def __init__(self, app):
+        try:
+            import qasync
+        except ImportError:
+            raise RuntimeError("BACKEND='asyncio' needs qasync (pip install qasync)")
+        self.app = app
+        self.loop = qasync.QEventLoop(app)
+        asyncio.set_event_loop(self.loop)
+
+    def exec_(self) -> int:
+        # Returns the exit code once the application quits
+        return self.loop.run_forever()
+
+    def shutdown(self):
+        """Cancel the remaining tasks and close the loop."""
+        loop = self.loop
+        if loop.is_closed():
+            return
+        tasks = [t for t in asyncio.all_tasks(loop) if not t.done()]
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        # close() waits for the default executor, so pending log writes finish
+        loop.close()
+        asyncio.set_event_loop(None)
+
+
+def install(app) -> asyncio.AbstractEventLoop:
+    """Create the bridge for `app` and make its loop the current one."""
+    global _bridge
+    if _bridge is None:
+        _bridge = QtAsyncBridge(app)
+    return _bridge.loop
+
+
+def exec_(app) -> int:
+    """Run the application; with install() the asyncio loop runs along."""
+    if _bridge is None:
+        return app.exec_()
+    return _bridge.exec_()
+
+
+def shutdown():
+    """Close the loop after exec_() returned (a no-op without install())."""
+    global _bridge
+    if _bridge is not None:
+        _bridge.shutdown()
+        _bridge = None
@@ -0,0 +1,315 @@
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from core.channels import CHANNELS, LEGACY_COLUMNS, new_samples, sample_dtype
+from core.data_logger import ClockAnchor, SegmentMarker, SEGMENT_TAG, CLOCK_TAG, LOG_STEM
+
+# Each run is a directory holding a JSON header plus one append-only raw file
+# per column, so every column can be memory-mapped back as a contiguous array.
+FORMAT_NAME    = 'bevameter-columnar'
+FORMAT_VERSION = 3
+EXTENSION      = '.bvl'
+HEADER_NAME    = 'header.json'
+
+# Stored columns are the fields of core.channels.sample_dtype(): mono_ns
+# (time.monotonic_ns(), see header['clock']), state (State.value), t and one
+# float64 column per registered channel; missing channel values are NaN.
+# Version 2 logs stored the channels as v1, v2, v3 (see LEGACY_COLUMNS).
+
+
+def _default_directory():
+    base = os.path.dirname(__file__)
+    return os.path.abspath(os.path.join(base, '..', 'logs'))
+
+
+class BinaryDataLogger:
+    """
+    Logs test data as fixed-dtype, append-only column files.
+
+    Sample records are collected in a preallocated chunk and appended to the
+    column files chunk_rows at a time. The header stores the column layout
+    and any per-run metadata (PID gains, rotation parameters, ...); segment
+    markers of a multi-state log are added to it when the log is closed.
+    """
+    def __init__(self, state=None, run_id=None, directory=None,
+                 chunk_rows: int = 4096, metadata: dict = None, label=None,
+                 anchor: ClockAnchor = None):
+        if directory is None:
+            directory = _default_directory()
+        if run_id is None:
+            run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.run_id = run_id
+        if label is None:
+            label = state.name if state is not None else 'UNKNOWN'
+        self.filepath = os.path.join(
+            directory, f'data_{run_id}_{label}{EXTENSION}'
+        )
+        os.makedirs(self.filepath, exist_ok=True)
+
+        self.chunk_rows = chunk_rows
+        self.dtype = sample_dtype()
+        self.anchor = anchor if anchor is not None else ClockAnchor.now()
+        self.header = {
+            'format': FORMAT_NAME,
+            'version': FORMAT_VERSION,
+            'run_id': run_id,
+            'state': label,
+            'created': datetime.now().isoformat(),
+            'chunk_rows': chunk_rows,
+            'clock': {'wall_ns': self.anchor.wall_ns, 'mono_ns': self.anchor.mono_ns},
+            'columns': [{'name': n, 'dtype': self.dtype[n].str} for n in self.dtype.names],
+            'metadata': metadata or {},
+            'segments': [],
+        }
+        self._write_header()
+
+        self._chunk = np.empty(chunk_rows, dtype=self.dtype)
+        self._files = [
+            open(os.path.join(self.filepath, f'{n}.bin'), 'wb')
+            for n in self.dtype.names
+        ]
+        self._fill = 0
+        self.rows = 0
+
+    def _write_header(self):
+        with open(os.path.join(self.filepath, HEADER_NAME), 'w') as f:
+            json.dump(self.header, f, indent=2)
+
+    def log(self, samples, block: bool = False):
+        """Write a batch of sample records (see core.channels) and flush."""
+        self.write_rows([samples])
+        self.flush()
+
+    def begin_segment(self, state):
+        """Mark the start of a new state segment."""
+        self.write_rows([SegmentMarker(time.monotonic_ns(), state)])
+
+    def write_rows(self, items):
+        """
+        Copy sample record arrays into the chunk buffer; SegmentMarkers are
+        kept for the header.
+        """
+        for item in items:
+            if type(item) is SegmentMarker:
+                self.header['segments'].append({
+                    'row': self.rows + self._fill,
+                    'state': item.state.name,
+                    'mono_ns': item.timestamp,
+                })
+                continue
+            if len(item) == 1:
+                # Structured element assignment is much cheaper than a slice copy
+                self._chunk[self._fill] = item[0]
+                self._fill += 1
+                if self._fill == self.chunk_rows:
+                    self._write_chunk()
+                continue
+            pos = 0
+            while pos < len(item):
+                n = min(len(item) - pos, self.chunk_rows - self._fill)
+                self._chunk[self._fill:self._fill + n] = item[pos:pos + n]
+                self._fill += n
+                pos += n
+                if self._fill == self.chunk_rows:
+                    self._write_chunk()
+
+    def _write_chunk(self):
+        n = self._fill
+        if n == 0:
+            return
+        chunk = self._chunk[:n]
+        for name, f in zip(self.dtype.names, self._files):
+            f.write(chunk[name].tobytes())
+        self.rows += n
+        self._fill = 0
+
+    def flush(self):
+        """Append the current partial chunk and flush the column files."""
+        self._write_chunk()
+        for f in self._files:
+            f.flush()
+
+    def close(self):
+        if self._files[0].closed:
+            return
+        self.flush()
+        for f in self._files:
+            f.close()
+        if self.header['segments']:
+            self._write_header()
+
+
+def repair_log(path: str, segments: list = None) -> int:
+    """
+    Finalize a binary log left open by a crash: cut every column file to
+    the rows all columns have, and write the segment markers (kept in
+    memory until close, so pass the ones from the last checkpoint) to the
+    header.
+
+    Returns:
+        int: Rows in the repaired log.
+    """
+    with open(os.path.join(path, HEADER_NAME)) as f:
+        header = json.load(f)
+    columns = [(os.path.join(path, f"{c['name']}.bin"), np.dtype(c['dtype']).itemsize)
+               for c in header['columns']]
+    rows = min(os.path.getsize(p) // size for p, size in columns)
+    for p, size in columns:
+        os.truncate(p, rows * size)
+    if segments and len(segments) > len(header['segments']):
+        header['segments'] = [s for s in segments if s['row'] <= rows]
+    header['recovered'] = datetime.now().isoformat()
+    with open(os.path.join(path, HEADER_NAME), 'w') as f:
+        json.dump(header, f, indent=2)
+    return rows
+
+
+class BinaryLog:
+    """
+    Read-only view of a binary log directory.
+
+    Columns are exposed as NumPy arrays; with mmap=True they are memory-mapped
+    so only the pages actually touched are read from disk.
+    """
+    def __init__(self, path: str, mmap: bool = True):
+        self.path = path
+        with open(os.path.join(path, HEADER_NAME)) as f:
+            self.header = json.load(f)
+        self.columns = {}
+        rows = None
+        for col in self.header['columns']:
+            name, dtype = col['name'], np.dtype(col['dtype'])
+            colpath = os.path.join(path, f'{name}.bin')
+            # Ignore a trailing partial item left by an interrupted write
+            n = os.path.getsize(colpath) // dtype.itemsize
+            rows = n if rows is None else min(rows, n)
+            if n == 0:
+                self.columns[name] = np.empty(0, dtype=dtype)
+            elif mmap:
+                self.columns[name] = np.memmap(colpath, dtype=dtype, mode='r', shape=(n,))
+            else:
+                self.columns[name] = np.fromfile(colpath, dtype=dtype, count=n)
+        # Columns are appended chunk by chunk, so trim to the shortest one
+        self.rows = rows or 0
+        for name in self.columns:
+            self.columns[name] = self.columns[name][:self.rows]
+
+    @property
+    def metadata(self) -> dict:
+        return self.header.get('metadata', {})
+
+    @property
+    def anchor(self):
+        clock = self.header.get('clock')
+        return ClockAnchor(clock['wall_ns'], clock['mono_ns']) if clock else None
+
+    def wall_time(self) -> np.ndarray:
+        """Sample wall-clock times as datetime64[ns] (UTC)."""
+        if 'mono_ns' not in self.columns:
+            # Format version 1 stored epoch seconds directly
+            return (self.columns['timestamp'] * 1e9).astype('datetime64[ns]')
+        anchor = self.anchor
+        return (self.columns['mono_ns'] - anchor.mono_ns + anchor.wall_ns).astype('datetime64[ns]')
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return self.rows
+
+
+def convert_csv(csv_path: str, directory: str = None, chunk_rows: int = 4096) -> str:
+    """
+    Convert a CSV log written by DataLogger into the binary format.
+
+    Args:
+        csv_path (str): Path of the data_<run_id>_<STATE>.csv file.
+        directory (str): Output directory (defaults to the CSV's directory).
+        chunk_rows (int): Rows per appended chunk.
+
+    Returns:
+        str: Path of the created binary log directory.
+    """
+    from core.controller import State
+
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(csv_path))
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    match = LOG_STEM.fullmatch(stem)
+    if match is None:
+        raise ValueError(f"Not a run log name: {os.path.basename(csv_path)}")
+    run_id, label = match.groups()
+
+    def wall_ns(iso):
+        return int(datetime.fromisoformat(iso).timestamp() * 1e9)
+
+    with open(csv_path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        # Logs with ISO timestamps get an identity anchor: mono_ns holds
+        # wall-clock nanoseconds directly
+        legacy = not header or header[0] != 'mono_ns'
+        anchor = ClockAnchor(0, 0) if legacy else None
+        if not legacy:
+            row = next(reader, None)
+            if row and row[0] == CLOCK_TAG:
+                anchor = ClockAnchor(int(row[1]), int(row[2]))
+        stamp = wall_ns if legacy else int
+        # Channel columns of this file that are registered (v1..v3 renamed)
+        channels = [(i, LEGACY_COLUMNS.get(name, name)) for i, name in enumerate(header)]
+        channels = [(i, name) for i, name in channels[3:] if name in CHANNELS]
+
+        def to_samples(rows):
+            samples = new_samples(len(rows))
+            samples['mono_ns'] = [stamp(r[0]) for r in rows]
+            samples['state'] = [State[r[1]].value for r in rows]
+            samples['t'] = [float(r[2]) for r in rows]
+            for i, name in channels:
+                samples[name] = [float(r[i]) if r[i] != '' else np.nan for r in rows]
+            return samples
+
+        logger = BinaryDataLogger(
+            run_id=run_id, directory=directory, label=label, anchor=anchor,
+            chunk_rows=chunk_rows, metadata={'source': os.path.basename(csv_path)}
+        )
+        rows = []
+        for row in reader:
+            if row[0] == CLOCK_TAG:
+                continue
+            if row[0] == SEGMENT_TAG:
+                if rows:
+                    logger.write_rows([to_samples(rows)])
+                    rows = []
+                _, state, ts = row
+                logger.write_rows([SegmentMarker(stamp(ts), State[state])])
+                continue
+            rows.append(row)
+            if len(rows) >= chunk_rows:
+                logger.write_rows([to_samples(rows)])
+                rows = []
+        if rows:
+            logger.write_rows([to_samples(rows)])
+    logger.close()
+    return logger.filepath
+
+
+def main(argv=None):
+    """Convert CSV logs (default: every CSV run log in logs/) to the binary format."""
+    paths = (argv if argv is not None else sys.argv[1:]) or sorted(
+        p for p in glob.glob(os.path.join(_default_directory(), 'data_*.csv'))
+        if LOG_STEM.fullmatch(os.path.splitext(os.path.basename(p))[0])
+    )
+    for path in paths:
+        out = convert_csv(path)
+        print(f"[binary_log] {path} -> {out}")
+
+
+if __name__ == '__main__':
+    main()
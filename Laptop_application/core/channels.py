@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+import config
+
+Channel = namedtuple('Channel', ['name', 'unit', 'description'])
+
+# Fixed leading fields of every sample record
+RECORD_FIELDS = [
+    ('mono_ns', '<i8'),     # time.monotonic_ns() of the sample
+    ('state',   '<u1'),     # State.value
+    ('t',       '<f8'),     # s since the start of the test / rotation
+]
+
+# Registered measurement channels, in record and log column order
+CHANNELS = OrderedDict()
+
+# Channels that logs written before the registry stored as v1, v2, v3
+LEGACY_COLUMNS = {
+    'v1': 'grouser_shear',
+    'v2': 'rubber_shear',
+    'v3': 'load_pressure',
+}
+
+_dtype = None
+_positions = None
+
+
+def register_channel(name: str, unit: str = '', description: str = '') -> Channel:
+    """
+    Add a measurement channel. Sample records, log files and plots pick it
+    up without code changes; channels not measured in a sample are NaN.
+    """
+    global _dtype, _positions
+    if name in CHANNELS or name in dict(RECORD_FIELDS):
+        raise ValueError(f"Channel already defined: {name}")
+    if not name.isidentifier():
+        raise ValueError(f"Invalid channel name: {name!r}")
+    channel = CHANNELS[name] = Channel(name, unit, description)
+    _dtype = _positions = None
+    return channel
+
+
+def channel_names() -> tuple:
+    return tuple(CHANNELS)
+
+
+def sample_dtype() -> np.dtype:
+    """Structured dtype of one sample record (fixed fields + all channels)."""
+    global _dtype
+    if _dtype is None:
+        _dtype = np.dtype(RECORD_FIELDS + [(name, '<f8') for name in CHANNELS])
+    return _dtype
+
+
+def new_samples(n: int) -> np.ndarray:
+    """n sample records with every channel set to NaN."""
+    samples = np.empty(n, dtype=sample_dtype())
+    for name in CHANNELS:
+        samples[name] = np.nan
+    return samples
+
+
+def make_sample(state, t: float, **values) -> np.ndarray:
+    """One sample record (array of length 1) stamped with the monotonic clock."""
+    global _positions
+    if _positions is None:
+        _positions = {name: i for i, name in enumerate(CHANNELS)}
+    row = [np.nan] * len(_positions)
+    for name, value in values.items():
+        row[_positions[name]] = value
+    # Building from one tuple is much faster than per-field assignment
+    return np.array([(time.monotonic_ns(), state.value, t, *row)], dtype=sample_dtype())
+
+
+# --- Built-in channels ------------------------------------------------------
+register_channel('grouser_shear', 'kPa', "Shear stress, grouser shear test")
+register_channel('rubber_shear',  'kPa', "Shear stress, rubber pad shear test")
+register_channel('load_pressure', 'kPa', "Plate pressure, load test")
+register_channel('cable_setpoint', 'mm', "Rotation cable length setpoint")
+register_channel('cable_length',   'mm', "Measured cable length")
+register_channel('winch_command',  '',   "PID winch speed command")
+
+# Extra sensors from config, e.g. EXTRA_CHANNELS="sinkage:mm,winch_current:A"
+for _spec in filter(None, (s.strip() for s in config.EXTRA_CHANNELS.split(','))):
+    _name, _, _unit = _spec.partition(':')
+    register_channel(_name.strip(), _unit.strip())
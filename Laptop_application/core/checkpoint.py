@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+import zlib
+
+from core.binary_log import repair_log
+from core.data_logger import repair_csv
+
+# Records appended before the file is compacted to its newest record
+COMPACT_RECORDS = 64
+
+
+def _app_path(path: str) -> str:
+    # Relative paths are relative to the application directory
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    return path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def _encode(record: dict) -> bytes:
+    data = json.dumps(record, separators=(',', ':')).encode()
+    return b'%08x ' % zlib.crc32(data) + data + b'\n'
+
+
+def _decode(line: bytes):
+    crc, _, data = line.rstrip(b'\n').partition(b' ')
+    try:
+        if int(crc, 16) != zlib.crc32(data):
+            return None
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def load_checkpoint(path: str) -> dict:
+    """
+    Newest intact record of a checkpoint file, or None. A torn or corrupt
+    tail (crash during an append) falls back to the record before it.
+    """
+    try:
+        with open(_app_path(path), 'rb') as f:
+            lines = f.read().split(b'\n')
+    except OSError:
+        return None
+    for line in reversed(lines):
+        if line:
+            record = _decode(line)
+            if record is not None:
+                return record
+    return None
+
+
+def clear_checkpoint(path: str):
+    try:
+        os.remove(_app_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def recover_log(record: dict):
+    """
+    Repair the run log named by a checkpoint record so it reads like a
+    cleanly closed one. Returns the log path, or None if it is gone.
+    """
+    path = record.get('log')
+    if not path or not os.path.exists(path):
+        return None
+    if os.path.isdir(path):
+        repair_log(path, record.get('segments'))
+    else:
+        repair_csv(path)
+    return path
+
+
+class Checkpointer:
+    """
+    Write-ahead session checkpoints on a background thread.
+
+    Every `interval` seconds the writer thread calls `snapshot()` (which
+    only reads controller attributes, so the control tick pays nothing),
+    appends the record with its CRC to the checkpoint file and fsyncs it.
+    Every COMPACT_RECORDS appends the file is atomically replaced by its
+    newest record. After a crash, load_checkpoint() returns the last
+    record that reached the disk intact.
+    """
+    def __init__(self, path: str, snapshot, interval: float = 1.0,
+                 name: str = "Checkpointer"):
+        self.path = _app_path(path)
+        self.name = name
+        self.snapshot = snapshot
+        self.interval = interval
+        self.written = 0
+        self._appended = 0
+        self._file = None
+        self._stop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self._file is not None
+
+    def start(self):
+        """Write a first checkpoint now, then keep writing until stop()."""
+        self.stop()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'wb')
+        self._appended = 0
+        self.write()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name=self.name, daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, stop: threading.Event):
+        while not stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                print(f"[Checkpointer] Write failed: {e}")
+
+    def write(self, **overrides):
+        """Append one checkpoint now (from any thread)."""
+        record = self.snapshot()
+        record.update(overrides)
+        record['written_at'] = time.time()
+        data = _encode(record)
+        with self._lock:
+            if self._file is None:
+                return
+            if self._appended >= COMPACT_RECORDS:
+                self._compact(data)
+            else:
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._appended += 1
+            self.written += 1
+
+    def _compact(self, data: bytes):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._file.close()
+        self._file = open(self.path, 'ab')
+        self._appended = 1
+
+    def stop(self, final: dict = None):
+        """
+        Stop the writer thread. With `final` the last record is written with
+        those fields (e.g. status='interrupted') and the file is kept;
+        without, the session ended cleanly and the file is removed.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self._file is None:
+            return
+        if final is not None:
+            self.write(**final)
+        with self._lock:
+            self._file.close()
+            self._file = None
+        if final is None:
+            clear_checkpoint(self.path)
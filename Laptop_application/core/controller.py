@@ -1,9 +1,22 @@
-from PyQt5.QtCore import QObject, pyqtSignal, QTimer
+from PyQt5.QtCore import QObject, pyqtSignal, QTimer, Qt
 from enum import Enum, auto
-import math, time, random
+import logging, math, os, re, time
+import numpy as np
 import config
-from core.data_logger import DataLogger
-from core.pid import PID
+from core.channels import make_sample, sample_dtype
+from core.data_logger import DataLogger, BufferedDataLogger
+from core.binary_log import BinaryDataLogger
+from core.pid import PID, AdvancedPID, GainSchedule
+from core import trajectory
+from core.trajectory import RigGeometry
+from core.scheduler import ControlLoopExecutor, AsyncControlLoop
+from core.instrumentation import TickInstrumentation
+from core.event_log import TRACE_LOGGER, Summarizer
+from core.pipeline import Pipeline, PlantSource, OptaSource
+from core.soil_fit import SoilAnalyzer, save_fits, format_fit
+from core.shm_bus import ShmPublisher
+from core.checkpoint import Checkpointer, load_checkpoint, clear_checkpoint, recover_log
+from sim.plant import make_plant
 
 class State(Enum):
     PRESTART     = auto()
@@ -12,18 +25,48 @@ class State(Enum):
     LOADTEST     = auto()
     PAUSED       = auto()
 
+# Channel measured in each test state
+TEST_CHANNELS = {
+    State.GROUSERTEST: 'grouser_shear',
+    State.RUBBERTEST:  'rubber_shear',
+    State.LOADTEST:    'load_pressure',
+}
+
 class Controller(QObject):
-    data_updated   = pyqtSignal(list)    # [t, set_len, act_len, output]
+    data_updated   = pyqtSignal(object)  # sample records, see core.channels
     state_changed  = pyqtSignal(State)
-    log_message    = pyqtSignal(str)      # GUI log messages
+    log_message    = pyqtSignal(int, str) # (logging level, text) for the GUI
 
-    def __init__(self, interval: int = 100):
+    def __init__(self, interval: int = 100, transport=None, settings=None,
+                 name: str = None, writer_pool=None):
+        """
+        Args:
+            interval (int): Tick interval of the state-machine tests (ms).
+            transport: Opta transport, needed for ACQ_SOURCE='opta'.
+            settings: config.py or a per-rig copy of it (see core.rigs).
+            name (str): Rig name for thread and logger names.
+            writer_pool (WriterPool): Shared log writer threads; None gives
+                each buffered log its own thread.
+        """
         super().__init__()
+        self.config        = settings if settings is not None else config
+        self.name          = name
+        self.writer_pool   = writer_pool
+        suffix             = f"-{name}" if name else ""
         # Base interval for state-machine tests
         self.interval      = interval
-        self.timer         = QTimer(self)
-        self.timer.setInterval(self.interval)
-        self.timer.timeout.connect(self._on_timeout)
+        if self.config.CONTROL_EXECUTOR == 'thread':
+            # Ticks run off the GUI thread; signals reach the GUI queued
+            self.timer = ControlLoopExecutor(self._on_timeout, self.interval,
+                                             name=f"ControlLoop{suffix}")
+        elif self.config.CONTROL_EXECUTOR == 'asyncio':
+            # Ticks are callbacks on the asyncio loop (the GUI thread when bridged)
+            self.timer = AsyncControlLoop(self._on_timeout, self.interval,
+                                          name=f"ControlLoop{suffix}")
+        else:
+            self.timer = QTimer(self)
+            self.timer.setInterval(self.interval)
+            self.timer.timeout.connect(self._on_timeout)
 
         # State-machine setup
         self.state         = State.PRESTART
@@ -31,6 +74,8 @@ class Controller(QObject):
         self._last_test    = None
         self.t             = 0.0
         self.logger        = None
+        self._log_label    = None
+        self._resumed_from = None
 
         self._enter_handlers = {
             State.PRESTART:    self._enter_prestart,
@@ -47,58 +92,129 @@ class Controller(QObject):
             State.PAUSED:      self._exit_paused,
         }
         self._update_handlers = {
-            State.GROUSERTEST: self._update_grouser,
-            State.RUBBERTEST:  self._update_rubber,
-            State.LOADTEST:    self._update_load,
+            State.GROUSERTEST: self._update_test,
+            State.RUBBERTEST:  self._update_test,
+            State.LOADTEST:    self._update_test,
         }
 
-        # Rotation control parameters from config
-        self.rotation_deg   = config.ROTATION_DEG
-        self.rotation_time  = config.ROTATION_TIME
-        self.frequency      = config.CONTROL_FREQUENCY  # Hz
-
-        # Derived rotation timing
-        self.dt_s           = 1.0 / self.frequency
-        self.dt_ms          = int(self.dt_s * 1000)
-        self.omega          = math.radians(self.rotation_deg) / self.rotation_time
-
-        # Precompute rotation trajectory (length setpoints)
-        steps = int(self.rotation_time * self.frequency) + 1
-        self._times       = [i * self.dt_s for i in range(steps)]
-        self._setpoints   = [
-            math.hypot(
-                955.9 + 247.5 * math.sin(self.omega * t),
-                247.5 * math.cos(self.omega * t)
-            ) for t in self._times
-        ]
+        # Rig geometry for the rotation trajectory
+        self.geometry       = RigGeometry(self.config.RIG_OFFSET, self.config.RIG_RADIUS)
+
+        # Plant model standing in for the rig measurements
+        self.plant = make_plant(self.config.PLANT_MODEL)
+
+        # High-rate acquisition decoupled from the tick rate (None: the
+        # ticks sample the plant themselves)
+        self.pipeline = self._make_pipeline(transport, f"Acquisition{suffix}")
+
+        # Shared-memory bus for external consumers (dashboards, notebooks)
+        self.bus = None
+        if self.config.SHM_BUS:
+            self.bus = ShmPublisher(self.config.SHM_BUS, sample_dtype(), self.config.SHM_BUS_CAPACITY)
+            if self.pipeline:
+                self.pipeline.publisher = self.bus
+
+        # Streaming soil-parameter fits; they run on the thread producing
+        # the samples, only the results are queued to the GUI
+        self.soil = SoilAnalyzer(
+            TEST_CHANNELS,
+            plate_width=self.config.PLATE_WIDTH,
+            normal_stress=self.config.NORMAL_STRESS,
+            sinkage_rate=self.config.SINKAGE_RATE,
+            shear_rate=self.config.SHEAR_RATE,
+            tolerance=self.config.FIT_TOLERANCE,
+            min_samples=self.config.FIT_MIN_SAMPLES
+        )
+        stream = self.pipeline.display_samples if self.pipeline else self.data_updated
+        stream.connect(self.soil.add_samples, Qt.DirectConnection)
+        self._run_fits     = []
 
         # PID for length control
-        self.pid = PID(
-            kp=config.PID_KP,
-            ki=config.PID_KI,
-            kd=config.PID_KD,
-            setpoint=0.0,
-            sample_time=self.dt_s,
-            output_limits=(config.MIN_SPEED, config.MAX_SPEED)
+        self.pid = self._make_pid(self.config.PID_TYPE)
+
+        # Rotation control parameters from config
+        self.configure_rotation(
+            rotation_deg=self.config.ROTATION_DEG,
+            rotation_time=self.config.ROTATION_TIME,
+            frequency=self.config.CONTROL_FREQUENCY,
+            profile=self.config.ROTATION_PROFILE
         )
 
         # Rotation state flags
         self._rotation_active = False
         self._rotation_index  = 0
 
+        # Event log; per-tick detail only goes to the trace file
+        self._events  = logging.getLogger('bevameter.controller' + (f'.{name}' if name else ''))
+        self._trace   = logging.getLogger(TRACE_LOGGER + (f'.{name}' if name else ''))
+        self._summary = Summarizer(self.config.LOG_SUMMARY_INTERVAL)
+
+        # Per-tick timing instrumentation
+        self.instrumentation = TickInstrumentation()
+        self._tick_key        = self.state.name
+
+        # Write-ahead checkpoints of the session while a run log is open
+        self.checkpoint = None
+        if self.config.CHECKPOINT_FILE:
+            self.checkpoint = Checkpointer(
+                self.config.CHECKPOINT_FILE, self._checkpoint_record,
+                self.config.CHECKPOINT_INTERVAL, name=f"Checkpointer{suffix}"
+            )
+
     # --- Rotation control API ---------------------------------------------
-    def start_rotation(self):
+    def configure_rotation(self, rotation_deg: float, rotation_time: float,
+                           frequency: float, profile: str = 'constant'):
+        """
+        Select the rotation trajectory. Trajectories are cached per parameter
+        set, so switching between test configurations is instant.
+        """
+        self.rotation_deg   = rotation_deg
+        self.rotation_time  = rotation_time
+        self.frequency      = frequency  # Hz
+        self.profile        = profile
+
+        # Derived rotation timing
+        self.dt_s           = 1.0 / self.frequency
+        # QTimer only takes whole milliseconds; the executor keeps the exact period
+        if isinstance(self.timer, ControlLoopExecutor):
+            self.dt_ms      = self.dt_s * 1000
+        else:
+            self.dt_ms      = int(self.dt_s * 1000)
+        self.omega          = math.radians(self.rotation_deg) / self.rotation_time
+        self.pid.sample_time = self.dt_s
+        if self.pipeline and not self.pipeline.is_running:
+            self.pipeline.set_control_rate(self.frequency)
+
+        # Length setpoints and feed-forward velocity, one per tick
+        self.trajectory     = trajectory.generate(
+            rotation_deg, rotation_time, frequency, profile, self.geometry
+        )
+        self._times         = self.trajectory.times
+        self._setpoints     = self.trajectory.setpoints
+        self._velocity      = self.trajectory.velocity
+        self._angle_deg     = np.degrees(self.trajectory.angle)
+
+    def start_rotation(self, start_index: int = 0, pid_state: dict = None):
         """
         Begin closed-loop rotation: rotate rotation_deg over rotation_time seconds.
+        A resumed rotation starts at trajectory tick start_index with the
+        checkpointed PID state.
         """
-        self.pid.reset()
+        if pid_state:
+            self.pid.restore(pid_state)
+        else:
+            self.pid.reset()
+        start_index = min(start_index, len(self._setpoints) - 1)
+        self.plant.reset(float(self._setpoints[start_index]))
         self._rotation_active = True
-        self._rotation_index  = 0
-        self.t = 0.0
+        self._rotation_index  = start_index
+        self.t = float(self._times[start_index])
         # Use rotation timer interval
         self.timer.setInterval(self.dt_ms)
+        self.instrumentation.restart()
+        self._start_acquisition()
         self.timer.start()
-        self.log_message.emit("Rotation started")
+        self._log("Rotation started")
 
     def stop_rotation(self):
         """
@@ -106,17 +222,57 @@ class Controller(QObject):
         """
         self._rotation_active = False
         self.timer.stop()
+        self._stop_acquisition()
         self.timer.setInterval(self.interval)
-        self.log_message.emit("Rotation stopped")
+        summary = self._summary.flush('ROTATION')
+        if summary:
+            self._log(summary)
+        self._log("Rotation stopped")
+
+    def timing_stats(self) -> dict:
+        """
+        Tick latency and missed-deadline statistics of the threaded executor.
+        """
+        if isinstance(self.timer, ControlLoopExecutor):
+            return self.timer.stats()
+        return {}
+
+    def instrumentation_snapshot(self) -> dict:
+        """
+        Per-state period error / handler / emission histograms, the skipped
+        PID update count and executor timing stats in one dict.
+        """
+        snap = self.instrumentation.snapshot()
+        snap['executor'] = self.timing_stats()
+        return snap
 
     # --- Internal timer callback ------------------------------------------
+    def _now(self) -> float:
+        # The scheduled tick time keeps PID dt exact regardless of wake-up jitter
+        if isinstance(self.timer, ControlLoopExecutor) and self.timer.deadline is not None:
+            return self.timer.deadline
+        return time.monotonic()
+
+    def _tick(self):
+        # Scheduler period count (counts missed deadlines), else trajectory ticks
+        if isinstance(self.timer, ControlLoopExecutor) and self.timer.tick is not None:
+            return self.timer.tick
+        return self._rotation_index
+
     def _on_timeout(self):
+        if self._rotation_active:
+            key, period = 'ROTATION', self.dt_s
+        else:
+            key, period = self.state.name, self.interval / 1000.0
+        self._tick_key = key
+        start = self.instrumentation.tick_started(key, period)
         if self._rotation_active:
             self._update_rotation()
         else:
             handler = self._update_handlers.get(self.state)
             if handler:
                 handler()
+        self.instrumentation.handler_done(key, start)
         # Advance elapsed time
         delta = self.dt_s if self._rotation_active else (self.interval / 1000.0)
         self.t += delta
@@ -128,26 +284,67 @@ class Controller(QObject):
             return
 
         # Current time and setpoint
-        t        = self._times[self._rotation_index]
-        l_set    = self._setpoints[self._rotation_index]
-        # TODO: implement actual measurement reading
-        l_act    = 0.0
+        t        = float(self._times[self._rotation_index])
+        l_set    = float(self._setpoints[self._rotation_index])
+        l_act    = self.pipeline.latest('cable_length') if self.pipeline else None
+        if l_act is None:
+            l_act = self.plant.cable_length()
 
-        # PID-only control
         self.pid.setpoint = l_set
-        corr = self.pid.update(l_act, current_time=time.time())
+        if isinstance(self.pid, AdvancedPID):
+            # Trajectory velocity feed-forward, gains scheduled on the angle
+            i = self._rotation_index
+            self.pid.feedforward = self.config.PID_KFF * float(self._velocity[i])
+            self.pid.position = float(self._angle_deg[i])
+            corr = self.pid.update(l_act, current_time=self._now(), tick=self._tick())
+        else:
+            corr = self.pid.update(l_act, current_time=self._now())
         if corr is None:
+            self.instrumentation.pid_skipped += 1
             return
         output = corr
+        if self.pipeline:
+            self.pipeline.drive(output, self.dt_s)
+        else:
+            self.plant.drive(output, self.dt_s)
 
         # Emit data for plotting/log
-        self.data_updated.emit([t, l_set, l_act, output])
-        self.log_message.emit(
-            f"t={t:.2f}s set={l_set:.2f} act={l_act:.2f} -> {output:.2f}"
-        )
+        if self.pipeline:
+            # Logged with the acquired records, by the acquisition thread
+            self.pipeline.hold(cable_setpoint=l_set, winch_command=output)
+        self._emit_samples(make_sample(
+            self.state, t, cable_setpoint=l_set, cable_length=l_act, winch_command=output
+        ), record=not self.pipeline)
+        # Every tick goes to the trace file, the GUI gets one summary per interval
+        text = f"t={t:.2f}s set={l_set:.2f} act={l_act:.2f} -> {output:.2f}"
+        self._trace.debug(text)
+        summary = self._summary.add('ROTATION', text)
+        if summary:
+            self._log(summary)
 
         self._rotation_index += 1
 
+    def _log(self, msg: str, level: int = logging.INFO):
+        self._events.log(level, msg)
+        self.log_message.emit(level, msg)
+
+    def _emit_samples(self, samples, record: bool = True):
+        start = time.perf_counter()
+        self.data_updated.emit(samples)
+        self.instrumentation.emit_done(self._tick_key, start)
+        if not record:
+            return
+        if self.logger:
+            self.logger.log(samples)
+        if self.bus:
+            self.bus.publish(samples)
+
+    def _update_test(self):
+        if self.pipeline:
+            return      # the acquisition thread samples the test channel
+        v = self.plant.measure(self.state, self.t)
+        self._emit_samples(make_sample(self.state, self.t, **{TEST_CHANNELS[self.state]: v}))
+
     # --- Existing state-machine methods ----------------------------------
     def start_sequence(self, include_grouser: bool):
         seq = []
@@ -155,25 +352,33 @@ class Controller(QObject):
             seq.append(State.GROUSERTEST)
         seq.extend([State.RUBBERTEST, State.LOADTEST])
         self._sequence = seq
+        # One run_id and one preopened log for the whole sequence; state
+        # transitions only queue segment markers
+        self.open_log('SEQUENCE')
         self._start_next_test()
 
     def start_test(self):
         if self.state in self._update_handlers:
+            self.instrumentation.restart()
+            self._start_acquisition()
             self.timer.start()
-            self.log_message.emit(f"Started {self.state.name}")
+            self._log(f"Started {self.state.name}")
 
     def stop_test(self):
         if self.timer.isActive():
             self.timer.stop()
-            self.log_message.emit(f"Stopped {self.state.name}")
+            self._log(f"Stopped {self.state.name}")
+        # Stopping first keeps the segment marker after the last sample
+        self._stop_acquisition()
+        self._finish_fit()
         self._start_next_test()
 
     def reset(self):
         if self.timer.isActive():
             self.timer.stop()
-        if self.logger:
-            self.logger.close()
-            self.logger = None
+        self._stop_acquisition()
+        self._finish_fit()
+        self.close_log()
         self._sequence.clear()
         self._last_test = None
         self.t = 0.0
@@ -195,6 +400,7 @@ class Controller(QObject):
         self.t = 0.0
         self._last_test = test_state
         self._change_state(test_state)
+        self.soil.begin(test_state)
         self._enter_state(test_state)
 
     def _exit_state(self, state: State):
@@ -207,70 +413,318 @@ class Controller(QObject):
         if handler:
             handler()
 
+    def emergency_stop(self):
+        """
+        Stop the rig and abort the run, keeping its checkpoint so that it
+        can still be resumed or finalized (see pending_session()).
+        """
+        self._rotation_active = False
+        if self.timer.isActive():
+            self.timer.stop()
+        self._stop_acquisition()
+        if self.checkpoint and self.checkpoint.active:
+            self.checkpoint.stop(final={'status': 'interrupted'})
+        self.reset()
+        self._log("Emergency stop", logging.WARNING)
+
+    def shutdown(self):
+        """Stop everything and release the log and the live data bus."""
+        if self._rotation_active:
+            self.stop_rotation()
+        self.reset()
+        if self.bus:
+            self.bus.close()
+            self.bus = None
+
     def _change_state(self, new_state: State):
         self.state = new_state
+        if self.pipeline:
+            self.pipeline.state = new_state
         self.state_changed.emit(self.state)
 
+    def open_log(self, label: str, run_id: str = None):
+        """
+        Open a new run log (closing any open one); samples of the running
+        test or rotation go to it until close_log() or reset(). The session
+        is checkpointed until then.
+        """
+        self.close_log()
+        if self.pending_session():
+            # A new run supersedes the interrupted one
+            self.finalize_session()
+        self.logger = self._open_logger(label=label, run_id=run_id)
+        self._log_label = label
+        self._run_fits = []
+        if self.pipeline:
+            self.pipeline.set_logger(self.logger)
+        self._log(f"Logging to {self.logger.filepath}")
+        if self.checkpoint:
+            self.checkpoint.start()
+        return self.logger
+
+    def close_log(self):
+        if not self.logger:
+            return
+        if self.checkpoint:
+            # Only a run closed here counts as finished
+            self.checkpoint.stop()
+        if self.pipeline:
+            self.pipeline.set_logger(None)
+        self.logger.close()
+        if isinstance(self.logger, BufferedDataLogger):
+            if self.logger.error is not None:
+                self._log(
+                    f"Logger failed: {self.logger.error}; {self.logger.written} samples "
+                    f"written, {self.logger.dropped} lost", logging.ERROR
+                )
+            else:
+                self._log(
+                    f"Logger closed: {self.logger.written} samples written, "
+                    f"{self.logger.dropped} dropped",
+                    logging.WARNING if self.logger.dropped else logging.INFO
+                )
+        self.logger = None
+
+    # --- Session checkpoints ----------------------------------------------
+    def _checkpoint_record(self) -> dict:
+        # Runs on the checkpoint thread and only reads attributes, so the
+        # tick is never held up; fields may be a tick apart, which a resume
+        # tolerates
+        logger = self.logger
+        inner = getattr(logger, 'logger', logger)
+        header = getattr(inner, 'header', None)
+        return {
+            'status': 'running',
+            'run_id': logger.run_id if logger else None,
+            'label': self._log_label,
+            'log': logger.filepath if logger else None,
+            'logged_rows': getattr(logger, 'written', getattr(logger, 'rows', None)),
+            'log_error': str(logger.error) if getattr(logger, 'error', None) else None,
+            'segments': list(header['segments']) if header else None,
+            'state': self.state.name,
+            'sequence': [s.name for s in self._sequence],
+            't': self.t,
+            'rotating': self._rotation_active,
+            'rotation_index': self._rotation_index,
+            'rotation': {'rotation_deg': self.rotation_deg,
+                         'rotation_time': self.rotation_time,
+                         'frequency': self.frequency,
+                         'profile': self.profile},
+            'pid': self.pid.snapshot(),
+        }
+
+    def pending_session(self) -> dict:
+        """
+        Last checkpoint of a run that was interrupted (crash, power loss or
+        emergency stop) and neither resumed nor finalized yet, or None.
+        """
+        if not self.checkpoint or self.checkpoint.active:
+            return None
+        return load_checkpoint(self.config.CHECKPOINT_FILE)
+
+    def finalize_session(self, record: dict = None):
+        """
+        Close out an interrupted run: repair its log and drop the checkpoint.
+        Returns the log path, or None.
+        """
+        record = record or self.pending_session()
+        if record is None:
+            return None
+        path = recover_log(record)
+        clear_checkpoint(self.config.CHECKPOINT_FILE)
+        self._log(f"Finalized interrupted run {record['run_id']}: {path or 'no log'}")
+        return path
+
+    def resume_session(self, record: dict = None) -> bool:
+        """
+        Continue an interrupted run where its last checkpoint left it. The
+        old log is finalized and the run continues in a new log with the
+        same run_id (label suffix _R1, _R2, ...). A rotation restarts at the
+        checkpointed tick with the PID state; a sequence re-enters the
+        interrupted test (start it with start_test()) followed by the
+        remaining ones.
+        """
+        record = record or self.pending_session()
+        if record is None:
+            return False
+        self.finalize_session(record)
+        base, resumed = re.fullmatch(r'(.*?)(?:_R(\d+))?', record['label'] or 'RUN').groups()
+        label = f"{base}_R{int(resumed or 0) + 1}"
+        self._resumed_from = record['log']
+        try:
+            self.configure_rotation(**record['rotation'])
+            if record['rotating']:
+                self.open_log(label, run_id=record['run_id'])
+                self.start_rotation(record['rotation_index'], record['pid'])
+            else:
+                self._sequence = [State[name] for name in record['sequence']]
+                self.open_log(label, run_id=record['run_id'])
+                state = State[record['state']]
+                if state in TEST_CHANNELS:
+                    self._enter_test(state)
+                    self.t = record['t']
+                else:
+                    self._start_next_test()
+        finally:
+            self._resumed_from = None
+        self._log(f"Resumed run {record['run_id']} in {label}")
+        return True
+
+    def _finish_fit(self):
+        # Final soil fit of the test, stored next to the run log
+        result = self.soil.end()
+        if result is None:
+            return
+        self._log(f"Fit {format_fit(result)}")
+        if self.logger:
+            self._run_fits.append(result)
+            save_fits(self.logger.filepath, self._run_fits)
+
+    def _run_metadata(self) -> dict:
+        return {
+            'pid': {'type': self.config.PID_TYPE,
+                    'kp': self.pid.kp, 'ki': self.pid.ki, 'kd': self.pid.kd},
+            'rotation_deg': self.rotation_deg,
+            'rotation_time': self.rotation_time,
+            'rotation_profile': self.profile,
+            'rig': self.name,
+            'rig_geometry': list(self.geometry),
+            'control_frequency': self.frequency,
+            'interval_ms': self.interval,
+            'speed_limits': [self.config.MIN_SPEED, self.config.MAX_SPEED],
+            'plate_width': self.config.PLATE_WIDTH,
+            'normal_stress': self.config.NORMAL_STRESS,
+            'resumed_from': self._resumed_from,
+            'acquisition': {
+                'source': self.config.ACQ_SOURCE,
+                'rate': self.config.ACQ_RATE if self.pipeline else None,
+                'display_rate': self.config.DISPLAY_RATE,
+                'decimation_taps': self.config.DECIMATION_TAPS,
+            },
+        }
+
+    def _make_pid(self, kind: str):
+        common = dict(
+            kp=self.config.PID_KP,
+            ki=self.config.PID_KI,
+            kd=self.config.PID_KD,
+            setpoint=0.0,
+            sample_time=1.0 / self.config.CONTROL_FREQUENCY,
+            output_limits=(self.config.MIN_SPEED, self.config.MAX_SPEED)
+        )
+        if kind == 'classic':
+            return PID(**common)
+        if kind == 'advanced':
+            return AdvancedPID(
+                setpoint_weight=self.config.PID_SETPOINT_WEIGHT,
+                derivative_weight=self.config.PID_DERIVATIVE_WEIGHT,
+                derivative_tau=self.config.PID_DERIVATIVE_TAU,
+                anti_windup=self.config.PID_ANTI_WINDUP,
+                tracking_time=self.config.PID_TRACKING_TIME,
+                fixed_step=self.config.PID_FIXED_STEP,
+                schedule=GainSchedule.parse(self.config.PID_SCHEDULE),
+                **common
+            )
+        raise ValueError(f"Unknown PID_TYPE: {kind}")
+
+    # --- Acquisition pipeline ---------------------------------------------
+    def _make_pipeline(self, transport, name: str = "Acquisition"):
+        if self.config.ACQ_SOURCE == 'none':
+            return None
+        if self.config.ACQ_SOURCE == 'opta':
+            if transport is None:
+                raise ValueError("ACQ_SOURCE='opta' needs the serial transport")
+            columns = [c.strip() for c in self.config.ACQ_CHANNELS.split(',')]
+            source = OptaSource(transport, self.config.ACQ_RATE, columns, self.config.ACQ_BLOCK)
+        elif self.config.ACQ_SOURCE == 'plant':
+            source = PlantSource(self.plant, self.config.ACQ_RATE, self.config.ACQ_BLOCK)
+        else:
+            raise ValueError(f"Unknown ACQ_SOURCE: {self.config.ACQ_SOURCE}")
+        pipeline = Pipeline(
+            source,
+            acq_rate=self.config.ACQ_RATE,
+            control_rate=self.config.CONTROL_FREQUENCY,
+            display_rate=self.config.DISPLAY_RATE,
+            state_channels=TEST_CHANNELS,
+            taps_per_factor=self.config.DECIMATION_TAPS,
+            name=name
+        )
+        # Decimated batches reach the GUI like tick samples (queued)
+        pipeline.display_samples.connect(self.data_updated)
+        # Records are stamped with the state from the start; _change_state()
+        # keeps it current
+        pipeline.state = self.state
+        return pipeline
+
+    def _start_acquisition(self):
+        if self.pipeline and not self.pipeline.is_running:
+            self.pipeline.mark_start(self.t)
+            self.pipeline.start()
+
+    def _stop_acquisition(self):
+        if self.pipeline:
+            self.pipeline.stop()
+
+    def _open_logger(self, state: State = None, label: str = None, run_id: str = None):
+        directory = self.config.LOG_DIRECTORY or None
+        if directory and not os.path.isabs(directory):
+            # Relative to the application directory, like the default logs/
+            base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+            directory = os.path.join(base, directory)
+        if self.config.LOG_FORMAT == 'binary':
+            logger = BinaryDataLogger(
+                state=state,
+                run_id=run_id,
+                directory=directory,
+                label=label,
+                chunk_rows=self.config.LOG_CHUNK_ROWS,
+                metadata=self._run_metadata()
+            )
+        else:
+            logger = DataLogger(state=state, run_id=run_id, directory=directory, label=label)
+        if self.config.LOG_BUFFERED:
+            logger = BufferedDataLogger(
+                logger,
+                queue_size=self.config.LOG_QUEUE_SIZE,
+                flush_interval=self.config.LOG_FLUSH_INTERVAL,
+                flush_rows=self.config.LOG_FLUSH_ROWS,
+                pool=self.writer_pool
+            )
+        return logger
+
     # State-specific handlers unchanged...
     def _enter_prestart(self):
-        self.log_message.emit("Entering PRESTART: configure winch")
+        self._log("Entering PRESTART: configure winch")
 
     def _exit_prestart(self):
-        self.log_message.emit("Exiting PRESTART")
+        self._log("Exiting PRESTART")
 
     def _enter_grouser(self):
-        self.log_message.emit("Entering GROUSERTEST")
+        self._log("Entering GROUSERTEST")
         if self.logger:
-            self.logger.close()
-        self.logger = DataLogger(state=self.state)
-        self.log_message.emit(f"Logging to {self.logger.filepath}")
-
-    def _update_grouser(self):
-        v = math.sin(2*math.pi*1*self.t) + random.uniform(-0.1, 0.1)
-        self.data_updated.emit([self.t, v, None, None])
-        self.logger.log(self.state, self.t, v, None, None)
+            self.logger.begin_segment(self.state)
 
     def _exit_grouser(self):
-        self.log_message.emit("Exiting GROUSERTEST")
-        if self.logger:
-            self.logger.close()
+        self._log("Exiting GROUSERTEST")
 
     def _enter_rubber(self):
-        self.log_message.emit("Entering RUBBERTEST")
+        self._log("Entering RUBBERTEST")
         if self.logger:
-            self.logger.close()
-        self.logger = DataLogger(state=self.state)
-        self.log_message.emit(f"Logging to {self.logger.filepath}")
-
-    def _update_rubber(self):
-        v = math.sin(2*math.pi*0.5*self.t) + random.uniform(-0.1, 0.1)
-        self.data_updated.emit([self.t, None, v, None])
-        self.logger.log(self.state, self.t, None, v, None)
+            self.logger.begin_segment(self.state)
 
     def _exit_rubber(self):
-        self.log_message.emit("Exiting RUBBERTEST")
-        if self.logger:
-            self.logger.close()
+        self._log("Exiting RUBBERTEST")
 
     def _enter_load(self):
-        self.log_message.emit("Entering LOADTEST")
+        self._log("Entering LOADTEST")
         if self.logger:
-            self.logger.close()
-        self.logger = DataLogger(state=self.state)
-        self.log_message.emit(f"Logging to {self.logger.filepath}")
-
-    def _update_load(self):
-        v = math.sin(2*math.pi*2*self.t) + random.uniform(-0.1, 0.1)
-        self.data_updated.emit([self.t, None, None, v])
-        self.logger.log(self.state, self.t, None, None, v)
+            self.logger.begin_segment(self.state)
 
     def _exit_load(self):
-        self.log_message.emit("Exiting LOADTEST")
-        if self.logger:
-            self.logger.close()
+        self._log("Exiting LOADTEST")
 
     def _enter_paused(self):
-        self.log_message.emit("Entering PAUSED")
+        self._log("Entering PAUSED")
 
     def _exit_paused(self):
-        self.log_message.emit("Exiting PAUSED")
+        self._log("Exiting PAUSED")
@@ -1,12 +1,52 @@
+import asyncio
 import csv
 import os
+import re
+import threading
+import time
+from collections import deque, namedtuple
 from datetime import datetime
 
+from core.channels import channel_names
+
+# Start of a state segment inside a multi-state (sequence) log
+SegmentMarker = namedtuple('SegmentMarker', ['timestamp', 'state'])
+
+# Run log names without extension: data_<YYYYmmdd_HHMMSS>_<LABEL>, LABEL
+# being a state, SEQUENCE or ROTATION with _R<n> for resumed runs. Exports
+# such as <name>_iso.csv do not match.
+LOG_STEM = re.compile(r'data_(\d{8}_\d{6})_([A-Z]+(?:_R\d+)?)')
+
+# First cell of CSV marker rows; readers skip rows starting with '#'
+SEGMENT_TAG = '# segment'
+CLOCK_TAG   = '# clock'
+
+
+class ClockAnchor(namedtuple('ClockAnchor', ['wall_ns', 'mono_ns'])):
+    """
+    One wall-clock reading (time.time_ns) paired with a monotonic one
+    (time.monotonic_ns) taken at the start of a run. Samples store only
+    monotonic nanoseconds, so NTP adjustments mid-run cannot make them jump;
+    the anchor turns them into wall-clock time when exporting or reading.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def now(cls):
+        return cls(time.time_ns(), time.monotonic_ns())
+
+    def to_datetime(self, mono_ns: int) -> datetime:
+        return datetime.fromtimestamp((self.wall_ns + mono_ns - self.mono_ns) / 1e9)
+
+    def to_iso(self, mono_ns: int) -> str:
+        return self.to_datetime(mono_ns).isoformat()
+
 class DataLogger:
     """
-    Logs test data to a CSV file. Filename includes timestamp and state.
+    Logs test data to a CSV file. Filename includes timestamp and state
+    (or `label`, e.g. SEQUENCE for a whole test sequence).
     """
-    def __init__(self, state=None, run_id=None, directory=None):
+    def __init__(self, state=None, run_id=None, directory=None, label=None):
         # Determine log directory
         if directory is None:
             base = os.path.dirname(__file__)
@@ -15,19 +55,408 @@ class DataLogger:
         # Generate a timestamp if not provided
         if run_id is None:
             run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.run_id = run_id
         # Include state name in filename
-        state_name = state.name if state is not None else 'UNKNOWN'
-        filename = f'data_{run_id}_{state_name}.csv'
+        if label is None:
+            label = state.name if state is not None else 'UNKNOWN'
+        filename = f'data_{run_id}_{label}.csv'
         self.filepath = os.path.join(directory, filename)
-        # Open CSV and write header
+        # Open CSV, write header and the run's clock anchor
+        self.anchor = ClockAnchor.now()
+        self.channels = channel_names()
+        self._state_names = _state_names()
         self.file = open(self.filepath, 'w', newline='')
         self.writer = csv.writer(self.file)
-        self.writer.writerow(['timestamp', 'state', 't', 'v1', 'v2', 'v3'])
+        self.writer.writerow(['mono_ns', 'state', 't', *self.channels])
+        self.writer.writerow([CLOCK_TAG, self.anchor.wall_ns, self.anchor.mono_ns])
+
+    def log(self, samples, block: bool = False):
+        """Write a batch of sample records (see core.channels) and flush."""
+        self.write_rows([samples])
+        self.flush()
+
+    def begin_segment(self, state):
+        """Mark the start of a new state segment."""
+        self.write_rows([SegmentMarker(time.monotonic_ns(), state)])
 
-    def log(self, state, t, v1, v2, v3):
-        timestamp = datetime.now().isoformat()
-        self.writer.writerow([timestamp, state.name, f"{t:.3f}", v1, v2, v3])
+    def write_rows(self, items):
+        """
+        Write sample record arrays and SegmentMarkers without flushing.
+        Channels without a value (NaN) are left empty.
+        """
+        names = self._state_names
+        for item in items:
+            if type(item) is SegmentMarker:
+                self.writer.writerow([SEGMENT_TAG, item.state.name, item.timestamp])
+                continue
+            # An unknown state code is written as the number rather than
+            # failing the whole file
+            self.writer.writerows(
+                [ts, names.get(state, str(state)), f"{t:.3f}",
+                 *['' if v != v else v for v in values]]
+                for ts, state, t, *values in item.tolist()
+            )
+
+    def flush(self):
         self.file.flush()
 
     def close(self):
         self.file.close()
+
+
+def _state_names() -> dict:
+    from core.controller import State
+    return {s.value: s.name for s in State}
+
+
+class BufferedDataLogger:
+    """
+    Wraps a logger so that log() only enqueues the sample batch.
+
+    A writer thread drains the bounded queue and hands the batches to the
+    wrapped logger's write_rows(), flushing every flush_interval seconds or
+    every flush_rows rows, whichever comes first. When more than queue_size
+    rows are pending the oldest batches are discarded and counted in
+    `dropped`, unless the batch is logged with block=True: then log() waits
+    for the writer to make room instead. With a WriterPool the pool's
+    threads do the writing instead of a thread of its own.
+
+    A write error fails the logger: the rows that were not written and all
+    later ones are counted in `dropped`, and `error` is set.
+
+    Attributes:
+        queued (int): Samples accepted by log() since the logger was opened
+        written (int): Samples handed to the wrapped logger
+        dropped (int): Samples overwritten because the queue was full, or
+            lost to a write error
+        error (Exception): The write error that failed the logger, or None
+    """
+    def __init__(self, logger, queue_size: int = 10000,
+                 flush_interval: float = 0.5, flush_rows: int = 500,
+                 pool: 'WriterPool' = None):
+        self.logger = logger
+        self.filepath = logger.filepath
+        self.run_id = logger.run_id
+        self.anchor = logger.anchor
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.error = None
+
+        self._queue = deque()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._last_flush = time.monotonic()
+        self._thread = None
+        self._worker = None
+        if pool is not None:
+            self._worker = pool.add(self)
+        else:
+            self._thread = threading.Thread(
+                target=self._write_loop,
+                name="DataLoggerWriter",
+                daemon=True
+            )
+            self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Number of samples waiting to be written."""
+        return self._pending
+
+    def log(self, samples, block: bool = False):
+        n = len(samples)
+        with self._cond:
+            if self._closed:
+                return
+            if self.error is not None:
+                self.dropped += n
+                return
+            if block:
+                while self._pending + n > self.queue_size and self._pending and not self._closed:
+                    self._wake_writer()
+                    self._cond.wait(self.flush_interval)
+            while self._pending + n > self.queue_size and self._pending:
+                self._drop_oldest()
+            self._queue.append(samples)
+            self._pending += n
+            self.queued += n
+            if self._pending >= self.flush_rows:
+                self._wake_writer()
+
+    def _wake_writer(self):
+        # Called with the condition held
+        if self._worker is not None:
+            self._worker.notify()
+        else:
+            self._cond.notify()
+
+    def _drop_oldest(self):
+        # Segment markers are kept; only sample batches are discarded
+        queue = self._queue
+        i = 0
+        while type(queue[i]) is SegmentMarker:
+            i += 1
+        batch = queue[i]
+        del queue[i]
+        self._pending -= len(batch)
+        self.dropped += len(batch)
+
+    def begin_segment(self, state):
+        """Queue a segment marker; the writer thread does the file I/O."""
+        with self._cond:
+            if not self._closed:
+                self._queue.append(SegmentMarker(time.monotonic_ns(), state))
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                if not self._closed and self._pending < self.flush_rows:
+                    timeout = self.flush_interval - (time.monotonic() - self._last_flush)
+                    if timeout > 0:
+                        self._cond.wait(timeout)
+            if self._drain():
+                return
+
+    def _due(self, now: float) -> bool:
+        return (self._closed or self._pending >= self.flush_rows
+                or now - self._last_flush >= self.flush_interval)
+
+    def _drain(self) -> bool:
+        """Write and flush everything queued; True once the logger is closed."""
+        with self._cond:
+            batch = list(self._queue)
+            rows = self._pending
+            self._queue.clear()
+            self._pending = 0
+            closed = self._closed
+            # Wake blocked log() calls waiting for room
+            self._cond.notify_all()
+        if self.error is not None:
+            with self._cond:
+                # Queued before the logger failed
+                self.dropped += rows
+        else:
+            try:
+                if batch:
+                    self.logger.write_rows(batch)
+                self.logger.flush()
+            except Exception as e:
+                with self._cond:
+                    self.error = e
+                    self.dropped += rows
+                print(f"[DataLogger] Write to {self.filepath} failed, logging stopped: {e}")
+            else:
+                self.written += rows
+        self._last_flush = time.monotonic()
+        return closed
+
+    def close(self):
+        """Stop accepting samples, drain the queue and close the wrapped logger."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        if self._worker is not None:
+            self._worker.remove(self)
+            self._drain()
+        else:
+            self._thread.join()
+        self.logger.close()
+
+
+class _PoolWorker:
+    # One WriterPool thread and the loggers pinned to it
+    def __init__(self, name: str, tick: float):
+        self.tick = tick
+        self.wake = threading.Event()
+        self.loggers = []
+        self._lock = threading.Lock()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        self.wake.set()
+
+    def remove(self, logger):
+        # Returns once the worker is no longer writing to the logger
+        with self._lock:
+            self.loggers.remove(logger)
+
+    def _run(self):
+        while not self._stop:
+            self.wake.wait(self.tick)
+            self.wake.clear()
+            now = time.monotonic()
+            with self._lock:
+                for logger in self.loggers:
+                    if logger._due(now):
+                        # A write error fails only that logger (see _drain)
+                        logger._drain()
+
+    def stop(self):
+        self._stop = True
+        self.wake.set()
+        self._thread.join()
+
+
+class WriterPool:
+    """
+    Writer threads shared by the BufferedDataLoggers of several rigs, so
+    running more rigs does not add a writer thread per open log.
+
+    Each logger is pinned to the least loaded worker, which keeps its
+    batches in order. A worker wakes when one of its loggers has
+    flush_rows pending, and otherwise every `tick` seconds to flush the
+    loggers whose flush_interval has elapsed.
+    """
+    def __init__(self, workers: int = 2, tick: float = 0.05):
+        self._workers = [_PoolWorker(f"LogWriter-{i}", tick) for i in range(max(1, workers))]
+        self._lock = threading.Lock()
+
+    def add(self, logger) -> _PoolWorker:
+        with self._lock:
+            worker = min(self._workers, key=lambda w: len(w.loggers))
+            with worker._lock:
+                worker.loggers.append(logger)
+        return worker
+
+    def close(self):
+        """Stop the workers; close the loggers first."""
+        for worker in self._workers:
+            worker.stop()
+
+
+class AsyncLogWriter:
+    """
+    WriterPool counterpart for the asyncio backend.
+
+    A task on the event loop decides when each BufferedDataLogger is due
+    (flush_rows pending or flush_interval elapsed) and runs the writes in
+    the loop's default executor, so the loop never waits on the disk.
+    Passed to a Controller as its writer_pool.
+    """
+    def __init__(self, loop=None, tick: float = 0.05):
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+        self.tick = tick
+        self.loggers = []
+        self._lock = threading.Lock()
+        self._event = asyncio.Event()
+        self._task = None
+
+    def add(self, logger) -> 'AsyncLogWriter':
+        with self._lock:
+            self.loggers.append(logger)
+        if self._task is None:
+            self._task = self.loop.create_task(self._run())
+        return self
+
+    def notify(self):
+        # May run on any thread (the acquisition thread logs too)
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._event.set)
+
+    def remove(self, logger):
+        # Returns once no executor job is writing to the logger
+        with self._lock:
+            self.loggers.remove(logger)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._event.wait(), self.tick)
+            except asyncio.TimeoutError:
+                pass
+            self._event.clear()
+            now = time.monotonic()
+            due = [logger for logger in list(self.loggers) if logger._due(now)]
+            if due:
+                await self.loop.run_in_executor(None, self._drain, due)
+
+    def _drain(self, loggers):
+        with self._lock:
+            for logger in loggers:
+                if logger not in self.loggers:
+                    continue    # closed meanwhile; close() drained it
+                logger._drain()
+
+    def close(self):
+        """Stop the writer task; close the loggers first."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def read_clock_anchor(path: str):
+    """
+    Return the ClockAnchor of a CSV log, or None for logs written before
+    monotonic timestamps (whose 'timestamp' column is already ISO text).
+    """
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or header[0] != 'mono_ns':
+            return None
+        for row in reader:
+            if row and row[0] == CLOCK_TAG:
+                return ClockAnchor(int(row[1]), int(row[2]))
+            if row and not row[0].startswith('#'):
+                break
+    return None
+
+
+def repair_csv(path: str) -> int:
+    """
+    Cut a CSV log left by a crash back to its last complete row.
+
+    Returns:
+        int: Bytes removed from the end of the file.
+    """
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        f.truncate(end)
+    return size - end
+
+
+def export_iso_csv(path: str, out_path: str = None) -> str:
+    """
+    Rewrite a CSV log with ISO wall-clock timestamps (the original
+    timestamp, state, t, <channels> layout). Segment markers are kept.
+
+    Returns:
+        str: The exported file (default: <name>_iso.csv next to the input).
+    """
+    anchor = read_clock_anchor(path)
+    if out_path is None:
+        out_path = os.path.splitext(path)[0] + '_iso.csv'
+    with open(path, newline='') as src, open(out_path, 'w', newline='') as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst)
+        header = next(reader, None) or ['timestamp']
+        writer.writerow(['timestamp'] + header[1:])
+        for row in reader:
+            if not row or row[0] == CLOCK_TAG:
+                continue
+            if anchor is None:
+                writer.writerow(row)
+            elif row[0] == SEGMENT_TAG:
+                writer.writerow([SEGMENT_TAG, row[1], anchor.to_iso(int(row[2]))])
+            else:
+                writer.writerow([anchor.to_iso(int(row[0]))] + row[1:])
+    return out_path
@@ -0,0 +1,93 @@
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+# Per-tick detail goes to this logger; the GUI only gets summaries
+TRACE_LOGGER = 'bevameter.trace'
+
+_listener = None
+
+
+def _app_path(path: str) -> str:
+    # Relative paths are relative to the application directory
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    return path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def setup_trace_log(path: str, level: str = 'DEBUG', max_bytes: int = 10_000_000,
+                    backups: int = 3):
+    """
+    Send the 'bevameter' loggers to a rotating file.
+
+    Records are handed to a QueueHandler, and a listener thread does the
+    file I/O, so logging from the control loop never waits on the disk.
+    An empty path disables the file. Returns the log file path or None.
+    """
+    global _listener
+    root = logging.getLogger('bevameter')
+    root.setLevel(getattr(logging, level.upper(), logging.DEBUG))
+    root.propagate = False
+    if _listener is not None or not path:
+        return None
+    path = _app_path(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backups
+    )
+    handler.setFormatter(logging.Formatter(
+        '%(asctime)s.%(msecs)03d %(levelname)-7s %(name)s: %(message)s', '%Y-%m-%d %H:%M:%S'
+    ))
+    records = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, handler)
+    _listener.start()
+    return path
+
+
+def shutdown_trace_log():
+    """Write out queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class Summarizer:
+    """
+    Rate limiter for high-rate messages.
+
+    add() counts an event of a source and keeps its latest text; at most
+    once per `interval` seconds per source it returns a summary such as
+    "ROTATION: 20 ticks, last t=1.00s ...", otherwise None. flush() returns
+    the summary of whatever was counted since the last one.
+    """
+    def __init__(self, interval: float = 1.0, unit: str = 'ticks'):
+        self.interval = interval
+        self.unit = unit
+        self._sources = {}      # source -> [count, last text, last summary time]
+
+    def add(self, source: str, text: str, now: float = None):
+        now = time.monotonic() if now is None else now
+        entry = self._sources.get(source)
+        if entry is None:
+            # The first event of a source is summarised right away
+            entry = self._sources[source] = [0, None, now - self.interval]
+        entry[0] += 1
+        entry[1] = text
+        if now - entry[2] >= self.interval:
+            entry[2] = now
+            return self._summary(source, entry)
+        return None
+
+    def flush(self, source: str):
+        entry = self._sources.pop(source, None)
+        if entry is None or not entry[0]:
+            return None
+        return self._summary(source, entry)
+
+    def _summary(self, source, entry):
+        count, text = entry[0], entry[1]
+        entry[0] = 0
+        return f"{source}: {count} {self.unit}, last {text}"
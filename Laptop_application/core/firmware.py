@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Sketch sources that take part in the build hash
+SOURCE_EXTENSIONS = ('.ino', '.cpp', '.c', '.h', '.hpp', '.S')
+
+STATE_NAME = 'flashed.json'
+
+
+def _app_path(path: str) -> str:
+    # Relative paths are relative to the application directory
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    return path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def sketch_digest(sketch: str, fqbn: str) -> str:
+    """
+    SHA-256 over the board FQBN and every source file of the sketch
+    (a single file or a sketch directory), in a stable order.
+    """
+    h = hashlib.sha256(fqbn.encode())
+    if os.path.isdir(sketch):
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(sketch)
+            for name in names if name.endswith(SOURCE_EXTENSIONS)
+        )
+    else:
+        files = [sketch]
+    for path in files:
+        h.update(os.path.relpath(path, os.path.dirname(sketch)).encode())
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class FirmwareDeployer(QObject):
+    """
+    Compiles and uploads the Opta sketch only when something changed.
+
+    The build output for each (sketch sources, FQBN) hash is kept under
+    cache_dir/builds/<hash>, and cache_dir/flashed.json records which hash
+    was last uploaded to which port. A launch with an unchanged sketch on a
+    known port returns before pyduinocli (and arduino-cli's slow board
+    discovery) is even touched.
+    """
+    # Status of a deploy_async() run, queued to the deployer's thread
+    finished = pyqtSignal(str)
+
+    def __init__(self, sketch: str, port: str, cache_dir: str,
+                 cli_path: str = 'arduino-cli'):
+        super().__init__()
+        self.sketch = _app_path(sketch)
+        self.port = port
+        self.cache_dir = _app_path(cache_dir)
+        self.cli_path = cli_path
+        self.state_path = os.path.join(self.cache_dir, STATE_NAME)
+        self.status = None
+        self._thread = None
+
+    # --- Flash record ------------------------------------------------------
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def flashed(self, port: str = None) -> dict:
+        """Record of the last upload to port: fqbn, digest, uploaded_at."""
+        return self._load_state().get(port or self.port)
+
+    # --- Deployment ----------------------------------------------------------
+    def _find_board(self, arduino):
+        boards = arduino.board.list().get('result', [])
+        if not boards:
+            return None, None
+        # Find board matching our serial port, or use first
+        board = next(
+            (b for b in boards
+             if b.get('port', {}).get('address') == self.port),
+            boards[0]
+        )
+        port = board.get('port', {}).get('address')
+        fqbn = board.get('matching_boards', [{}])[0].get('fqbn')
+        return port, fqbn
+
+    def build_dir(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, 'builds', digest[:16])
+
+    def deploy(self, force: bool = False) -> str:
+        """
+        Upload the sketch unless the port already runs this exact build.
+
+        Returns:
+            str: 'up-to-date', 'uploaded', 'no-board' or 'unavailable'
+            (pyduinocli not installed). Compile/upload errors are raised.
+        """
+        record = self.flashed()
+        if not force and record:
+            if record['digest'] == sketch_digest(self.sketch, record['fqbn']):
+                print(f"[Pyduinocli] Sketch unchanged on {self.port}, skipping upload")
+                return 'up-to-date'
+
+        try:
+            import pyduinocli
+        except ImportError:
+            print("[Pyduinocli] pyduinocli not installed, skipping upload")
+            return 'unavailable'
+        arduino = pyduinocli.Arduino(self.cli_path)
+        port, fqbn = self._find_board(arduino)
+        if port is None or fqbn is None:
+            print("[Pyduinocli] No Arduino boards detected for upload")
+            return 'no-board'
+
+        digest = sketch_digest(self.sketch, fqbn)
+        state = self._load_state()
+        if not force and state.get(port, {}).get('digest') == digest:
+            print(f"[Pyduinocli] Sketch unchanged on {port}, skipping upload")
+            return 'up-to-date'
+
+        build_dir = self.build_dir(digest)
+        marker = os.path.join(build_dir, 'build.json')
+        if not os.path.exists(marker):
+            print(f"[Pyduinocli] Compiling '{self.sketch}' (FQBN={fqbn})")
+            os.makedirs(build_dir, exist_ok=True)
+            arduino.compile(
+                self.sketch, fqbn=fqbn, output_dir=build_dir,
+                build_cache_path=os.path.join(self.cache_dir, 'core')
+            )
+            with open(marker, 'w') as f:
+                json.dump({'fqbn': fqbn, 'digest': digest}, f)
+        else:
+            print(f"[Pyduinocli] Using cached build {digest[:16]}")
+
+        print(f"[Pyduinocli] Uploading sketch to {port} (FQBN={fqbn})")
+        arduino.upload(fqbn=fqbn, input_dir=build_dir, port=port)
+        state[port] = {
+            'fqbn': fqbn,
+            'digest': digest,
+            'uploaded_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._save_state(state)
+        print("[Pyduinocli] Sketch uploaded successfully")
+        return 'uploaded'
+
+    def deploy_async(self, on_done=None, force: bool = False):
+        """
+        Run deploy() on a background thread, then emit `finished` with the
+        status, or 'failed' after an error. on_done(status), if given, is
+        connected to it, so it runs on the thread that created the deployer
+        (from its Qt event loop), never on the deploy thread.
+        """
+        if on_done:
+            self.finished.connect(on_done)
+
+        def run():
+            try:
+                self.status = self.deploy(force)
+            except Exception as e:
+                print(f"[Pyduinocli] Sketch upload failed: {e}")
+                self.status = 'failed'
+            self.finished.emit(self.status)
+
+        self._thread = threading.Thread(target=run, name="FirmwareDeploy", daemon=True)
+        self._thread.start()
+        return self._thread
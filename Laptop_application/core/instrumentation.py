@@ -0,0 +1,137 @@
+import time
+from bisect import bisect_right
+
+import numpy as np
+
+# Histogram bucket edges in seconds
+PERIOD_ERROR_EDGES = [-0.01, -0.005, -0.002, -0.001, -0.0005,
+                      0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05]
+DURATION_EDGES     = [0.0001, 0.0005, 0.001, 0.002, 0.005,
+                      0.01, 0.02, 0.05, 0.1]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram; add() is a bisect plus an integer increment.
+    """
+    def __init__(self, edges):
+        self.edges = list(edges)
+        self.counts = [0] * (len(self.edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = float('-inf')
+
+    def add(self, value: float):
+        self.counts[bisect_right(self.edges, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def to_dict(self) -> dict:
+        return {
+            'edges': self.edges,
+            'counts': list(self.counts),
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+        }
+
+
+class TickInstrumentation:
+    """
+    Cheap per-tick timing recorder for Controller.
+
+    Tick start times go into a preallocated ring; period error (actual minus
+    expected tick spacing), handler duration and data_updated emission time
+    are bucketed per state. Call restart() whenever the timer is (re)started
+    so the idle gap is not counted as period error.
+    """
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity)
+        self.reset()
+
+    def reset(self):
+        self.timestamps[:] = 0.0
+        self._index = 0
+        self.ticks = 0
+        self.pid_skipped = 0
+        self.period_error = {}
+        self.handler_duration = {}
+        self.emit_duration = {}
+        self._last_start = None
+
+    def restart(self):
+        self._last_start = None
+
+    def tick_started(self, key: str, expected_period: float) -> float:
+        now = time.perf_counter()
+        self.timestamps[self._index] = now
+        self._index = (self._index + 1) % self.capacity
+        self.ticks += 1
+        if self._last_start is not None:
+            hist = self.period_error.get(key)
+            if hist is None:
+                hist = self.period_error[key] = Histogram(PERIOD_ERROR_EDGES)
+            hist.add(now - self._last_start - expected_period)
+        self._last_start = now
+        return now
+
+    def handler_done(self, key: str, start: float):
+        hist = self.handler_duration.get(key)
+        if hist is None:
+            hist = self.handler_duration[key] = Histogram(DURATION_EDGES)
+        hist.add(time.perf_counter() - start)
+
+    def emit_done(self, key: str, start: float):
+        hist = self.emit_duration.get(key)
+        if hist is None:
+            hist = self.emit_duration[key] = Histogram(DURATION_EDGES)
+        hist.add(time.perf_counter() - start)
+
+    def tick_rate(self) -> float:
+        """Achieved tick rate (Hz) over the recorded window."""
+        n = min(self.ticks, self.capacity)
+        if n < 2:
+            return 0.0
+        last = self.timestamps[(self._index - 1) % self.capacity]
+        first = self.timestamps[(self._index - n) % self.capacity]
+        return (n - 1) / (last - first) if last > first else 0.0
+
+    def snapshot(self) -> dict:
+        # Called from the GUI thread while the control thread may add keys;
+        # list() copies the items in one step under the GIL
+        return {
+            'ticks': self.ticks,
+            'tick_rate': self.tick_rate(),
+            'pid_skipped': self.pid_skipped,
+            'period_error': {k: h.to_dict() for k, h in list(self.period_error.items())},
+            'handler_duration': {k: h.to_dict() for k, h in list(self.handler_duration.items())},
+            'emit_duration': {k: h.to_dict() for k, h in list(self.emit_duration.items())},
+        }
+
+
+def format_snapshot(snap: dict) -> str:
+    """Render a snapshot (optionally with executor stats merged in) as text."""
+    lines = [
+        f"ticks={snap['ticks']}  rate={snap['tick_rate']:.2f} Hz  "
+        f"pid_skipped={snap['pid_skipped']}"
+    ]
+    if 'executor' in snap and snap['executor']:
+        ex = snap['executor']
+        lines.append(
+            f"executor: missed={ex['missed_deadlines']}  "
+            f"latency mean={ex['latency_mean'] * 1e3:.3f} ms  "
+            f"max={ex['latency_max'] * 1e3:.3f} ms"
+        )
+    for title, section in (('period error', 'period_error'),
+                           ('handler', 'handler_duration'),
+                           ('emit', 'emit_duration')):
+        for key, hist in sorted(snap[section].items()):
+            lines.append(
+                f"{title:>12} {key:<12} n={hist['count']:<7} "
+                f"mean={hist['mean'] * 1e3:8.3f} ms  max={hist['max'] * 1e3:8.3f} ms  "
+                f"buckets={hist['counts']}"
+            )
+    return "\n".join(lines)
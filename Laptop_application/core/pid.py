@@ -1,3 +1,5 @@
+import bisect
+import math
 import time
 
 class PID:
@@ -24,7 +26,7 @@ class PID:
         self.min_output, self.max_output = output_limits
 
         self._last_time = None
-        self._last_error = 0.0
+        self._last_error = None
         self._integral = 0.0
 
     def reset(self):
@@ -32,9 +34,22 @@ class PID:
         Resets the PID internals (integral term and last error/time).
         """
         self._last_time = None
-        self._last_error = 0.0
+        self._last_error = None
         self._integral = 0.0
 
+    def snapshot(self) -> dict:
+        """Integral and last error, for session checkpoints."""
+        return {'integral': self._integral, 'last_error': self._last_error}
+
+    def restore(self, state: dict):
+        """
+        Continue from a snapshot(); the first update after it only
+        re-anchors the time, like the first update after reset().
+        """
+        self.reset()
+        self._integral = state.get('integral', 0.0)
+        self._last_error = state.get('last_error')
+
     def update(self, measurement: float, current_time: float = None) -> float:
         """
         Calculate PID output value for given measurement.
@@ -52,11 +67,12 @@ class PID:
         # Initialize last_time on first call
         if self._last_time is None:
             self._last_time = current_time
-            self._last_error = self.setpoint - measurement
+            if self._last_error is None:
+                self._last_error = self.setpoint - measurement
 
-        # Compute time difference
+        # Compute time difference (tolerate rounding of exactly periodic ticks)
         dt = current_time - self._last_time
-        if dt < self.sample_time:
+        if dt < self.sample_time - 1e-9:
             # Not enough time has passed
             return None
 
@@ -87,4 +103,209 @@ class PID:
         self._last_time = current_time
         self._last_error = error
 
-        return output
\ No newline at end of file
+        return output
+
+class GainSchedule:
+    """
+    Gains interpolated linearly over a scheduling variable (the trajectory
+    angle in degrees for the rotation loop), held constant beyond the ends.
+
+    Args:
+        points: (position, kp, ki, kd) tuples.
+    """
+    def __init__(self, points):
+        points = sorted(points)
+        if not points:
+            raise ValueError("Gain schedule needs at least one point")
+        self.positions = [p[0] for p in points]
+        self.gains = [tuple(p[1:4]) for p in points]
+
+    @classmethod
+    def parse(cls, text: str):
+        """Build from "pos:kp,ki,kd;pos:kp,ki,kd" (None for an empty string)."""
+        points = []
+        for entry in filter(None, (s.strip() for s in text.split(';'))):
+            pos, _, gains = entry.partition(':')
+            kp, ki, kd = (float(g) for g in gains.split(','))
+            points.append((float(pos), kp, ki, kd))
+        return cls(points) if points else None
+
+    def __call__(self, position: float) -> tuple:
+        positions, gains = self.positions, self.gains
+        i = bisect.bisect_right(positions, position)
+        if i == 0:
+            return gains[0]
+        if i == len(positions):
+            return gains[-1]
+        x0, x1 = positions[i - 1], positions[i]
+        f = (position - x0) / (x1 - x0)
+        return tuple(a + (b - a) * f for a, b in zip(gains[i - 1], gains[i]))
+
+
+class AdvancedPID:
+    """
+    Two-degree-of-freedom PID with anti-windup, a drop-in for PID.
+
+    The output is
+
+        kp * (b * setpoint - y) + I + D + feedforward
+
+    where D is kd * d/dt (c * setpoint - y) through a first-order filter
+    with time constant derivative_tau (c = 0 keeps setpoint steps out of
+    the derivative). I is accumulated as ki * error * dt, so gain changes
+    from the schedule do not bump the output. Anti-windup:
+
+        'back_calculation'  I is pulled back by (saturated - raw) / tracking_time
+        'conditional'       I only integrates while the output is unsaturated
+                            or the error drives it out of saturation
+
+    In fixed-step mode every update is exactly sample_time apart (or the
+    number of scheduler ticks since the last update times sample_time when
+    `tick` is given) instead of being gated by wall-clock time, so a run
+    replays identically regardless of wake-up jitter.
+
+    Attributes:
+        feedforward (float): Added to the output on the next update
+        position (float): Scheduling variable for the gain schedule
+    """
+    def __init__(self, kp: float, ki: float, kd: float,
+                 setpoint: float = 0.0,
+                 sample_time: float = 0.1,
+                 output_limits: tuple = (None, None),
+                 setpoint_weight: float = 1.0,
+                 derivative_weight: float = 0.0,
+                 derivative_tau: float = 0.0,
+                 anti_windup: str = 'back_calculation',
+                 tracking_time: float = None,
+                 fixed_step: bool = False,
+                 schedule: GainSchedule = None):
+        if anti_windup not in ('back_calculation', 'conditional'):
+            raise ValueError(f"Unknown anti-windup method: {anti_windup}")
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.setpoint = setpoint
+        self.sample_time = sample_time
+        self.min_output, self.max_output = output_limits
+        self.setpoint_weight = setpoint_weight
+        self.derivative_weight = derivative_weight
+        self.derivative_tau = derivative_tau
+        self.anti_windup = anti_windup
+        self.tracking_time = tracking_time
+        self.fixed_step = fixed_step
+        self.schedule = schedule
+
+        self.feedforward = 0.0
+        self.position = 0.0
+        self.reset()
+
+    def reset(self):
+        """
+        Resets the integral and derivative state and the last time/tick.
+        """
+        self._last_time = None
+        self._last_tick = None
+        self._last_d_input = None
+        self._integral = 0.0
+        self._derivative = 0.0
+
+    def snapshot(self) -> dict:
+        """Integral and derivative state, for session checkpoints."""
+        return {'integral': self._integral, 'derivative': self._derivative,
+                'last_d_input': self._last_d_input}
+
+    def restore(self, state: dict):
+        """Continue from a snapshot(); the time/tick re-anchors on the next update."""
+        self.reset()
+        self._integral = state.get('integral', 0.0)
+        self._derivative = state.get('derivative', 0.0)
+        self._last_d_input = state.get('last_d_input')
+
+    def _tracking_time(self, kp: float, ki: float, kd: float) -> float:
+        if self.tracking_time:
+            return self.tracking_time
+        # Rule of thumb Tt = sqrt(Ti * Td), or Ti without derivative action
+        if kp and ki:
+            ti = kp / ki
+            return math.sqrt(ti * kd / kp) if kd else ti
+        return self.sample_time
+
+    def _step(self, current_time, tick):
+        """Seconds since the last update, or None if it is not due yet."""
+        if self.fixed_step:
+            if tick is None:
+                return self.sample_time
+            last, self._last_tick = self._last_tick, tick
+            if last is None:
+                return self.sample_time
+            if tick <= last:
+                self._last_tick = last
+                return None
+            return (tick - last) * self.sample_time
+
+        if current_time is None:
+            current_time = time.time()
+        if self._last_time is None:
+            self._last_time = current_time
+            return self.sample_time
+        dt = current_time - self._last_time
+        if dt < self.sample_time - 1e-9:
+            return None
+        self._last_time = current_time
+        return dt
+
+    def update(self, measurement: float, current_time: float = None,
+               tick: int = None) -> float:
+        """
+        Calculate the output for the given measurement.
+
+        Args:
+            measurement (float): The current measured value.
+            current_time (float): The current time in seconds (defaults to
+                time.time(); ignored in fixed-step mode).
+            tick (int): Scheduler tick count (fixed-step mode only).
+
+        Returns:
+            float: Control output, or None if no update is due.
+        """
+        dt = self._step(current_time, tick)
+        if dt is None:
+            return None
+
+        if self.schedule is not None:
+            kp, ki, kd = self.schedule(self.position)
+        else:
+            kp, ki, kd = self.kp, self.ki, self.kd
+        setpoint = self.setpoint
+        error = setpoint - measurement
+
+        p = kp * (self.setpoint_weight * setpoint - measurement)
+
+        # Filtered derivative (backward Euler of kd*s / (tau*s + 1))
+        d_input = self.derivative_weight * setpoint - measurement
+        if self._last_d_input is not None and kd:
+            tau = self.derivative_tau
+            self._derivative = (tau * self._derivative
+                                + kd * (d_input - self._last_d_input)) / (tau + dt)
+        else:
+            self._derivative = 0.0
+        self._last_d_input = d_input
+
+        raw = p + self._integral + self._derivative + self.feedforward
+        output = raw
+        if (self.min_output is not None) and (output < self.min_output):
+            output = self.min_output
+        if (self.max_output is not None) and (output > self.max_output):
+            output = self.max_output
+
+        # Integrate for the next update
+        if not ki:
+            return output
+        if self.anti_windup == 'back_calculation':
+            self._integral += ki * error * dt
+            if output != raw:
+                self._integral += (output - raw) * dt / self._tracking_time(kp, ki, kd)
+        elif output == raw or (raw > output) == (error < 0):
+            self._integral += ki * error * dt
+
+        return output
@@ -0,0 +1,249 @@
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import config
+from core import trajectory
+from core.trajectory import RigGeometry
+from sim.plant import WinchPlant
+
+# Same tolerance PID.update uses when comparing dt with sample_time
+_DT_TOLERANCE = 1e-9
+
+
+def _as_gains(kp, ki, kd):
+    kp, ki, kd = np.broadcast_arrays(np.atleast_1d(np.asarray(kp, dtype=float)),
+                                     np.atleast_1d(np.asarray(ki, dtype=float)),
+                                     np.atleast_1d(np.asarray(kd, dtype=float)))
+    return kp[:, None], ki[:, None], kd[:, None]
+
+
+def _clamp(output, output_limits):
+    lo, hi = output_limits
+    if lo is not None:
+        output = np.where(output < lo, lo, output)
+    if hi is not None:
+        output = np.where(output > hi, hi, output)
+    return output
+
+
+def accepted_updates(times, sample_time: float) -> np.ndarray:
+    """
+    Indices at which a streaming PID fed these times returns an output.
+
+    The first call only initialises the PID; later calls are accepted once
+    sample_time has elapsed since the last accepted one.
+    """
+    accepted = []
+    if len(times) == 0:
+        return np.empty(0, dtype=np.intp)
+    last = times[0]
+    threshold = sample_time - _DT_TOLERANCE
+    for i, t in enumerate(np.asarray(times, dtype=float).tolist()):
+        if t - last >= threshold and i > 0:
+            accepted.append(i)
+            last = t
+    return np.asarray(accepted, dtype=np.intp)
+
+
+def replay(times, setpoints, measurements, kp, ki, kd,
+           sample_time: float = 0.1, output_limits: tuple = (None, None)):
+    """
+    Run core.pid.PID over a recorded sequence for one or many gain sets at once.
+
+    Produces the same values as calling PID.update(measurement, current_time)
+    sample by sample (with the matching setpoint), including the skipped
+    updates, which are NaN here instead of None.
+
+    Args:
+        times, setpoints, measurements: 1-D arrays of equal length.
+        kp, ki, kd: Scalars or 1-D arrays of gains (broadcast together).
+        sample_time (float): PID sample_time.
+        output_limits (tuple): (min, max) output clamp.
+
+    Returns:
+        ndarray: Outputs with shape (n_gain_sets, n_samples).
+    """
+    times = np.asarray(times, dtype=float)
+    error = np.asarray(setpoints, dtype=float) - np.asarray(measurements, dtype=float)
+    kp, ki, kd = _as_gains(kp, ki, kd)
+
+    idx = accepted_updates(times, sample_time)
+    prev = np.concatenate(([0], idx[:-1]))
+    dt = times[idx] - times[prev]
+    e = error[idx]
+    integral = np.cumsum(e * dt)
+    derivative = (e - error[prev]) / dt
+
+    out = np.full((kp.shape[0], len(times)), np.nan)
+    out[:, idx] = _clamp(kp * e + ki * integral + kd * derivative, output_limits)
+    return out
+
+
+def simulate(kp, ki, kd, traj, plant: WinchPlant = None,
+             output_limits: tuple = (None, None)) -> dict:
+    """
+    Closed-loop simulation of the rotation controller against a WinchPlant,
+    vectorized over gain sets.
+
+    Tick k reads the cable length, runs the PID with setpoint
+    traj.setpoints[k] at time traj.times[k] and drives the plant one tick
+    with the output; the first, initialising, tick produces no output. The
+    PID arithmetic follows PID.update operation for operation, so each row
+    equals a streaming run with the same gains.
+
+    Returns:
+        dict: 'measurement' and 'output' arrays (n_gain_sets, n_ticks) and
+        the per-gain-set metrics from response_metrics().
+    """
+    kp, ki, kd = _as_gains(kp, ki, kd)
+    n_sets = kp.shape[0]
+    times = np.asarray(traj.times, dtype=float)
+    setpoints = np.asarray(traj.setpoints, dtype=float)
+    n = len(times)
+    if plant is None:
+        plant = WinchPlant()
+    plant = WinchPlant(length=np.full(n_sets, setpoints[0]),
+                       gain=plant.gain, tau=plant.tau)
+
+    measurement = np.empty((n_sets, n))
+    output = np.zeros((n_sets, n))
+    integral = np.zeros(n_sets)
+    last_error = setpoints[0] - plant.length
+    threshold = (times[1] - times[0] if n > 1 else 0.0) - _DT_TOLERANCE
+    last_time = times[0]
+
+    for k in range(n):
+        y = plant.length
+        measurement[:, k] = y
+        dt = times[k] - last_time
+        if k == 0 or dt < threshold:
+            continue
+        error = setpoints[k] - y
+        p = kp[:, 0] * error
+        integral = integral + error * dt
+        i = ki[:, 0] * integral
+        d = kd[:, 0] * ((error - last_error) / dt)
+        u = _clamp(p + i + d, output_limits)
+        output[:, k] = u
+        last_time = times[k]
+        last_error = error
+        plant.step(u, dt)
+
+    result = {'measurement': measurement, 'output': output}
+    result.update(response_metrics(times, setpoints, measurement))
+    return result
+
+
+def response_metrics(times, setpoints, measurement, settle_band: float = 0.02) -> dict:
+    """
+    Tracking metrics per row of measurement.
+
+    Returns:
+        dict of 1-D arrays:
+            overshoot (%): largest excursion past the setpoint in the direction
+                of travel, relative to the total travel
+            settling_time (s): time after which |error| stays within
+                settle_band * travel (inf if it never settles)
+            iae, ise: integral of |error| and error**2 over time
+    """
+    times = np.asarray(times, dtype=float)
+    setpoints = np.asarray(setpoints, dtype=float)
+    measurement = np.atleast_2d(measurement)
+    error = setpoints - measurement
+    dt = np.diff(times, prepend=times[0])
+
+    travel = setpoints[-1] - setpoints[0]
+    scale = abs(travel) if travel else max(abs(setpoints).max(), 1.0)
+    direction = 1.0 if travel >= 0 else -1.0
+    overshoot = np.maximum((-direction * error).max(axis=1), 0.0) / scale * 100.0
+
+    outside = np.abs(error) > settle_band * scale
+    # Index of the last sample outside the band (-1 when always inside)
+    last_out = np.where(outside.any(axis=1),
+                        outside.shape[1] - 1 - np.argmax(outside[:, ::-1], axis=1), -1)
+    settled = last_out < outside.shape[1] - 1
+    settle_idx = np.minimum(last_out + 1, len(times) - 1)
+    settling_time = np.where(settled, times[settle_idx] - times[0], np.inf)
+
+    return {
+        'overshoot': overshoot,
+        'settling_time': settling_time,
+        'iae': (np.abs(error) * dt).sum(axis=1),
+        'ise': (error**2 * dt).sum(axis=1),
+    }
+
+
+def _simulate_chunk(args):
+    gains, traj_params, plant_params, output_limits = args
+    traj = trajectory.generate(*traj_params)
+    result = simulate(gains[:, 0], gains[:, 1], gains[:, 2], traj,
+                      WinchPlant(**plant_params), output_limits)
+    return {k: result[k] for k in ('overshoot', 'settling_time', 'iae', 'ise')}
+
+
+def sweep(gains, traj_params: tuple, plant_params: dict = None,
+          output_limits: tuple = (None, None), workers: int = None,
+          chunk_size: int = 256) -> dict:
+    """
+    Evaluate many (kp, ki, kd) gain sets, split across a process pool.
+
+    Args:
+        gains: (n, 3) array-like of gain sets.
+        traj_params (tuple): Arguments for core.trajectory.generate().
+        plant_params (dict): WinchPlant keyword arguments (gain, tau).
+        output_limits (tuple): (min, max) output clamp.
+        workers (int): Process count (None: os.cpu_count(), 1: in-process).
+        chunk_size (int): Gain sets per task.
+
+    Returns:
+        dict: 'gains' plus overshoot, settling_time, iae and ise arrays.
+    """
+    gains = np.asarray(gains, dtype=float).reshape(-1, 3)
+    plant_params = plant_params or {}
+    tasks = [(gains[i:i + chunk_size], tuple(traj_params), plant_params, output_limits)
+             for i in range(0, len(gains), chunk_size)]
+    if workers == 1 or len(tasks) <= 1:
+        parts = [_simulate_chunk(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_chunk, tasks))
+    result = {'gains': gains}
+    for key in ('overshoot', 'settling_time', 'iae', 'ise'):
+        result[key] = np.concatenate([p[key] for p in parts]) if parts else np.empty(0)
+    return result
+
+
+def _floats(text: str):
+    return [float(v) for v in text.split(',')]
+
+
+def main(argv=None):
+    """Grid-sweep PID gains on the configured rotation trajectory."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--kp', type=_floats, default=[config.PID_KP])
+    parser.add_argument('--ki', type=_floats, default=[config.PID_KI])
+    parser.add_argument('--kd', type=_floats, default=[config.PID_KD])
+    parser.add_argument('--tau', type=float, default=0.2, help="winch time constant (s)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    gains = list(itertools.product(args.kp, args.ki, args.kd))
+    traj_params = (config.ROTATION_DEG, config.ROTATION_TIME, config.CONTROL_FREQUENCY,
+                   config.ROTATION_PROFILE, RigGeometry(config.RIG_OFFSET, config.RIG_RADIUS))
+    result = sweep(gains, traj_params, {'tau': args.tau},
+                   (config.MIN_SPEED, config.MAX_SPEED), workers=args.workers)
+    order = np.argsort(result['iae'])[:args.top]
+    print(f"{'kp':>8} {'ki':>8} {'kd':>8} {'IAE':>10} {'ISE':>12} {'OS %':>7} {'Ts s':>7}")
+    for i in order:
+        kp, ki, kd = result['gains'][i]
+        print(f"{kp:8.3f} {ki:8.3f} {kd:8.3f} {result['iae'][i]:10.3f} "
+              f"{result['ise'][i]:12.3f} {result['overshoot'][i]:7.2f} "
+              f"{result['settling_time'][i]:7.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+import threading
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from comm.opta_protocol import CMD_SET_RATE
+from core.channels import channel_names, new_samples
+
+
+def lowpass_fir(numtaps: int, cutoff: float) -> np.ndarray:
+    """
+    Hamming-windowed sinc low-pass with unity DC gain.
+
+    Args:
+        numtaps (int): Filter length (odd for a symmetric, linear-phase filter).
+        cutoff (float): Cut-off as a fraction of the Nyquist frequency.
+    """
+    n = np.arange(numtaps) - (numtaps - 1) / 2
+    h = cutoff * np.sinc(cutoff * n) * np.hamming(numtaps)
+    return h / h.sum()
+
+
+def decimation_factor(in_rate: float, out_rate: float) -> int:
+    factor = max(1, int(round(in_rate / out_rate)))
+    if abs(in_rate / factor - out_rate) > 1e-6 * out_rate:
+        print(f"[Pipeline] {in_rate:g} Hz is not a multiple of {out_rate:g} Hz; "
+              f"decimating by {factor} ({in_rate / factor:g} Hz)")
+    return factor
+
+
+class FIRDecimator:
+    """
+    Streaming anti-aliased decimation by an integer factor.
+
+    Blocks of any length go through process(); filter history and the
+    decimation phase carry over between blocks, so the output equals
+    filtering the concatenated stream. Outputs are only computed at the kept
+    positions. The filter delays the signal by (numtaps - 1) / 2 input
+    samples.
+    """
+    def __init__(self, factor: int, channels: int, taps_per_factor: int = 4,
+                 cutoff: float = 0.8):
+        self.factor = factor
+        self.numtaps = taps_per_factor * factor + 1 if factor > 1 else 1
+        self.h = lowpass_fir(self.numtaps, cutoff / factor)[::-1].copy()
+        self._hist = np.full((self.numtaps - 1, channels), np.nan)
+        self._phase = 0
+
+    def reset(self):
+        self._hist[:] = np.nan
+        self._phase = 0
+
+    def process(self, x: np.ndarray):
+        """
+        Args:
+            x: (n, channels) input block; NaN marks channels not measured.
+
+        Returns:
+            (y, idx): (m, channels) decimated values and the indices into x
+            of the input samples they align with.
+        """
+        hist = self._hist
+        if len(hist) and len(x):
+            # A channel that starts being measured would otherwise read NaN
+            # until the history has filled; pad it with its first value
+            start = np.isnan(hist).any(axis=0) & ~np.isnan(x[0])
+            if start.any():
+                hist[:, start] = x[0, start]
+        buf = np.concatenate((hist, x)) if len(hist) else x
+        idx = np.arange(self._phase, len(x), self.factor)
+        if len(idx):
+            windows = sliding_window_view(buf, self.numtaps, axis=0)[idx]
+            y = windows @ self.h
+            self._phase = idx[-1] + self.factor - len(x)
+        else:
+            y = np.empty((0, x.shape[1]))
+            self._phase -= len(x)
+        if len(hist):
+            self._hist = buf[-len(hist):].copy()
+        return y, idx
+
+
+# --- Acquisition sources -----------------------------------------------------
+class PlantSource:
+    """
+    Simulated acquisition: samples the plant model at `rate` Hz in real
+    time, one block per `block` seconds.
+    """
+    def __init__(self, plant, rate: float, block: float = 0.02):
+        self.plant = plant
+        self.rate = rate
+        self.block = max(1, int(round(rate * block)))
+        self._period_ns = int(1e9 / rate)
+        self._origin = None
+        self._index = 0
+
+    def start(self):
+        self._origin = time.monotonic_ns()
+        self._index = 0
+
+    def stop(self):
+        pass
+
+    def read(self, pipeline):
+        due = self._origin + (self._index + self.block) * self._period_ns
+        delay = (due - time.monotonic_ns()) / 1e9
+        if delay > 0:
+            time.sleep(delay)
+        # Everything that became due, at least one block
+        n = max(self.block, (time.monotonic_ns() - self._origin) // self._period_ns - self._index)
+        mono = self._origin + (self._index + 1 + np.arange(n)) * self._period_ns
+        self._index += n
+
+        state = pipeline.state
+        samples = new_samples(n)
+        samples['mono_ns'] = mono
+        samples['state'] = state.value
+        samples['t'] = (mono - pipeline.t0_ns) / 1e9
+        channel = pipeline.state_channels.get(state)
+        if channel is not None:
+            plant = self.plant
+            samples[channel] = [plant.measure(state, t) for t in samples['t'].tolist()]
+        samples['cable_length'] = self.plant.cable_length()
+        return samples
+
+    def drive(self, command: float, dt: float):
+        self.plant.drive(command, dt)
+
+
+class OptaSource:
+    """
+    Acquisition from the Opta through SerialTransport, in either protocol.
+
+    `columns` names the registered channel of each streamed column; 'test'
+    stands for the channel measured in the current test state (dropped when
+    another column already maps to it, or outside tests). Samples carry no
+    timestamps of their own, so they are spaced 1 / rate back from the
+    receive time of their batch.
+    """
+    def __init__(self, transport, rate: float, columns, block: float = 0.02):
+        self.transport = transport
+        self.rate = rate
+        self.columns = list(columns)
+        self.block = block
+        self._period_ns = int(1e9 / rate)
+
+    def start(self):
+        self.transport.send(f"{CMD_SET_RATE} {self.rate:g}", key=CMD_SET_RATE)
+
+    def stop(self):
+        pass
+
+    def _column_map(self, pipeline):
+        test = pipeline.state_channels.get(pipeline.state)
+        mapped = []
+        for i, name in enumerate(self.columns):
+            if name == 'test':
+                if test is None or test in self.columns:
+                    continue
+                name = test
+            mapped.append((i, name))
+        return mapped
+
+    def read(self, pipeline):
+        items = self.transport.get()
+        if not items:
+            time.sleep(self.block / 2)
+            return None
+        stamps, rows = [], []
+        for item in items:
+            recv_ns = int(item[0] * 1e9)
+            if len(item) == 3:
+                values = np.asarray(item[2], dtype=np.float64)
+            else:
+                try:
+                    values = np.array([[float(v) for v in item[1].split(',')]])
+                except ValueError:
+                    continue    # status text, not a sample line
+            n = len(values)
+            stamps.append(recv_ns - (n - 1 - np.arange(n)) * self._period_ns)
+            rows.append(values)
+        if not rows:
+            return None
+        mono = np.concatenate(stamps)
+        state = pipeline.state
+        samples = new_samples(len(mono))
+        samples['mono_ns'] = mono
+        samples['state'] = state.value
+        samples['t'] = (mono - pipeline.t0_ns) / 1e9
+        for i, name in self._column_map(pipeline):
+            samples[name] = np.concatenate([r[:, i] for r in rows if r.shape[1] > i])
+        return samples
+
+    def drive(self, command: float, dt: float):
+        # Only the newest speed command matters
+        self.transport.send(f"SPEED {command:.3f}", key='SPEED')
+
+
+# --- Pipeline ------------------------------------------------------------------
+class Pipeline(QObject):
+    """
+    Multi-rate acquisition pipeline.
+
+    Stages:
+        acquisition  A thread reads blocks of sample records from the source
+                     at acq_rate and hands every record to the run logger,
+                     if one is set (blocking rather than dropping).
+        control      An anti-aliased decimator to control_rate; the control
+                     loop reads the newest value with latest().
+        display      A second decimator to display_rate whose output is
+                     emitted as display_samples batches; the plots redraw at
+                     their own frame rate.
+
+    Attributes:
+        state: Current State, stamped on acquired records; set before start()
+        t0_ns (int): monotonic_ns origin of the records' 't'
+        acquired, logged (int): Record counters
+        publisher: Optional ShmPublisher receiving every acquired record
+
+    The acquisition thread is the only writer of the run log and the
+    publisher, so records reach them in time order. Control-rate outputs
+    (setpoint, command) are stamped on the acquired records with hold().
+    """
+    display_samples = pyqtSignal(object)
+
+    def __init__(self, source, acq_rate: float, control_rate: float,
+                 display_rate: float, state_channels: dict,
+                 taps_per_factor: int = 4, name: str = "Acquisition"):
+        super().__init__()
+        self.source = source
+        self.name = name
+        self.acq_rate = acq_rate
+        self.state_channels = state_channels
+        self.channels = channel_names()
+        self._running = False
+        self._thread = None
+        self.taps_per_factor = taps_per_factor
+        self.set_control_rate(control_rate)
+        self.display = FIRDecimator(
+            decimation_factor(acq_rate, display_rate), len(self.channels), taps_per_factor
+        )
+
+        self.state = None
+        self.t0_ns = time.monotonic_ns()
+        self.acquired = 0
+        self.logged = 0
+        self.publisher = None
+
+        self._logger = None
+        self._log_lock = threading.Lock()
+        self._latest = None
+        self._hold = {}
+
+    # --- Lifecycle -----------------------------------------------------------
+    def start(self):
+        if self._running:
+            return
+        if self.state is None:
+            # Records need a State code the logs can name
+            raise RuntimeError("Pipeline.state must be set before start()")
+        self.control.reset()
+        self.display.reset()
+        self._latest = None
+        self._hold = {}
+        self._running = True
+        self.source.start()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self.source.stop()
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def mark_start(self, t: float = 0.0):
+        """Make 't' of the following records count from `t` seconds now."""
+        self.t0_ns = time.monotonic_ns() - int(t * 1e9)
+
+    def set_logger(self, logger):
+        """Swap the run logger; returns once the acquisition thread has let go of the old one."""
+        with self._log_lock:
+            self._logger = logger
+
+    # --- Control stage interface ----------------------------------------------
+    def set_control_rate(self, rate: float):
+        """Change the control-stage rate; only while stopped."""
+        if self._running:
+            raise RuntimeError("Cannot change the control rate while acquiring")
+        self.control = FIRDecimator(
+            decimation_factor(self.acq_rate, rate), len(self.channels), self.taps_per_factor
+        )
+
+    def latest(self, channel: str):
+        """Newest control-rate value of channel, or None before the first one."""
+        sample = self._latest
+        if sample is None:
+            return None
+        value = float(sample[channel])
+        return None if value != value else value
+
+    def drive(self, command: float, dt: float):
+        self.source.drive(command, dt)
+
+    def hold(self, **values):
+        """
+        Stamp channel values on every record acquired from now on, until
+        the next hold() or start(); the log gets the control outputs at the
+        acquisition rate, held between ticks.
+        """
+        self._hold = values
+
+    # --- Acquisition thread ----------------------------------------------------
+    def _run(self):
+        while self._running:
+            try:
+                samples = self.source.read(self)
+            except Exception as e:
+                print(f"[Pipeline] Acquisition error: {e}")
+                time.sleep(0.1)
+                continue
+            if samples is not None and len(samples):
+                self._process(samples)
+
+    def _process(self, samples):
+        self.acquired += len(samples)
+        # The decimators only see measured channels
+        values = np.column_stack([samples[c] for c in self.channels])
+        for name, value in self._hold.items():
+            samples[name] = value
+        with self._log_lock:
+            if self._logger is not None:
+                self._logger.log(samples, block=True)
+                self.logged += len(samples)
+        if self.publisher is not None:
+            self.publisher.publish(samples)
+
+        control = self._decimate(self.control, samples, values)
+        if len(control):
+            self._latest = control[-1]
+        display = self._decimate(self.display, samples, values)
+        if len(display):
+            self.display_samples.emit(display)
+
+    def _decimate(self, decimator, samples, values):
+        y, idx = decimator.process(values)
+        out = samples[idx]
+        for j, name in enumerate(self.channels):
+            out[name] = y[:, j]
+        # Stamp outputs with the time of the input they are centred on
+        delay = (decimator.numtaps - 1) / 2 / self.acq_rate
+        if delay:
+            out['mono_ns'] -= int(delay * 1e9)
+            out['t'] -= delay
+        return out
@@ -0,0 +1,228 @@
+"""
+Several bevameter rigs in one process.
+
+A profile file lists the rigs and the config.py settings each one
+overrides (JSON, or YAML when PyYAML is installed):
+
+    {
+      "defaults": {"ACQ_SOURCE": "opta", "OPTA_PROTOCOL": "binary"},
+      "rigs": [
+        {"name": "north", "SERIAL_PORT": "/dev/ttyUSB0"},
+        {"name": "south", "SERIAL_PORT": "/dev/ttyUSB1", "PID_KP": 1.2}
+      ]
+    }
+
+Each rig gets its own transport, Controller (control loop and acquisition
+threads) and settings object; the buffered run logs of all rigs share one
+WriterPool. With BACKEND='asyncio' the transports, control loops and log
+writing run on the asyncio loop instead (see core/async_loop.py).
+
+Unless a profile sets them, a rig's logs and session checkpoint go to
+logs/<name>/ and its live data bus (if enabled) is SHM_BUS_<name>.
+"""
+import json
+import os
+import types
+
+import config
+from comm.async_transport import AsyncTransport
+from comm.transport import SerialTransport
+from core.controller import Controller
+from core.data_logger import WriterPool, AsyncLogWriter
+from core.firmware import FirmwareDeployer
+
+
+def default_settings() -> dict:
+    """The settings defined in config.py (upper-case names)."""
+    return {k: v for k, v in vars(config).items() if k.isupper()}
+
+
+def make_settings(overrides: dict = None, base: dict = None) -> types.SimpleNamespace:
+    """
+    A settings object with the config.py names, overridden per rig.
+
+    Override values are converted to the type of the default, so profiles
+    may give numbers as strings like the environment does.
+    """
+    settings = dict(default_settings() if base is None else base)
+    for name, value in (overrides or {}).items():
+        if name not in settings:
+            raise ValueError(f"Unknown setting: {name}")
+        default = settings[name]
+        if isinstance(default, bool):
+            if isinstance(value, str):
+                value = value.lower() in ('1', 'true', 'yes', 'on')
+            value = bool(value)
+        elif isinstance(default, (int, float, str)) and value is not None:
+            value = type(default)(value)
+        settings[name] = value
+    return types.SimpleNamespace(**settings)
+
+
+def load_profiles(path: str) -> list:
+    """
+    Read a rig profile file.
+
+    Returns:
+        list: (name, settings) per rig, in file order.
+    """
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML profiles need PyYAML (pip install pyyaml)")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    rigs = data.get('rigs') if isinstance(data, dict) else None
+    if not rigs:
+        raise ValueError("Profile file needs a non-empty 'rigs' list")
+    defaults = default_settings()
+    common = data.get('defaults', {})
+    profiles, names = [], set()
+    for i, rig in enumerate(rigs):
+        rig = dict(rig)
+        name = str(rig.pop('name', f"rig{i + 1}"))
+        if name in names:
+            raise ValueError(f"Duplicate rig name: {name}")
+        names.add(name)
+        overrides = {**common, **rig}
+        # Keep the rigs' files and shared-memory segments apart
+        overrides.setdefault('LOG_DIRECTORY', os.path.join(
+            defaults['LOG_DIRECTORY'] or 'logs', name))
+        if defaults['CHECKPOINT_FILE'] and 'CHECKPOINT_FILE' not in overrides:
+            overrides['CHECKPOINT_FILE'] = os.path.join(
+                overrides['LOG_DIRECTORY'], os.path.basename(defaults['CHECKPOINT_FILE']))
+        bus = overrides.get('SHM_BUS', defaults['SHM_BUS'])
+        if bus and 'SHM_BUS' not in rig:
+            overrides['SHM_BUS'] = f"{bus}_{name}"
+        try:
+            profiles.append((name, make_settings(overrides, defaults)))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Rig {name}: {e}")
+    return profiles
+
+
+def make_transport(settings):
+    """The supervised Opta transport configured by a rig's settings."""
+    options = dict(
+        mode=settings.OPTA_PROTOCOL,
+        channels=settings.OPTA_CHANNELS,
+        queue_size=settings.TRANSPORT_QUEUE_SIZE,
+        drop_policy=settings.TRANSPORT_DROP_POLICY,
+        backoff_max=settings.RECONNECT_BACKOFF_MAX
+    )
+    if settings.BACKEND == 'asyncio':
+        if settings.CONNECTION_TYPE == 'tcp':
+            return AsyncTransport(host=settings.TCP_HOST, tcp_port=settings.TCP_PORT, **options)
+        return AsyncTransport(port=settings.SERIAL_PORT, baudrate=settings.BAUD_RATE, **options)
+    if settings.CONNECTION_TYPE == 'tcp':
+        raise ValueError("CONNECTION_TYPE='tcp' needs BACKEND='asyncio'")
+    return SerialTransport(port=settings.SERIAL_PORT, baudrate=settings.BAUD_RATE, **options)
+
+
+def make_writer_pool(settings=config, writer_threads: int = None):
+    """The shared log writer for the configured backend."""
+    if settings.BACKEND == 'asyncio':
+        return AsyncLogWriter()
+    if writer_threads is None:
+        writer_threads = settings.LOG_WRITER_THREADS
+    return WriterPool(writer_threads)
+
+
+class Rig:
+    """One rig's settings (config.py or a make_settings() copy), transport and Controller."""
+    def __init__(self, name: str, settings, writer_pool: WriterPool = None,
+                 interval: int = 100, transport=None):
+        self.name = name
+        self.settings = settings
+        self.transport = transport if transport is not None else make_transport(settings)
+        self.controller = Controller(
+            interval=interval, transport=self.transport, settings=settings,
+            name=name, writer_pool=writer_pool
+        )
+        self._deployer = None
+
+    def connect(self, status=None):
+        # The sketch upload needs the port, so the transport opens it afterwards
+        s = self.settings
+        tag = f"[OptaSerialClient {self.name}]" if self.name else "[OptaSerialClient]"
+        if isinstance(self.transport, AsyncTransport):
+            # Connects on the event loop; it reports the connection itself
+            self.transport.start()
+            print(f"{tag} Connecting to {self.transport.address}")
+        elif not self.transport.start():
+            print(f"{tag} Warning: could not connect ({self.transport.last_error}), "
+                  "retrying in background")
+        else:
+            print(f"{tag} Connected on {s.SERIAL_PORT}@{s.BAUD_RATE}")
+
+    def start(self):
+        """Flash the sketch if needed (in the background), then connect."""
+        s = self.settings
+        if s.FIRMWARE_UPLOAD == 'off':
+            self.connect()
+            return
+        # connect() comes back to this thread through the deployer's queued
+        # signal, so the transport is only touched by its owner; keep the
+        # deployer alive until then
+        self._deployer = FirmwareDeployer(
+            s.FIRMWARE_SKETCH, s.SERIAL_PORT, s.FIRMWARE_CACHE_DIR, s.ARDUINO_CLI
+        )
+        self._deployer.deploy_async(self.connect, force=(s.FIRMWARE_UPLOAD == 'force'))
+
+    def shutdown(self):
+        self.controller.shutdown()
+        self.transport.close()
+
+
+class RigManager:
+    """
+    Runs the rigs of a profile list side by side.
+
+    Every rig has its own control loop and acquisition threads, so a slow
+    rig cannot delay another rig's ticks; only the log writing is shared
+    through the WriterPool, off all control threads. With the asyncio
+    backend the control loops share the event loop and the logs an
+    AsyncLogWriter.
+    """
+    def __init__(self, profiles: list, interval: int = 100,
+                 writer_threads: int = None, transports: dict = None):
+        self.writer_pool = make_writer_pool(config, writer_threads)
+        transports = transports or {}
+        self.rigs = [
+            Rig(name, settings, self.writer_pool, interval, transports.get(name))
+            for name, settings in profiles
+        ]
+
+    @classmethod
+    def load(cls, path: str, **kwargs):
+        return cls(load_profiles(path), **kwargs)
+
+    def __iter__(self):
+        return iter(self.rigs)
+
+    def __len__(self):
+        return len(self.rigs)
+
+    def __getitem__(self, name: str) -> Rig:
+        for rig in self.rigs:
+            if rig.name == name:
+                return rig
+        raise KeyError(name)
+
+    def start(self):
+        for rig in self.rigs:
+            rig.start()
+
+    def emergency_stop(self):
+        """Stop every rig (each keeps its run resumable)."""
+        for rig in self.rigs:
+            rig.controller.emergency_stop()
+
+    def shutdown(self):
+        """Stop all rigs, close their logs and transports, then the writer pool."""
+        for rig in self.rigs:
+            rig.shutdown()
+        self.writer_pool.close()
@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import time
+
+
+class ControlLoopExecutor:
+    """
+    Runs a tick callback on a dedicated thread at a fixed period.
+
+    Deadlines are absolute multiples of the period from start() on the
+    time.perf_counter clock, so lateness in one tick does not drift later
+    ones. When a tick overruns one or more whole periods those deadlines
+    are skipped and counted as missed rather than fired back-to-back.
+
+    The interface mirrors the subset of QTimer used by Controller
+    (setInterval, interval, start, stop, isActive), so either can drive it.
+    Signals emitted from the callback reach GUI objects as queued
+    connections because the emitting thread differs from the receiver's.
+    """
+    def __init__(self, callback, interval: int = 100, name: str = "ControlLoop"):
+        self.callback = callback
+        self.name = name
+        self._interval = interval          # milliseconds, may be fractional
+        self._thread = None
+        self._stop_event = None
+        # Scheduled time (perf_counter seconds) of the tick being executed
+        self.deadline = None
+        # Period count since start() of that tick; skipped deadlines count
+        self.tick = None
+        self.reset_stats()
+
+    # --- QTimer-compatible API ---------------------------------------------
+    def setInterval(self, interval: int):
+        self._interval = interval
+
+    def interval(self) -> int:
+        return self._interval
+
+    def isActive(self) -> bool:
+        return self._stop_event is not None and not self._stop_event.is_set()
+
+    def start(self):
+        """Start (or restart) ticking; the first tick fires after one interval."""
+        self.stop()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(self._stop_event, self._interval / 1000.0),
+            name=self.name,
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop ticking. From another thread this waits for a running tick to
+        finish; from inside the callback it returns immediately.
+        """
+        if self._stop_event is not None:
+            self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    # --- Statistics ----------------------------------------------------------
+    def reset_stats(self):
+        self.ticks = 0
+        self.missed = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._latency_sum = 0.0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+
+    def stats(self) -> dict:
+        """
+        Per-tick timing summary; latencies and durations are in seconds.
+        """
+        return {
+            'ticks': self.ticks,
+            'missed_deadlines': self.missed,
+            'period': self._interval / 1000.0,
+            'latency_last': self.last_latency,
+            'latency_mean': self._latency_sum / self.ticks if self.ticks else 0.0,
+            'latency_max': self.max_latency,
+            'duration_last': self.last_duration,
+            'duration_max': self.max_duration,
+        }
+
+    def _record(self, latency: float, duration: float):
+        self.ticks += 1
+        self.last_latency = latency
+        self._latency_sum += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+        self.last_duration = duration
+        if duration > self.max_duration:
+            self.max_duration = duration
+
+    # --- Worker thread ------------------------------------------------------
+    def _run(self, stop_event: threading.Event, period: float):
+        clock = time.perf_counter
+        origin = clock()
+        index = 1
+        deadline = origin + period
+        while True:
+            remaining = deadline - clock()
+            while remaining > 0:
+                if stop_event.wait(remaining):
+                    return
+                remaining = deadline - clock()
+            if stop_event.is_set():
+                return
+
+            start = clock()
+            self.deadline = deadline
+            self.tick = index
+            self.callback()
+            end = clock()
+
+            self._record(start - deadline, end - start)
+
+            index += 1
+            deadline = origin + index * period
+            if end - deadline >= period:
+                # Drop deadlines that passed entirely; the next one fires late
+                skipped = int((end - deadline) // period)
+                self.missed += skipped
+                index += skipped
+                deadline = origin + index * period
+
+
+class AsyncControlLoop(ControlLoopExecutor):
+    """
+    ControlLoopExecutor that runs the ticks as callbacks on an asyncio event
+    loop instead of a thread of its own.
+
+    With the loop bridged into Qt (core.async_loop) the ticks run on the GUI
+    thread, so signals to the GUI are direct calls instead of queued
+    hand-offs. Deadlines are absolute multiples of the period on the loop's
+    clock, and a callback the loop runs early is re-armed, so a tick never
+    starts before its deadline. Deadlines a tick overran entirely are
+    skipped and counted as missed, as in the threaded executor.
+    """
+    def __init__(self, callback, interval: int = 100, name: str = "ControlLoop",
+                 loop=None):
+        super().__init__(callback, interval, name)
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+        self._handle = None
+        self._origin = 0.0
+        self._period = 0.0
+        self._index = 0
+
+    def isActive(self) -> bool:
+        return self._handle is not None
+
+    def start(self):
+        """Start (or restart) ticking; the first tick fires after one interval."""
+        self.stop()
+        self._period = self._interval / 1000.0
+        self._origin = self.loop.time()
+        self._index = 1
+        self._handle = self.loop.call_at(self._origin + self._period, self._fire)
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _fire(self):
+        clock = self.loop.time
+        period = self._period
+        deadline = self._origin + self._index * period
+        start = clock()
+        if start < deadline:
+            # call_at may fire up to the loop's timer resolution early (Qt's
+            # timers under qasync); wait out the rest instead of ticking early
+            self._handle = self.loop.call_at(deadline, self._fire)
+            return
+        handle = self._handle
+        self.deadline = deadline
+        self.tick = self._index
+        self.callback()
+        end = clock()
+        self._record(start - deadline, end - start)
+        if self._handle is not handle:
+            return      # stopped or restarted by the callback
+
+        self._index += 1
+        deadline = self._origin + self._index * period
+        if end - deadline >= period:
+            skipped = int((end - deadline) // period)
+            self.missed += skipped
+            self._index += skipped
+            deadline = self._origin + self._index * period
+        self._handle = self.loop.call_at(deadline, self._fire)
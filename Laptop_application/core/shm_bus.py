@@ -0,0 +1,269 @@
+"""
+Shared-memory live data bus.
+
+The Controller publishes every sample record (see core.channels) into a
+ring buffer in a named multiprocessing.shared_memory segment. Any number of
+local processes (a second dashboard, a notebook, an anomaly detector) can
+tail it with ShmReader, getting NumPy views straight into the segment:
+
+    from core.shm_bus import ShmReader
+    reader = ShmReader('bevameter_live')
+    while True:
+        batch = reader.read()               # view, no copy
+        if batch.lost:
+            print(f"overrun: {batch.lost} records lost")
+        process(batch.records)
+        if not reader.intact(batch):        # lapped while processing
+            ...                             # discard what was derived from it
+
+`python -m core.shm_bus [name]` tails the bus and prints its record rate.
+
+Segment layout: a 64-byte header, the sample dtype as JSON, and from
+DATA_OFFSET on `capacity` records. The writer never waits for readers. It
+bumps `reserved` before overwriting slots and `committed` after writing
+them. Records [committed - capacity, committed) are readable, and a
+reader's records are intact as long as `reserved - capacity` has not
+passed their sequence number.
+"""
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAGIC = b'BVSHMBUS'
+VERSION = 1
+DATA_OFFSET = 4096
+
+HEADER_DTYPE = np.dtype([
+    ('magic',       'S8'),
+    ('version',     '<u4'),
+    ('capacity',    '<u4'),
+    ('record_size', '<u4'),
+    ('desc_len',    '<u4'),
+    ('reserved',    '<u8'),     # records the writer has started to write
+    ('committed',   '<u8'),     # records fully written
+    ('writer_pid',  '<u4'),
+    ('pad',         'V20'),
+])
+assert HEADER_DTYPE.itemsize == 64
+
+Batch = namedtuple('Batch', ['seq', 'records', 'lost'])
+
+
+def _dtype_to_json(dtype: np.dtype) -> bytes:
+    return json.dumps(dtype.descr).encode()
+
+
+def _dtype_from_json(data: bytes) -> np.dtype:
+    return np.dtype([tuple(field) for field in json.loads(data)])
+
+
+def _attach(name: str):
+    # Readers must not unlink the segment when they exit
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:       # Python < 3.13 has no track argument
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class ShmPublisher:
+    """
+    Single-producer ring of sample records in shared memory.
+
+    publish() copies a batch into the ring and never waits for readers.
+    The control loop and the acquisition thread may both publish; a lock
+    keeps them from interleaving.
+
+    Attributes:
+        published (int): Records written since creation
+    """
+    def __init__(self, name: str, dtype: np.dtype, capacity: int = 65536):
+        desc = _dtype_to_json(dtype)
+        if HEADER_DTYPE.itemsize + len(desc) > DATA_OFFSET:
+            raise ValueError("Sample dtype description too large for the bus header")
+        size = DATA_OFFSET + capacity * dtype.itemsize
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a crashed run; readers of it re-attach
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+        self.dtype = dtype
+        self.capacity = capacity
+        self.published = 0
+        self._lock = threading.Lock()
+
+        buf = self.shm.buf
+        self._header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buf)
+        self._header[()] = (MAGIC, VERSION, capacity, dtype.itemsize, len(desc),
+                            0, 0, os.getpid(), b'')
+        buf[HEADER_DTYPE.itemsize:HEADER_DTYPE.itemsize + len(desc)] = desc
+        self._ring = np.ndarray(capacity, dtype=dtype, buffer=buf, offset=DATA_OFFSET)
+
+    def publish(self, samples: np.ndarray):
+        n = len(samples)
+        if not n:
+            return
+        cap = self.capacity
+        if n > cap:
+            # Only the newest capacity records can be kept anyway
+            samples = samples[-cap:]
+        with self._lock:
+            end = self.published + n
+            header = self._header
+            header['reserved'] = end
+            start = (end - len(samples)) % cap
+            first = min(len(samples), cap - start)
+            self._ring[start:start + first] = samples[:first]
+            if first < len(samples):
+                self._ring[:len(samples) - first] = samples[first:]
+            header['committed'] = end
+            self.published = end
+
+    def close(self):
+        """Unmap and remove the segment; attached readers keep their mapping."""
+        self._header = self._ring = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ShmReader:
+    """
+    Tails a ShmPublisher ring from any local process.
+
+    read() returns the records published since the previous call as a
+    view into shared memory (at most up to the ring's wrap point, so one
+    call may return fewer than are available). A reader that falls more than
+    `capacity` records behind skips ahead and reports the skipped count in
+    Batch.lost; the writer is never held up.
+
+    Args:
+        name (str): Segment name given to the publisher.
+        from_start (bool): Start at the oldest record still in the ring
+            instead of only new records.
+    """
+    def __init__(self, name: str, from_start: bool = False):
+        self.shm = _attach(name)
+        buf = self.shm.buf
+        self._header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buf)
+        if bytes(self._header['magic']) != MAGIC:
+            self.shm.close()
+            raise ValueError(f"{name} is not a live data bus segment")
+        if int(self._header['version']) != VERSION:
+            self.shm.close()
+            raise ValueError(f"Unsupported bus version {int(self._header['version'])}")
+        start = HEADER_DTYPE.itemsize
+        desc = bytes(buf[start:start + int(self._header['desc_len'])])
+        self.dtype = _dtype_from_json(desc)
+        self.capacity = int(self._header['capacity'])
+        self._ring = np.ndarray(self.capacity, dtype=self.dtype, buffer=buf, offset=DATA_OFFSET)
+
+        committed = int(self._header['committed'])
+        self.next_seq = max(0, committed - self.capacity) if from_start else committed
+        self.lost = 0
+
+    @property
+    def available(self) -> int:
+        """Records published but not read yet (may exceed capacity)."""
+        return int(self._header['committed']) - self.next_seq
+
+    def read(self, max_records: int = None, copy: bool = False) -> Batch:
+        """
+        Next contiguous batch of records.
+
+        With copy=False the records are a view that the writer overwrites
+        once it laps this reader; check intact() after using it. With
+        copy=True the copy is trimmed to the records that were still intact
+        after copying.
+        """
+        header = self._header
+        committed = int(header['committed'])
+        seq = self.next_seq
+        lost = 0
+        if committed - seq > self.capacity:
+            lost = committed - self.capacity - seq
+            seq = committed - self.capacity
+        n = committed - seq
+        if max_records is not None:
+            n = min(n, max_records)
+        start = seq % self.capacity
+        n = min(n, self.capacity - start)
+        records = self._ring[start:start + n]
+        if copy:
+            records = records.copy()
+            torn = int(header['reserved']) - self.capacity - seq
+            if torn > 0:
+                records = records[torn:]
+                lost += min(torn, n)
+                seq += min(torn, n)
+        self.next_seq = seq + len(records)
+        self.lost += lost
+        return Batch(seq, records, lost)
+
+    def intact(self, batch: Batch) -> bool:
+        """True if the writer has not started overwriting any record of batch."""
+        return int(self._header['reserved']) - self.capacity <= batch.seq
+
+    def wait(self, timeout: float = None, poll: float = 0.001) -> bool:
+        """Sleep-poll until new records are available; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.available <= 0:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    def close(self):
+        self._header = self._ring = None
+        self.shm.close()
+
+
+def main(argv=None):
+    """Tail a live data bus and print the record rate once per second."""
+    import argparse
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('name', nargs='?', default='bevameter_live')
+    args = parser.parse_args(argv)
+
+    reader = ShmReader(args.name)
+    print(f"[ShmReader] {args.name}: {reader.capacity} records of {reader.dtype.itemsize} bytes")
+    count, lost, last = 0, 0, time.monotonic()
+    batch = None
+    try:
+        while True:
+            if not reader.wait(timeout=1.0):
+                print("[ShmReader] no data")
+                continue
+            batch = reader.read()
+            count += len(batch.records)
+            lost += batch.lost
+            now = time.monotonic()
+            if now - last >= 1.0:
+                t = batch.records['t'][-1] if len(batch.records) else float('nan')
+                print(f"[ShmReader] {count / (now - last):8.1f} rec/s  lost={lost}  t={t:.3f}")
+                count, lost, last = 0, 0, now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del batch       # the view pins the mapping
+        reader.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from core.channels import CHANNELS
+
+# Candidate Janosi K values (m), log-spaced; neighbours differ by ~7.5 %
+K_CANDIDATES = np.geomspace(0.001, 0.1, 64)
+
+# Sinkage (m) below which load samples are ignored: in log-log space the
+# first readings near zero sinkage have the most leverage and the least signal
+MIN_SINKAGE = 0.001
+
+# Shear displacement, in units of K, a shear fit needs before it can converge
+MIN_COVERAGE = 3.0
+
+
+class _Moments:
+    """
+    Running count, means and centred second moments of (x, y) pairs.
+
+    Batches are merged with Chan's parallel update, so the cost per sample
+    is O(1) and there is no cancellation from raw power sums.
+    """
+    def __init__(self):
+        self.n = 0
+        self.mx = self.my = 0.0
+        self.cxx = self.cxy = self.cyy = 0.0
+
+    def add(self, x: np.ndarray, y: np.ndarray):
+        m = len(x)
+        if not m:
+            return
+        bx, by = x.mean(), y.mean()
+        dx, dy = x - bx, y - by
+        bxx, bxy, byy = dx @ dx, dx @ dy, dy @ dy
+        n = self.n
+        total = n + m
+        ex, ey = bx - self.mx, by - self.my
+        f = n * m / total
+        self.cxx += bxx + ex * ex * f
+        self.cxy += bxy + ex * ey * f
+        self.cyy += byy + ey * ey * f
+        self.mx += ex * m / total
+        self.my += ey * m / total
+        self.n = total
+
+
+class BekkerFit:
+    """
+    Streaming fit of p = k * z ** n, with k = kc / b + kphi for plate width b.
+
+    Least squares on ln p = ln k + n ln z over running moments: each sample
+    updates the estimate in O(1), and the residual variance gives standard
+    errors. kc and kphi are not separable from one plate; see
+    split_bekker() for combining plates of different widths.
+    """
+    def __init__(self, plate_width: float):
+        self.plate_width = plate_width
+        self._m = _Moments()
+
+    def add(self, sinkage, pressure):
+        z = np.asarray(sinkage, dtype=np.float64)
+        p = np.asarray(pressure, dtype=np.float64)
+        ok = (z >= MIN_SINKAGE) & (p > 0)
+        self._m.add(np.log(z[ok]), np.log(p[ok]))
+
+    def result(self) -> dict:
+        m = self._m
+        if m.n < 3 or m.cxx <= 0:
+            return {'model': 'bekker', 'samples': m.n}
+        n_exp = float(m.cxy / m.cxx)
+        ln_k = m.my - n_exp * m.mx
+        s2 = max(float(m.cyy - n_exp * m.cxy), 0.0) / (m.n - 2)
+        se_n = math.sqrt(s2 / m.cxx)
+        se_ln_k = math.sqrt(s2 * (1.0 / m.n + m.mx * m.mx / m.cxx))
+        return {
+            'model': 'bekker',
+            'samples': m.n,
+            'plate_width': self.plate_width,
+            'k_eq': math.exp(ln_k),
+            'n': n_exp,
+            'rse': {'k_eq': se_ln_k, 'n': se_n / abs(n_exp) if n_exp else math.inf},
+        }
+
+
+class JanosiFit:
+    """
+    Streaming fit of tau = tau_max * (1 - exp(-j / K)).
+
+    For a fixed K the model is linear in tau_max, so a bank of scalar least
+    squares fits, one per candidate K, is updated with every sample (O(1) in
+    the run length). The best K minimises the residual sum of squares; its
+    uncertainty is the range of candidates whose residual is within one
+    residual variance of the minimum. Until the displacement has reached a
+    few K the curve has not bent over, tau_max and K trade off against each
+    other and model error dominates the residual, so the fit reports
+    `coverage` = max displacement / K alongside.
+    """
+    def __init__(self, normal_stress: float, candidates: np.ndarray = K_CANDIDATES):
+        self.normal_stress = normal_stress
+        self.K = np.asarray(candidates, dtype=np.float64)
+        self._n = 0
+        self._j_max = 0.0
+        self._sgg = np.zeros(len(self.K))
+        self._sgt = np.zeros(len(self.K))
+        self._stt = 0.0
+
+    def add(self, displacement, stress):
+        j = np.abs(np.asarray(displacement, dtype=np.float64))
+        tau = np.asarray(stress, dtype=np.float64)
+        ok = np.isfinite(j) & np.isfinite(tau)
+        j, tau = j[ok], tau[ok]
+        if not len(j):
+            return
+        g = -np.expm1(-j[:, None] / self.K)
+        self._sgg += np.einsum('ij,ij->j', g, g)
+        self._sgt += tau @ g
+        self._stt += tau @ tau
+        self._n += len(j)
+        self._j_max = max(self._j_max, float(j.max()))
+
+    def result(self) -> dict:
+        n = self._n
+        if n < 3 or not self._sgg.all():
+            return {'model': 'janosi', 'samples': n}
+        tau_max = self._sgt / self._sgg
+        sse = np.maximum(self._stt - self._sgt * tau_max, 0.0)
+        best = int(np.argmin(sse))
+        s2 = float(sse[best]) / (n - 2)
+        within = np.flatnonzero(sse <= sse[best] + s2)
+        lo, hi = self.K[within[0]], self.K[within[-1]]
+        K = self.K[best]
+        half_step = math.sqrt(self.K[1] / self.K[0]) - 1.0
+        at_edge = best in (0, len(self.K) - 1)
+        t_max = float(tau_max[best])
+        return {
+            'model': 'janosi',
+            'samples': n,
+            'normal_stress': self.normal_stress,
+            'tau_max': t_max,
+            'K': float(K),
+            'K_range': [float(lo), float(hi)],
+            'coverage': self._j_max / K,
+            'rse': {
+                'tau_max': math.sqrt(s2 / self._sgg[best]) / abs(t_max) if t_max else math.inf,
+                'K': math.inf if at_edge else max((hi - lo) / (2 * K), half_step),
+            },
+        }
+
+
+def _line_fit(points):
+    # Least-squares y = a + b * x over (x, y) points; None without two distinct x
+    x = np.array([p[0] for p in points], dtype=np.float64)
+    y = np.array([p[1] for p in points], dtype=np.float64)
+    if len(x) < 2 or np.ptp(x) == 0:
+        return None
+    b, a = np.polyfit(x, y, 1)
+    return a, b
+
+
+def split_bekker(points):
+    """
+    kc and kphi from (plate width, k_eq) pairs of at least two plate widths,
+    since k_eq = kc / b + kphi is linear in 1 / b. None otherwise.
+    """
+    fit = _line_fit([(1.0 / b, k) for b, k in points])
+    if fit is None:
+        return None
+    kphi, kc = fit
+    return {'kc': float(kc), 'kphi': float(kphi)}
+
+
+def split_mohr_coulomb(points):
+    """
+    c and phi (degrees) from (normal stress, tau_max) pairs of at least two
+    normal stresses, since tau_max = c + sigma * tan(phi). None otherwise.
+    """
+    fit = _line_fit(points)
+    if fit is None:
+        return None
+    c, slope = fit
+    return {'c': float(c), 'phi': math.degrees(math.atan(slope))}
+
+
+def fits_path(log_path: str) -> str:
+    """Where the fit results of a run log are stored."""
+    if os.path.isdir(log_path):
+        return os.path.join(log_path, 'fits.json')
+    return os.path.splitext(log_path)[0] + '.fits.json'
+
+
+def save_fits(log_path: str, results: list):
+    path = fits_path(log_path)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_fits(log_path: str) -> list:
+    try:
+        with open(fits_path(log_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+class SoilAnalyzer(QObject):
+    """
+    Streaming soil-parameter fits for the test states.
+
+    Connected to the sample stream, it feeds each test's samples to a
+    BekkerFit (LOADTEST) or JanosiFit (GROUSERTEST / RUBBERTEST). Sinkage
+    and shear displacement come from the 'sinkage' / 'shear_displacement'
+    channels when registered and measured, otherwise from the configured
+    constant rates times 't'. Results of finished tests are kept per
+    session to separate kc / kphi and c / phi across plate widths and
+    normal stresses.
+
+    Fits absorb every sample; results are solved for and emitted at most
+    once per update_interval seconds.
+
+    A result is 'converged' once every relative standard error is below
+    `tolerance` with at least `min_samples` samples, and for shear tests
+    once the displacement has reached MIN_COVERAGE * K (95 % of tau_max).
+    """
+    fit_updated = pyqtSignal(dict)
+
+    def __init__(self, state_channels: dict, plate_width: float, normal_stress: float,
+                 sinkage_rate: float, shear_rate: float,
+                 tolerance: float = 0.05, min_samples: int = 50,
+                 update_interval: float = 0.1):
+        super().__init__()
+        self.state_channels = {s.value: (s, ch) for s, ch in state_channels.items()}
+        self.plate_width = plate_width
+        self.normal_stress = normal_stress
+        self.sinkage_rate = sinkage_rate
+        self.shear_rate = shear_rate
+        self.tolerance = tolerance
+        self.min_samples = min_samples
+        self.update_interval = update_interval
+
+        self.bekker_history = []            # (plate width, k_eq)
+        self.shear_history = {}             # test name -> [(sigma, tau_max)]
+        self._fit = None
+        self._state = None
+        self._latest = None
+        self.last_result = None             # final result of the last finished test
+        self._lock = threading.Lock()
+
+    @property
+    def latest(self) -> dict:
+        """Most recent result of the current (or last) test, or None."""
+        return self._latest
+
+    def begin(self, state):
+        """Start fitting a new test in the given state."""
+        with self._lock:
+            self._state = state
+            self._latest = None
+            self._last_update = 0.0
+            if state.name == 'LOADTEST':
+                self._fit = BekkerFit(self.plate_width)
+            else:
+                self._fit = JanosiFit(self.normal_stress)
+
+    def add_samples(self, samples):
+        with self._lock:
+            fit = self._fit
+            if fit is None:
+                return
+            entry = self.state_channels.get(int(samples['state'][0]))
+            if entry is None or entry[0] != self._state:
+                return
+            values = samples[entry[1]]
+            ok = values == values
+            if not ok.any():
+                return
+            rows = samples[ok]
+            if isinstance(fit, BekkerFit):
+                fit.add(self._abscissa(rows, 'sinkage', self.sinkage_rate), values[ok])
+            else:
+                fit.add(self._abscissa(rows, 'shear_displacement', self.shear_rate), values[ok])
+            # The estimate itself is only solved for at the update rate
+            now = time.monotonic()
+            if now - self._last_update < self.update_interval:
+                return
+            self._last_update = now
+            result = self._finish_result(fit.result())
+            self._latest = result
+        self.fit_updated.emit(result)
+
+    def end(self) -> dict:
+        """Stop fitting; returns the final result and adds it to the session history."""
+        with self._lock:
+            fit, self._fit = self._fit, None
+            if fit is None:
+                return None
+            result = fit.result()
+            if self._converged(result):
+                if result['model'] == 'bekker' and 'k_eq' in result:
+                    self.bekker_history.append((result['plate_width'], result['k_eq']))
+                elif 'tau_max' in result:
+                    self.shear_history.setdefault(self._state.name, []).append(
+                        (result['normal_stress'], result['tau_max'])
+                    )
+            # The split includes this test once it is in the history
+            result = self._finish_result(result)
+            self._latest = self.last_result = result
+        self.fit_updated.emit(result)
+        return result
+
+    def _abscissa(self, rows, channel: str, rate: float):
+        if channel in CHANNELS:
+            measured = rows[channel]
+            if (measured == measured).all():
+                return measured
+        return rate * rows['t']
+
+    def _converged(self, result: dict) -> bool:
+        rse = result.get('rse')
+        return bool(
+            rse and result['samples'] >= self.min_samples
+            and all(v < self.tolerance for v in rse.values())
+            and result.get('coverage', MIN_COVERAGE) >= MIN_COVERAGE
+        )
+
+    def _finish_result(self, result: dict) -> dict:
+        result['test'] = self._state.name
+        result['converged'] = self._converged(result)
+        if result['model'] == 'bekker':
+            split = split_bekker(self.bekker_history)
+        else:
+            split = split_mohr_coulomb(self.shear_history.get(result['test'], []))
+        if split:
+            result.update(split)
+        return result
+
+
+def format_fit(result: dict) -> str:
+    """One-line summary of a SoilAnalyzer result."""
+    if result is None:
+        return "no fit"
+    name = result['test']
+    if 'rse' not in result:
+        return f"{name}: {result['samples']} samples, fitting..."
+    rse = result['rse']
+    if result['model'] == 'bekker':
+        text = (f"{name}: k_eq={result['k_eq']:.4g} (±{rse['k_eq']:.1%}) "
+                f"n={result['n']:.3f} (±{rse['n']:.1%})")
+        if 'kc' in result:
+            text += f" kc={result['kc']:.4g} kphi={result['kphi']:.4g}"
+    else:
+        text = (f"{name}: tau_max={result['tau_max']:.3f} kPa (±{rse['tau_max']:.1%}) "
+                f"K={result['K'] * 1000:.1f} mm (±{rse['K']:.1%})")
+        if 'c' in result:
+            text += f" c={result['c']:.3f} kPa phi={result['phi']:.1f} deg"
+    text += f", {result['samples']} samples"
+    if result['converged']:
+        text += " - CONVERGED"
+    return text
@@ -0,0 +1,87 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# Cable anchor offset and arm radius of the rotation rig (mm)
+RigGeometry = namedtuple('RigGeometry', ['offset', 'radius'])
+DEFAULT_GEOMETRY = RigGeometry(offset=955.9, radius=247.5)
+
+PROFILES = ('constant', 'trapezoidal', 'scurve')
+
+Trajectory = namedtuple('Trajectory', [
+    'times',        # s, one entry per control tick
+    'angle',        # rad
+    'omega',        # rad/s
+    'setpoints',    # cable length
+    'velocity',     # cable length rate, for feed-forward
+])
+
+
+def _angle_profile(profile: str, t, theta: float, duration: float, accel_fraction: float):
+    """Return (angle, angular velocity) arrays for the requested profile shape."""
+    if profile == 'constant':
+        omega = np.full_like(t, theta / duration)
+        return omega * t, omega
+    if profile == 'trapezoidal':
+        ta = accel_fraction * duration
+        if not 0.0 < ta <= duration / 2:
+            raise ValueError("accel_fraction must be in (0, 0.5]")
+        w_peak = theta / (duration - ta)
+        acc = w_peak / ta
+        td = duration - ta
+        angle = np.where(
+            t < ta, 0.5 * acc * t**2,
+            np.where(t <= td, 0.5 * acc * ta**2 + w_peak * (t - ta),
+                     theta - 0.5 * acc * (duration - t)**2)
+        )
+        omega = np.where(t < ta, acc * t,
+                         np.where(t <= td, w_peak, acc * (duration - t)))
+        return angle, omega
+    if profile == 'scurve':
+        # Cycloidal motion: zero velocity and acceleration at both ends
+        phase = 2 * np.pi * t / duration
+        angle = theta * (t / duration - np.sin(phase) / (2 * np.pi))
+        omega = theta / duration * (1.0 - np.cos(phase))
+        return angle, omega
+    raise ValueError(f"Unknown trajectory profile: {profile}")
+
+
+@lru_cache(maxsize=32)
+def generate(rotation_deg: float, rotation_time: float, frequency: float,
+             profile: str = 'constant', geometry: RigGeometry = DEFAULT_GEOMETRY,
+             accel_fraction: float = 0.25) -> Trajectory:
+    """
+    Cable-length trajectory for rotating the arm by rotation_deg over rotation_time.
+
+    Results are memoized per parameter tuple and their arrays are read-only,
+    so switching back to a previous configuration costs no allocation.
+
+    Args:
+        rotation_deg (float): Total rotation in degrees.
+        rotation_time (float): Duration in seconds.
+        frequency (float): Control frequency in Hz (one point per tick).
+        profile (str): 'constant', 'trapezoidal' or 'scurve'.
+        geometry (RigGeometry): Rig dimensions.
+        accel_fraction (float): Share of the duration spent accelerating
+            (and again decelerating) for the trapezoidal profile.
+
+    Returns:
+        Trajectory: times, angle, omega, setpoints and velocity arrays.
+    """
+    steps = int(rotation_time * frequency) + 1
+    times = np.arange(steps) / frequency
+    theta = np.radians(rotation_deg)
+    angle, omega = _angle_profile(profile, times, theta, rotation_time, accel_fraction)
+
+    offset, radius = geometry
+    x = offset + radius * np.sin(angle)
+    y = radius * np.cos(angle)
+    setpoints = np.hypot(x, y)
+    # dl/dt = dl/dangle * omega with dl/dangle = offset * radius * cos(angle) / l
+    velocity = offset * radius * np.cos(angle) / setpoints * omega
+
+    traj = Trajectory(times, angle, omega, setpoints, velocity)
+    for arr in traj:
+        arr.setflags(write=False)
+    return traj
@@ -0,0 +1,145 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated (x, y) ring buffer; the oldest points are overwritten when full.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._x = np.empty(capacity, dtype=np.float64)
+        self._y = np.empty(capacity, dtype=np.float64)
+        self._head = 0      # next write position
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def append(self, x: float, y: float):
+        i = self._head
+        self._x[i] = x
+        self._y[i] = y
+        self._head = (i + 1) % self.capacity
+        if self._len < self.capacity:
+            self._len += 1
+
+    def extend(self, x, y):
+        """Append arrays of points with at most two slice copies."""
+        n = len(x)
+        if n > self.capacity:
+            x, y, n = x[-self.capacity:], y[-self.capacity:], self.capacity
+        i = self._head
+        first = min(n, self.capacity - i)
+        self._x[i:i + first] = x[:first]
+        self._y[i:i + first] = y[:first]
+        self._x[:n - first] = x[first:]
+        self._y[:n - first] = y[first:]
+        self._head = (i + n) % self.capacity
+        self._len = min(self._len + n, self.capacity)
+
+    def clear(self):
+        self._head = 0
+        self._len = 0
+
+    def arrays(self):
+        """Return (x, y) in insertion order (views unless the buffer has wrapped)."""
+        if self._len < self.capacity:
+            return self._x[:self._len], self._y[:self._len]
+        h = self._head
+        return (np.concatenate((self._x[h:], self._x[:h])),
+                np.concatenate((self._y[h:], self._y[:h])))
+
+
+def min_max_envelope(x, y, columns: int):
+    """
+    Downsample to one (min, max) pair per pixel column.
+
+    Returns at most 2 * columns points that draw the same outline as the full
+    series, so render cost no longer depends on how long the test has run.
+    """
+    n = len(x)
+    if columns <= 0 or n <= 2 * columns:
+        return x, y
+    per = n // columns
+    start = n - per * columns   # keep the newest samples in full bins
+    xs = x[start:].reshape(columns, per)
+    ys = y[start:].reshape(columns, per)
+    env_x = np.empty(2 * columns)
+    env_y = np.empty(2 * columns)
+    env_x[0::2] = xs[:, 0]
+    env_x[1::2] = xs[:, -1]
+    env_y[0::2] = ys.min(axis=1)
+    env_y[1::2] = ys.max(axis=1)
+    return env_x, env_y
+
+
+class LivePlot:
+    """
+    Blitted single-line plot fed from a ring buffer.
+
+    append() only stores the sample; refresh() (called at the display frame
+    rate) pushes the decimated data to the line and blits it over a cached
+    background. Axes are rescaled, with headroom, only when the data leaves
+    the current limits.
+    """
+    def __init__(self, canvas, ax, capacity: int = 100000):
+        self.canvas = canvas
+        self.ax = ax
+        self.line, = ax.plot([], [], animated=True)
+        self.buffer = RingBuffer(capacity)
+        self._dirty = False
+        self._background = None
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def append(self, x: float, y: float):
+        self.buffer.append(x, y)
+        self._dirty = True
+
+    def extend(self, x, y):
+        self.buffer.extend(x, y)
+        self._dirty = True
+
+    def clear(self):
+        self.buffer.clear()
+        self.line.set_data([], [])
+        self.ax.set_xlim(0.0, 1.0)
+        self.ax.set_ylim(-1.0, 1.0)
+        self._dirty = False
+        self.canvas.draw()
+
+    def refresh(self):
+        """Redraw the line if new samples arrived since the last frame."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        x, y = self.buffer.arrays()
+        if len(x) == 0:
+            return
+        columns = int(self.ax.bbox.width)
+        self.line.set_data(*min_max_envelope(x, y, columns))
+
+        if self._rescale(x[0], x[-1], y.min(), y.max()) or self._background is None:
+            # Full redraw; _on_draw caches the new background and draws the line
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    def _rescale(self, x0, x1, y0, y1) -> bool:
+        xlo, xhi = self.ax.get_xlim()
+        ylo, yhi = self.ax.get_ylim()
+        changed = False
+        if x0 < xlo or x1 > xhi:
+            span = max(x1 - x0, 1.0)
+            self.ax.set_xlim(x0, x1 + 0.5 * span)
+            changed = True
+        if y0 < ylo or y1 > yhi:
+            pad = max(0.1 * (y1 - y0), 1e-3)
+            self.ax.set_ylim(min(y0, ylo) - pad, max(y1, yhi) + pad)
+            changed = True
+        return changed
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
@@ -0,0 +1,46 @@
+import logging
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QPlainTextEdit
+
+
+class LogView(QPlainTextEdit):
+    """
+    Read-only command window.
+
+    append() only queues the message; a timer adds everything queued since
+    the last tick in a single appendPlainText() call. The document keeps at
+    most `max_blocks` lines, dropping the oldest, and messages below `level`
+    are ignored.
+    """
+    def __init__(self, max_blocks: int = 2000, interval_ms: int = 100,
+                 level: int = logging.INFO, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_blocks)
+        self.level = level
+        self._pending = []
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start()
+
+    def append(self, level: int, msg: str):
+        if level < self.level:
+            return
+        if level >= logging.WARNING:
+            msg = f"[{logging.getLevelName(level)}] {msg}"
+        self._pending.append(msg)
+
+    def flush(self):
+        if not self._pending:
+            return
+        # Keep only what the document would retain anyway
+        lines = self._pending[-self.maximumBlockCount():]
+        self._pending.clear()
+        self.appendPlainText("\n".join(lines))
+
+    def clear(self):
+        self._pending.clear()
+        super().clear()
@@ -1,10 +1,22 @@
+import logging
+
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import (
     QMainWindow, QPushButton, QWidget,
-    QVBoxLayout, QHBoxLayout, QLabel, QPlainTextEdit, QComboBox, QInputDialog
+    QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QInputDialog, QMessageBox
 )
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 from core.controller import State, Controller
+from core.soil_fit import format_fit
+from gui.log_view import LogView
+from gui.stats_panel import StatsPanel
+import config
+
+# (title, channel) of each live plot
+PLOT_CHANNELS = [
+    ("Grouser", 'grouser_shear'),
+    ("Rubber",  'rubber_shear'),
+    ("Load",    'load_pressure'),
+]
 
 class MainWindow(QMainWindow):
     def __init__(self, controller: Controller):
@@ -31,25 +43,37 @@ class MainWindow(QMainWindow):
         self.seq_btn.clicked.connect(self._on_sequence_start)
         self.reset_btn.clicked.connect(self._on_reset)
 
-        # Command window
-        self.command_window = QPlainTextEdit()
-        self.command_window.setReadOnly(True)
+        # Continue a run interrupted by a crash or the emergency stop
+        self.resume_btn = QPushButton("Resume Run")
+        self.resume_btn.clicked.connect(self._on_resume)
+
+        # Command window: bounded, appended in batches
+        self.command_window = LogView(
+            max_blocks=config.LOG_VIEW_MAX_BLOCKS,
+            interval_ms=config.LOG_VIEW_INTERVAL_MS,
+            level=getattr(logging, config.LOG_VIEW_LEVEL.upper(), logging.INFO)
+        )
         self.command_window.setPlaceholderText("Command Window")
 
-        # Plot canvases
-        titles = ["Grouser", "Rubber", "Load"]
+        # Live soil-parameter fit of the running test
+        self.fit_label = QLabel("Fit: -")
+        self._fit_converged = False
+
+        # Tick timing panel, hidden until toggled
+        self.stats_panel = StatsPanel(self.controller)
+        self.stats_panel.setVisible(False)
+        self.stats_btn = QPushButton("Timing")
+        self.stats_btn.setCheckable(True)
+        self.stats_btn.toggled.connect(self.stats_panel.setVisible)
+
+        # Plot canvases are created once the window is up (see _init_plots)
         self.canvases = []
-        for title in titles:
-            fig = Figure()
-            canvas = FigureCanvas(fig)
-            ax = fig.add_subplot(111)
-            ax.set_title(title)
-            line, = ax.plot([], [])
-            canvas.ax = ax
-            canvas.line = line
-            canvas.xdata = []
-            canvas.ydata = []
-            self.canvases.append(canvas)
+        self.plots = []
+
+        # Redraws are coalesced to a fixed frame rate, independent of sample rate
+        self.plot_timer = QTimer(self)
+        self.plot_timer.setInterval(int(1000 / config.PLOT_FPS))
+        self.plot_timer.timeout.connect(self._refresh_plots)
 
         # Layout assembly
         top_layout = QHBoxLayout()
@@ -58,17 +82,19 @@ class MainWindow(QMainWindow):
         top_layout.addWidget(self.up_btn)
         top_layout.addWidget(self.down_btn)
         top_layout.addWidget(self.seq_btn)
+        top_layout.addWidget(self.resume_btn)
         top_layout.addWidget(self.toggle_btn)
         top_layout.addWidget(self.reset_btn)
+        top_layout.addWidget(self.stats_btn)
 
-        graphs_layout = QHBoxLayout()
-        for c in self.canvases:
-            graphs_layout.addWidget(c)
+        self.graphs_layout = QHBoxLayout()
 
         main_layout = QVBoxLayout()
         main_layout.addLayout(top_layout)
-        main_layout.addLayout(graphs_layout)
+        main_layout.addLayout(self.graphs_layout, stretch=1)
+        main_layout.addWidget(self.fit_label)
         main_layout.addWidget(self.command_window)
+        main_layout.addWidget(self.stats_panel)
 
         container = QWidget()
         container.setLayout(main_layout)
@@ -78,6 +104,7 @@ class MainWindow(QMainWindow):
         self.controller.data_updated.connect(self.update_graphs)
         self.controller.state_changed.connect(self._on_state_change)
         self.controller.log_message.connect(self._append_log)
+        self.controller.soil.fit_updated.connect(self._on_fit)
 
         # Initial UI update
         self._on_state_change(self.controller.state)
@@ -89,14 +116,56 @@ class MainWindow(QMainWindow):
         )
         self.emergency_btn.clicked.connect(self._on_emergency_stop)
         top_layout.addWidget(self.emergency_btn)
+
+        # matplotlib is slow to import; let the window paint first
+        QTimer.singleShot(0, self._init_plots)
+        QTimer.singleShot(0, self._offer_resume)
+
+    def _init_plots(self):
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        from gui.live_plot import LivePlot
+
+        for title, _ in PLOT_CHANNELS:
+            fig = Figure()
+            canvas = FigureCanvas(fig)
+            ax = fig.add_subplot(111)
+            ax.set_title(title)
+            self.graphs_layout.addWidget(canvas)
+            self.canvases.append(canvas)
+            self.plots.append(LivePlot(canvas, ax, capacity=config.PLOT_BUFFER_SIZE))
+        self.plot_timer.start()
     
+    def _offer_resume(self):
+        # A run left over from a crash: resume it or finalize its log
+        session = self.controller.pending_session()
+        if session is None:
+            return
+        box = QMessageBox(self)
+        box.setWindowTitle("Interrupted Run")
+        box.setText(
+            f"Run {session['run_id']} was interrupted in {session['state']} "
+            f"(t={session['t']:.1f} s).\nResume it or finalize its log?"
+        )
+        resume = box.addButton("Resume", QMessageBox.AcceptRole)
+        finalize = box.addButton("Finalize", QMessageBox.DestructiveRole)
+        box.addButton("Later", QMessageBox.RejectRole)
+        box.exec_()
+        if box.clickedButton() is resume:
+            self._on_resume()
+        elif box.clickedButton() is finalize:
+            self.controller.finalize_session(session)
+            self._on_state_change(self.controller.state)
+
+    def _on_resume(self):
+        self._clear_all()
+        self.controller.resume_session()
+        self._on_state_change(self.controller.state)
+
     def _on_emergency_stop(self):
-        # 1) Kill the test timer
-        if self.controller.timer.isActive():
-            self.controller.timer.stop()
-        # 2) Abort sequence and reset state
-        self.controller.reset()
-        # 3) Close serial if it exists
+        # 1) Stop the rig and abort the sequence; the run stays resumable
+        self.controller.emergency_stop()
+        # 2) Close serial if it exists
         if getattr(self, "serial_client", None):
             try:
                 self.serial_client.close()
@@ -104,7 +173,7 @@ class MainWindow(QMainWindow):
                 self.command_window.appendPlainText(
                     f"[Emergency] Error closing serial: {e}"
                 )
-        # 4) Clear all plots and logs
+        # 3) Clear all plots and logs
         self._clear_all()
         self.command_window.appendPlainText("!!! EMERGENCY STOP ACTIVATED !!!")
 
@@ -139,6 +208,7 @@ class MainWindow(QMainWindow):
         pre = (state == State.PRESTART)
         for w in (self.winch_combo, self.up_btn, self.down_btn, self.seq_btn):
             w.setVisible(pre)
+        self.resume_btn.setVisible(pre and self.controller.pending_session() is not None)
         # Toggle only in test states
         running_states = (State.GROUSERTEST, State.RUBBERTEST, State.LOADTEST)
         is_test = (state in running_states)
@@ -151,30 +221,41 @@ class MainWindow(QMainWindow):
         self.reset_btn.setVisible(True)
         # Command window always visible
 
-    def update_graphs(self, data):
-        t, v1, v2, v3 = data
-        mapping = {
-            State.GROUSERTEST: (0, v1),
-            State.RUBBERTEST: (1, v2),
-            State.LOADTEST: (2, v3),
-        }
-        idx, val = mapping.get(self.controller.state, (None, None))
-        if idx is not None and val is not None:
-            canvas = self.canvases[idx]
-            canvas.xdata.append(t)
-            canvas.ydata.append(val)
-            canvas.line.set_data(canvas.xdata, canvas.ydata)
-            canvas.ax.relim()
-            canvas.ax.autoscale_view()
-            canvas.draw()
-
-    def _append_log(self, msg: str):
-        self.command_window.appendPlainText(msg)
+    def update_graphs(self, samples):
+        # Each plot takes the samples that carry a value for its channel
+        if len(samples) == 1:
+            sample = samples[0]
+            for (_, channel), plot in zip(PLOT_CHANNELS, self.plots):
+                v = sample[channel]
+                if v == v:      # not NaN
+                    plot.append(sample['t'], v)
+            return
+        t = samples['t']
+        for (_, channel), plot in zip(PLOT_CHANNELS, self.plots):
+            values = samples[channel]
+            measured = values == values
+            if measured.any():
+                plot.extend(t[measured], values[measured])
+
+    def _refresh_plots(self):
+        for plot in self.plots:
+            plot.refresh()
+
+    def _on_fit(self, result: dict):
+        self.fit_label.setText(f"Fit: {format_fit(result)}")
+        converged = result['converged']
+        self.fit_label.setStyleSheet("color: green; font-weight: bold;" if converged else "")
+        if converged and not self._fit_converged and self.controller.timer.isActive():
+            self.command_window.append(
+                logging.INFO, f"{result['test']} fit converged; the test can be stopped"
+            )
+        self._fit_converged = converged
+
+    def _append_log(self, level: int, msg: str):
+        self.command_window.append(level, msg)
 
     def _clear_all(self):
         # Clear plots and log window
-        for c in self.canvases:
-            c.xdata.clear(); c.ydata.clear()
-            c.line.set_data([], [])
-            c.ax.relim(); c.ax.autoscale_view(); c.draw()
+        for plot in self.plots:
+            plot.clear()
         self.command_window.clear()
\ No newline at end of file
@@ -0,0 +1,48 @@
+from PyQt5.QtWidgets import QMainWindow, QTabWidget, QPushButton, QVBoxLayout, QWidget
+
+from core.controller import State
+from gui.main_window import MainWindow
+
+
+class RigTabs(QMainWindow):
+    """
+    One MainWindow per rig in tabs, plus an emergency stop for all rigs.
+
+    A tab's title shows the rig name and its current state.
+    """
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+        self.setWindowTitle(f"Bevameter: {len(manager)} rigs")
+
+        self.tabs = QTabWidget()
+        self.windows = []
+        for rig in manager:
+            window = MainWindow(rig.controller)
+            window.serial_client = rig.transport
+            self.windows.append(window)
+            index = self.tabs.addTab(window, rig.name)
+            rig.controller.state_changed.connect(
+                lambda state, i=index, name=rig.name: self._on_state_change(i, name, state)
+            )
+
+        self.stop_all_btn = QPushButton("EMERGENCY STOP ALL RIGS")
+        self.stop_all_btn.setStyleSheet(
+            "background-color: red; color: white; font-weight: bold;"
+        )
+        self.stop_all_btn.clicked.connect(self._on_stop_all)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.stop_all_btn)
+        layout.addWidget(self.tabs, stretch=1)
+        container = QWidget()
+        container.setLayout(layout)
+        self.setCentralWidget(container)
+
+    def _on_state_change(self, index: int, name: str, state: State):
+        text = name if state == State.PRESTART else f"{name} ({state.name})"
+        self.tabs.setTabText(index, text)
+
+    def _on_stop_all(self):
+        for window in self.windows:
+            window._on_emergency_stop()
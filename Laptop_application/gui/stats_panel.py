@@ -0,0 +1,33 @@
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtWidgets import QPlainTextEdit
+from core.instrumentation import format_snapshot
+
+
+class StatsPanel(QPlainTextEdit):
+    """
+    Read-only text panel showing Controller.instrumentation_snapshot(),
+    refreshed once per second while visible.
+    """
+    def __init__(self, controller, parent=None):
+        super().__init__(parent)
+        self.controller = controller
+        self.setReadOnly(True)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.setPlaceholderText("Tick timing")
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        self.setPlainText(format_snapshot(self.controller.instrumentation_snapshot()))
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
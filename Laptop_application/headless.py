@@ -0,0 +1,353 @@
+"""
+Headless runner: executes a scripted test plan on the Controller without
+the GUI, the live plots or the sketch upload, then prints a summary.
+
+    python headless.py plans/overnight.json [--json summary.json]
+
+Plan format (JSON, or YAML when PyYAML is installed):
+
+    {
+      "name": "overnight",
+      "interval_ms": 100,
+      "repeat": 3,
+      "steps": [
+        {"action": "sequence", "include_grouser": true,
+         "durations": {"GROUSERTEST": 30, "RUBBERTEST": 30, "LOADTEST": 60}},
+        {"action": "rotation", "rotation_deg": 90, "rotation_time": 10,
+         "profile": "scurve"},
+        {"action": "wait", "duration": 5}
+      ]
+    }
+
+A run interrupted by a crash is finalized before the plan starts, or with
+--resume continued first (its remaining tests use the durations of the
+plan's first sequence step).
+
+Sequence durations default to the step's "duration" (5 s); with
+"until_converged": true each test stops as soon as its soil-parameter fit
+converges, the duration being the upper limit. Rotation parameters default
+to the values in config.py. BACKEND=asyncio runs the control loop and
+the log writing on an asyncio event loop, as in the GUI. There is no Opta
+here, so ACQ_SOURCE defaults to the simulated 'plant'.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+os.environ.setdefault('ACQ_SOURCE', 'plant')
+import config
+from core import async_loop
+from core.controller import Controller, State
+from core.event_log import setup_trace_log, shutdown_trace_log
+from core.soil_fit import format_fit
+from core.instrumentation import format_snapshot
+from core.rigs import make_writer_pool
+
+ACTIONS = ('sequence', 'rotation', 'wait')
+
+# How often completion of a rotation is checked (ms)
+POLL_INTERVAL_MS = 20
+
+
+def load_plan(path: str) -> dict:
+    """Read a JSON or YAML test plan and check its steps."""
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML plans need PyYAML (pip install pyyaml)")
+            plan = yaml.safe_load(f)
+        else:
+            plan = json.load(f)
+    if not isinstance(plan, dict) or not plan.get('steps'):
+        raise ValueError("Plan needs a non-empty 'steps' list")
+    for i, step in enumerate(plan['steps']):
+        if step.get('action') not in ACTIONS:
+            raise ValueError(f"Step {i}: action must be one of {ACTIONS}")
+        for name in step.get('durations', {}):
+            if name not in State.__members__:
+                raise ValueError(f"Step {i}: unknown state {name}")
+    plan.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    return plan
+
+
+class HeadlessRunner:
+    """
+    Drives a Controller through a plan on a Qt event loop.
+
+    Each step is a generator that performs controller calls and yields
+    either a number of seconds to wait or a predicate polled until it
+    returns True, so the event loop (and the control loop's queued
+    signals) keeps running between the scripted actions.
+    """
+    def __init__(self, controller: Controller, plan: dict, verbose: bool = False,
+                 resume: bool = False):
+        self.controller = controller
+        self.plan = plan
+        self.verbose = verbose
+        self.resume = resume
+        self.results = []
+        self.error = None
+        self._steps = None
+        self._current = None
+        self._samples = 0
+        self._errors = []
+        self._rotating = False
+        self._finished = False
+
+        controller.data_updated.connect(self._on_data)
+        controller.log_message.connect(self._on_log)
+
+    # --- Controller signals ------------------------------------------------
+    def _on_data(self, samples):
+        self._samples += len(samples)
+        if self._rotating:
+            # Decimated acquisition records carry no setpoint
+            errors = samples['cable_setpoint'] - samples['cable_length']
+            self._errors.extend(errors[~np.isnan(errors)].tolist())
+
+    def _on_log(self, level: int, msg: str):
+        if self.verbose or level >= logging.WARNING:
+            print(f"[Controller] {logging.getLevelName(level)}: {msg}")
+
+    # --- Plan execution ----------------------------------------------------
+    def run(self, app: QCoreApplication, timeout: float = None) -> list:
+        """Execute the plan; returns one result dict per executed step."""
+        self._steps = self._iter_steps()
+        self._started = time.monotonic()
+        if timeout:
+            QTimer.singleShot(int(timeout * 1000), lambda: self._abort("timeout"))
+        QTimer.singleShot(0, self._advance)
+        async_loop.exec_(app)
+        return self.results
+
+    def _iter_steps(self):
+        if self.resume and self.controller.pending_session():
+            yield "0 resume", self._run_resume()
+        for n in range(int(self.plan.get('repeat', 1))):
+            for i, step in enumerate(self.plan['steps']):
+                action = step['action']
+                yield f"{n + 1}.{i + 1} {action}", getattr(self, f'_run_{action}')(step)
+
+    def _advance(self):
+        if self._finished:
+            return
+        try:
+            while True:
+                if self._current is None:
+                    step = next(self._steps, None)
+                    if step is None:
+                        self._finish()
+                        return
+                    self._begin(*step)
+                try:
+                    wait = next(self._current)
+                except StopIteration:
+                    self._end()
+                    continue
+                break
+        except Exception as e:
+            self._abort(f"{type(e).__name__}: {e}")
+            return
+        if callable(wait):
+            self._poll(wait)
+        else:
+            QTimer.singleShot(int(wait * 1000), self._advance)
+
+    def _poll(self, predicate):
+        if self._finished:
+            return
+        if predicate():
+            self._advance()
+        else:
+            QTimer.singleShot(POLL_INTERVAL_MS, lambda: self._poll(predicate))
+
+    def _begin(self, name: str, gen):
+        print(f"[Headless] Step {name}")
+        self._current = gen
+        self._result = {'step': name, 'started': time.monotonic()}
+        self._samples = 0
+        self._errors = []
+
+    def _end(self):
+        result = self._result
+        result['duration'] = time.monotonic() - result.pop('started')
+        result['samples'] = self._samples
+        if self._errors:
+            errors = [abs(e) for e in self._errors]
+            result['tracking_error_mean'] = sum(errors) / len(errors)
+            result['tracking_error_max'] = max(errors)
+        self.results.append(result)
+        self._current = None
+
+    def _finish(self):
+        self._finished = True
+        QCoreApplication.instance().quit()
+
+    def _abort(self, reason: str):
+        if self._finished:
+            return
+        self.error = reason
+        print(f"[Headless] Aborted: {reason}")
+        if self._rotating:
+            self.controller.stop_rotation()
+        self.controller.reset()
+        self._finish()
+
+    # --- Step implementations ----------------------------------------------
+    def _run_sequence(self, step: dict):
+        self.controller.start_sequence(step.get('include_grouser', True))
+        yield from self._run_tests(step)
+
+    def _run_tests(self, step: dict):
+        # Runs the sequence's remaining tests
+        c = self.controller
+        durations = step.get('durations', {})
+        default = float(step.get('duration', 5.0))
+        logger = c.logger
+        self._result['log'] = logger.filepath
+        until_converged = step.get('until_converged', False)
+        while c.state in (State.GROUSERTEST, State.RUBBERTEST, State.LOADTEST):
+            duration = float(durations.get(c.state.name, default))
+            c.start_test()
+            if until_converged:
+                deadline = time.monotonic() + duration
+                yield lambda: (time.monotonic() >= deadline
+                               or bool(c.soil.latest and c.soil.latest['converged']))
+            else:
+                yield duration
+            c.stop_test()
+            fit = c.soil.last_result
+            if fit and 'rse' in fit:
+                self._result.setdefault('fits', []).append(fit)
+        # The last stop_test() resets the controller and closes the log
+        self._log_counts(logger)
+
+    def _run_rotation(self, step: dict):
+        c = self.controller
+        c.configure_rotation(
+            rotation_deg=step.get('rotation_deg', config.ROTATION_DEG),
+            rotation_time=step.get('rotation_time', config.ROTATION_TIME),
+            frequency=step.get('frequency', config.CONTROL_FREQUENCY),
+            profile=step.get('profile', config.ROTATION_PROFILE)
+        )
+        logger = c.open_log('ROTATION') if step.get('log', True) else None
+        if logger:
+            self._result['log'] = logger.filepath
+        self._rotating = True
+        c.start_rotation()
+        yield lambda: not c.timer.isActive()
+        self._rotating = False
+        if logger:
+            c.close_log()
+            self._log_counts(logger)
+
+    def _run_resume(self):
+        c = self.controller
+        c.resume_session()
+        if c.timer.isActive():
+            logger = c.logger
+            self._result['log'] = logger.filepath
+            self._rotating = True
+            yield lambda: not c.timer.isActive()
+            self._rotating = False
+            c.close_log()
+            self._log_counts(logger)
+        elif c.logger:
+            steps = [s for s in self.plan['steps'] if s['action'] == 'sequence']
+            yield from self._run_tests(steps[0] if steps else {})
+
+    def _run_wait(self, step: dict):
+        yield float(step.get('duration', 1.0))
+
+    def _log_counts(self, logger):
+        if hasattr(logger, 'written'):
+            self._result['log_written'] = logger.written
+            self._result['log_dropped'] = logger.dropped
+            if logger.error is not None:
+                self._result['log_error'] = str(logger.error)
+
+
+def format_summary(plan: dict, results: list, snapshot: dict,
+                   error: str = None, elapsed: float = 0.0) -> str:
+    lines = [f"=== {plan['name']}: {len(results)} steps in {elapsed:.2f} s"
+             + (f" (aborted: {error})" if error else "")]
+    for r in results:
+        line = f"--- {r['step']}: {r['duration']:.2f} s, {r['samples']} samples"
+        if 'tracking_error_mean' in r:
+            line += (f", |error| mean={r['tracking_error_mean']:.3f}"
+                     f" max={r['tracking_error_max']:.3f}")
+        if 'log_dropped' in r:
+            line += f", logged {r['log_written']} (dropped {r['log_dropped']})"
+        lines.append(line)
+        if 'log' in r:
+            lines.append(f"    log: {r['log']}")
+        if 'log_error' in r:
+            lines.append(f"    log write FAILED: {r['log_error']}")
+        for fit in r.get('fits', []):
+            lines.append(f"    fit: {format_fit(fit)}")
+    lines.append("--- timing")
+    lines.extend("    " + l for l in format_snapshot(snapshot).splitlines())
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Run a test plan on the Controller without the GUI."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('plan', help="JSON or YAML test plan")
+    parser.add_argument('--json', metavar='PATH', help="also write the summary as JSON")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="abort the plan after this many seconds")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="print controller log messages")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted run before the plan "
+                             "(default: finalize it)")
+    args = parser.parse_args(argv)
+
+    try:
+        plan = load_plan(args.plan)
+    except (OSError, ValueError) as e:
+        print(f"[Headless] Invalid plan: {e}")
+        return 2
+
+    app = QCoreApplication(sys.argv[:1])
+    setup_trace_log(config.LOG_TRACE_FILE, config.LOG_TRACE_LEVEL)
+    pool = None
+    if config.BACKEND == 'asyncio':
+        async_loop.install(app)
+        pool = make_writer_pool()
+    controller = Controller(interval=int(plan.get('interval_ms', 100)), writer_pool=pool)
+    runner = HeadlessRunner(controller, plan, verbose=args.verbose, resume=args.resume)
+    if not args.resume:
+        path = controller.finalize_session()
+        if path:
+            print(f"[Headless] Finalized interrupted run: {path}")
+    started = time.monotonic()
+    results = runner.run(app, timeout=args.timeout)
+    elapsed = time.monotonic() - started
+    snapshot = controller.instrumentation_snapshot()
+    controller.shutdown()
+    if pool is not None:
+        pool.close()
+    async_loop.shutdown()
+    shutdown_trace_log()
+
+    print(format_summary(plan, results, snapshot, runner.error, elapsed))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'plan': plan['name'], 'elapsed': elapsed, 'error': runner.error,
+                       'steps': results, 'timing': snapshot}, f, indent=2, default=str)
+    failed = any('log_error' in r for r in results)
+    return 1 if runner.error or failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
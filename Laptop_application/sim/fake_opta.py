@@ -0,0 +1,135 @@
+import os
+import select
+import sys
+import threading
+import time
+import tty
+
+from comm.opta_protocol import encode_frame, CMD_STREAM_BINARY, CMD_STREAM_LINE, CMD_SET_RATE
+from sim.plant import BevameterPlant
+
+
+class FakeOpta:
+    """
+    Simulated Opta on a pseudo-terminal pair (Linux/macOS).
+
+    OptaSerialClient opens `port` like a real serial device. The endpoint
+    streams (shear stress, pressure, cable length) samples from a
+    BevameterPlant at `rate` Hz, as text lines or, after STREAM BIN, as
+    frames of `batch` samples. "SPEED <value>" drives the simulated winch
+    and "RATE <Hz>" changes the sample rate.
+    """
+    def __init__(self, plant: BevameterPlant = None, rate: float = 100.0,
+                 batch: int = 10):
+        self.plant = plant if plant is not None else BevameterPlant()
+        self.rate = rate
+        self.batch = batch
+        self.binary = False
+        self.command = 0.0
+        self.commands = 0
+        self.overruns = 0
+
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        # Never block the stream on a reader that is not keeping up
+        os.set_blocking(self._master, False)
+        self.port = os.ttyname(self._slave)
+        self._running = False
+        self._thread = None
+        self._rx = bytearray()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="FakeOpta", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _handle(self, line: str):
+        self.commands += 1
+        if line == CMD_STREAM_BINARY:
+            self.binary = True
+        elif line == CMD_STREAM_LINE:
+            self.binary = False
+        elif line.startswith("SPEED "):
+            try:
+                self.command = float(line.split()[1])
+            except ValueError:
+                pass
+        elif line.startswith(CMD_SET_RATE + " "):
+            try:
+                rate = float(line.split()[1])
+            except ValueError:
+                return
+            if rate > 0:
+                self.rate = rate
+
+    def _read_commands(self):
+        while select.select([self._master], [], [], 0)[0]:
+            self._rx += os.read(self._master, 4096)
+            while b"\n" in self._rx:
+                line, _, rest = self._rx.partition(b"\n")
+                self._rx = bytearray(rest)
+                self._handle(line.decode(errors="ignore").strip())
+
+    def _sample(self, t: float):
+        plant = self.plant
+        return (plant.shear_stress(plant.grouser, t),
+                plant.pressure(t),
+                plant.winch.step(self.command, 1.0 / self.rate))
+
+    def _run(self):
+        rate = self.rate
+        period = 1.0 / rate
+        origin = time.monotonic()
+        index = 0
+        seq = 0
+        while self._running:
+            self._read_commands()
+            if self.rate != rate:
+                # Restart the sample clock at the new rate
+                rate = self.rate
+                period = 1.0 / rate
+                origin = time.monotonic() - index * period
+            n = self.batch if self.binary else 1
+            deadline = origin + (index + n) * period
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            samples = [self._sample((index + k) * period) for k in range(n)]
+            index += n
+            if self.binary:
+                data = encode_frame(seq, samples)
+                seq += 1
+            else:
+                data = ("{:.6f},{:.6f},{:.6f}\n".format(*samples[0])).encode()
+            try:
+                os.write(self._master, data)
+            except BlockingIOError:
+                self.overruns += 1
+            except OSError:
+                return
+
+
+def main():
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 100.0
+    opta = FakeOpta(rate=rate)
+    opta.start()
+    print(f"[FakeOpta] Streaming at {rate:g} Hz on {opta.port}")
+    print(f"[FakeOpta] Run the app with OPTA_SERIAL_PORT={opta.port}")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        opta.close()
+
+
+if __name__ == '__main__':
+    main()
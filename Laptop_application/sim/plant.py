@@ -0,0 +1,154 @@
+import math
+import random
+
+
+class WinchPlant:
+    """
+    Winch / cable-length plant driven by the PID speed command.
+
+    The drive follows the command through a first-order lag (time constant
+    tau) and the cable length integrates the drive speed. Only arithmetic is
+    used in step(), so the state may also be a NumPy array of parallel plants.
+
+    Attributes:
+        gain (float): Length units per second per unit of speed command
+        tau (float): Drive time constant (seconds)
+        noise (float): Std-dev of the measurement noise on length
+    """
+    def __init__(self, length: float = 0.0, gain: float = 1.0,
+                 tau: float = 0.2, noise: float = 0.0):
+        self.gain = gain
+        self.tau = tau
+        self.noise = noise
+        self.reset(length)
+
+    def reset(self, length: float = 0.0):
+        self.length = length
+        self.speed = 0.0
+
+    def step(self, command, dt: float):
+        """Advance by dt seconds under the given speed command."""
+        self.speed = self.speed + (self.gain * command - self.speed) * (dt / (self.tau + dt))
+        self.length = self.length + self.speed * dt
+        return self.length
+
+    def measure(self) -> float:
+        if self.noise:
+            return self.length + random.gauss(0.0, self.noise)
+        return self.length
+
+
+class BekkerSoil:
+    """
+    Bekker pressure-sinkage model: p = (kc / b + kphi) * z ** n.
+
+    Units: pressure in kPa, sinkage z and plate width b in metres.
+    """
+    def __init__(self, kc: float = 5.0, kphi: float = 1500.0, n: float = 1.1,
+                 plate_width: float = 0.1):
+        self.kc = kc
+        self.kphi = kphi
+        self.n = n
+        self.plate_width = plate_width
+
+    def pressure(self, sinkage: float) -> float:
+        if sinkage <= 0.0:
+            return 0.0
+        return (self.kc / self.plate_width + self.kphi) * sinkage ** self.n
+
+
+class JanosiShear:
+    """
+    Janosi-Hanamoto shear model: tau = (c + sigma * tan(phi)) * (1 - exp(-j / K)).
+
+    Units: stresses in kPa, shear displacement j and K in metres, phi in degrees.
+    """
+    def __init__(self, c: float = 1.0, phi: float = 30.0, K: float = 0.02,
+                 normal_stress: float = 20.0):
+        self.c = c
+        self.phi = phi
+        self.K = K
+        self.normal_stress = normal_stress
+
+    def stress(self, displacement: float) -> float:
+        tau_max = self.c + self.normal_stress * math.tan(math.radians(self.phi))
+        return tau_max * (1.0 - math.exp(-abs(displacement) / self.K))
+
+
+class SinePlant:
+    """
+    The original placeholder signals: noisy sines per test, no winch response.
+    """
+    FREQUENCIES = {'GROUSERTEST': 1.0, 'RUBBERTEST': 0.5, 'LOADTEST': 2.0}
+
+    def __init__(self):
+        self.winch = None
+
+    def reset(self, length: float = 0.0):
+        pass
+
+    def measure(self, state, t: float) -> float:
+        f = self.FREQUENCIES[state.name]
+        return math.sin(2*math.pi*f*t) + random.uniform(-0.1, 0.1)
+
+    def cable_length(self) -> float:
+        return 0.0
+
+    def drive(self, command: float, dt: float):
+        pass
+
+
+class BevameterPlant:
+    """
+    Simulated rig: shear tests follow Janosi-Hanamoto for a grouser and a
+    rubber pad, the load test follows Bekker with a plate driven into the
+    soil at a constant rate, and the cable length follows a WinchPlant.
+    """
+    def __init__(self, shear_rate: float = 0.01, sinkage_rate: float = 0.002,
+                 noise: float = 0.02, winch: WinchPlant = None):
+        self.shear_rate = shear_rate        # m/s of shear displacement
+        self.sinkage_rate = sinkage_rate    # m/s of plate sinkage
+        self.noise = noise                  # relative measurement noise
+        self.grouser = JanosiShear(c=2.0, phi=32.0, K=0.015)
+        self.rubber = JanosiShear(c=0.5, phi=24.0, K=0.035)
+        self.soil = BekkerSoil()
+        self.winch = winch if winch is not None else WinchPlant()
+
+    def reset(self, length: float = 0.0):
+        self.winch.reset(length)
+
+    def shear_stress(self, model: JanosiShear, t: float) -> float:
+        return model.stress(self.shear_rate * t)
+
+    def pressure(self, t: float) -> float:
+        return self.soil.pressure(self.sinkage_rate * t)
+
+    def measure(self, state, t: float) -> float:
+        name = state.name
+        if name == 'GROUSERTEST':
+            value = self.shear_stress(self.grouser, t)
+        elif name == 'RUBBERTEST':
+            value = self.shear_stress(self.rubber, t)
+        else:
+            value = self.pressure(t)
+        return value * (1.0 + random.gauss(0.0, self.noise))
+
+    def cable_length(self) -> float:
+        return self.winch.measure()
+
+    def drive(self, command: float, dt: float):
+        self.winch.step(command, dt)
+
+
+PLANT_MODELS = {
+    'sine': SinePlant,
+    'bevameter': BevameterPlant,
+}
+
+
+def make_plant(name: str):
+    """Instantiate a plant model by its PLANT_MODELS name."""
+    try:
+        return PLANT_MODELS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown plant model: {name}") from None
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+import pytest
+
+from core.channels import make_sample
+from core.controller import State
+from core.data_logger import BufferedDataLogger, WriterPool
+
+
+class _FailingLogger:
+    # Stands in for DataLogger; the second write fails like a full disk
+    filepath = 'failing.csv'
+    run_id = 'test'
+    anchor = None
+
+    def __init__(self):
+        self.rows = 0
+        self.closed = False
+
+    def write_rows(self, items):
+        if self.rows:
+            raise OSError("No space left on device")
+        self.rows += sum(len(i) for i in items)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def _wait_for(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize('pooled', [False, True])
+def test_write_error_fails_logger_and_counts_lost_rows(pooled):
+    pool = WriterPool(1, tick=0.01) if pooled else None
+    inner = _FailingLogger()
+    logger = BufferedDataLogger(inner, flush_interval=0.01, flush_rows=1, pool=pool)
+    try:
+        logger.log(make_sample(State.GROUSERTEST, 0.0, grouser_shear=1.0))
+        _wait_for(lambda: logger.written == 1)
+        logger.log(make_sample(State.GROUSERTEST, 0.1, grouser_shear=2.0))
+        _wait_for(lambda: logger.error is not None)
+        assert isinstance(logger.error, OSError)
+
+        # Rows logged after the failure are refused and counted
+        logger.log(make_sample(State.GROUSERTEST, 0.2, grouser_shear=3.0))
+        logger.close()
+        assert inner.closed
+        assert logger.written == 1
+        assert logger.dropped == 2
+    finally:
+        if pool is not None:
+            pool.close()
@@ -0,0 +1,55 @@
+import csv
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from PyQt5.QtCore import QCoreApplication
+
+from core.controller import Controller, State
+from core.rigs import make_settings
+
+
+def _run_until(app, predicate, timeout: float):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def _data_rows(path: str) -> list:
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    # Header, clock anchor and segment markers are not samples
+    return [r for r in rows[1:] if r and not r[0].startswith('#')]
+
+
+def test_rotation_on_fresh_controller_logs_every_record(tmp_path):
+    app = QCoreApplication.instance() or QCoreApplication([sys.argv[0]])
+    settings = make_settings({
+        'ACQ_SOURCE': 'plant',
+        'LOG_FORMAT': 'csv',
+        'LOG_DIRECTORY': str(tmp_path),
+        'CHECKPOINT_FILE': str(tmp_path / 'session.wal'),
+        'SHM_BUS': '',
+    })
+    controller = Controller(interval=100, settings=settings)
+    try:
+        controller.configure_rotation(10.0, 0.5, 20.0, 'constant')
+        logger = controller.open_log('ROTATION')
+        controller.start_rotation()
+        _run_until(app, lambda: not controller.timer.isActive(), 5.0)
+        controller.close_log()
+
+        rows = _data_rows(logger.filepath)
+        assert controller.pipeline.logged > 0
+        assert len(rows) == controller.pipeline.logged
+        # No state has been entered yet: records carry PRESTART
+        assert {r[1] for r in rows} == {State.PRESTART.name}
+    finally:
+        controller.shutdown()